@@ -0,0 +1,136 @@
+"""Requests/sec of the API under concurrent clients.
+
+Start the server first (``uvicorn main:app --port 7000``), then run:
+
+    python benchmarks/concurrency.py --seed 50 --clients 100 --duration 10
+
+Mixed read/write load on reservations, e.g. to compare SQLite settings
+with several workers (``uvicorn main:app --port 7000 --workers 4``):
+
+    python benchmarks/concurrency.py --paths /reservations/ --write-ratio 0.2
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+PATHS = ["/dishes/", "/menus/", "/reservations/"]
+
+RESERVATION = {
+    "reservation_category": "SIMPLE",
+    "name": "Bench",
+    "family_name": "Mark",
+    "amount_of_people": 2,
+    "email_address": "bench@coworld.fr",
+    "phone_number": "+33611223344",
+}
+
+
+def reservation() -> dict:
+    reservation_time = datetime(2024, 1, 1, 11) + timedelta(
+        days=random.randrange(365), minutes=15 * random.randrange(48)
+    )
+    return {**RESERVATION, "reservation_time": reservation_time.isoformat()}
+
+
+async def seed(client: httpx.AsyncClient, count: int) -> None:
+    for i in range(count):
+        await client.post(
+            "/dishes/",
+            json={
+                "category": "PLATS",
+                "title": f"Bench dish {i}",
+                "ingredients": "Milk, cheese",
+                "description": "A dish seeded by the benchmark",
+                "halal": True,
+                "price": 9.5,
+            },
+        )
+        await client.post(
+            "/menus/",
+            json={
+                "title": f"Bench menu {i}",
+                "description": "A menu seeded by the benchmark",
+                "price": 19.9,
+            },
+        )
+        await client.post("/reservations/", json=reservation())
+
+
+async def client_loop(
+    client: httpx.AsyncClient,
+    deadline: float,
+    paths: list[str],
+    write_ratio: float,
+    counters: dict[str, int],
+) -> None:
+    index = 0
+    while time.perf_counter() < deadline:
+        try:
+            if random.random() < write_ratio:
+                response = await client.post("/reservations/", json=reservation())
+                counters["writes"] += 1
+            else:
+                response = await client.get(paths[index % len(paths)])
+                counters["reads"] += 1
+            if response.status_code >= 400:
+                counters["errors"] += 1
+        except httpx.TimeoutException:
+            counters["errors"] += 1
+        index += 1
+
+
+async def run(
+    base_url: str,
+    clients: int,
+    duration: float,
+    seed_count: int,
+    paths: list[str],
+    write_ratio: float,
+) -> None:
+    counters = {"reads": 0, "writes": 0, "errors": 0}
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=10
+    ) as client:
+        await seed(client, seed_count)
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(
+            *(
+                client_loop(client, deadline, paths, write_ratio, counters)
+                for _ in range(clients)
+            )
+        )
+        elapsed = time.perf_counter() - start
+    total = counters["reads"] + counters["writes"]
+    print(
+        f"{clients} clients, {elapsed:.1f}s: {total} requests "
+        f"({counters['reads']} reads, {counters['writes']} writes), "
+        f"{counters['errors']} errors, {total / elapsed:.1f} req/s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:7000")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--paths", nargs="+", default=PATHS)
+    parser.add_argument("--write-ratio", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(
+        run(
+            args.base_url,
+            args.clients,
+            args.duration,
+            args.seed,
+            args.paths,
+            args.write_ratio,
+        )
+    )
@@ -0,0 +1,129 @@
+"""Database round trips issued by each write route.
+
+Runs the app in-process against a throwaway SQLite file and counts the SQL
+statements and commits sent for one request to each route:
+
+    python -m benchmarks.round_trips
+"""
+
+import os
+import tempfile
+from collections import Counter
+
+from sqlalchemy import event
+from starlette.testclient import TestClient
+
+DISH = {
+    "category": "PLATS",
+    "title": "Round trip dish",
+    "ingredients": "Milk, cheese",
+    "description": "A dish created by the benchmark",
+    "halal": True,
+    "price": 9.5,
+}
+
+MENU = {
+    "title": "Round trip menu",
+    "description": "A menu created by the benchmark",
+    "price": 19.9,
+}
+
+RESERVATION = {
+    "reservation_category": "SIMPLE",
+    "name": "Bench",
+    "family_name": "Mark",
+    "amount_of_people": 2,
+    "email_address": "bench@coworld.fr",
+    "reservation_time": "2024-06-01T20:00:00",
+    "phone_number": "+33611223344",
+}
+
+
+def main() -> None:
+    directory = tempfile.mkdtemp()
+    os.environ[
+        "COWORLD_DATABASE_URL"
+    ] = f"sqlite+aiosqlite:///{os.path.join(directory, 'round_trips.db')}"
+    os.environ["COWORLD_SLOW_QUERY_LOG_ENABLED"] = "false"
+
+    from coworld.api import create_app
+    from coworld.database import get_engine
+
+    counts = Counter()
+
+    def count_statement(*args) -> None:
+        counts["statements"] += 1
+
+    def count_commit(*args) -> None:
+        counts["commits"] += 1
+
+    engine = get_engine().sync_engine
+    event.listen(engine, "before_cursor_execute", count_statement)
+    event.listen(engine, "commit", count_commit)
+
+    rows = []
+
+    def measure(client: TestClient, method: str, route: str, url: str, **kwargs):
+        counts.clear()
+        response = client.request(method, url, **kwargs)
+        response.raise_for_status()
+        rows.append((f"{method} {route}", counts["statements"], counts["commits"]))
+        return response
+
+    with TestClient(create_app()) as client:
+        dish = measure(client, "POST", "/dishes/", "/dishes/", json=DISH).json()
+        menu = measure(client, "POST", "/menus/", "/menus/", json=MENU).json()
+        reservation = measure(
+            client, "POST", "/reservations/", "/reservations/", json=RESERVATION
+        ).json()
+        measure(
+            client,
+            "PATCH",
+            "/dishes/{dish_id}",
+            f"/dishes/{dish['id']}",
+            json={"price": 10.5},
+        )
+        measure(
+            client,
+            "PATCH",
+            "/menus/{menu_id}",
+            f"/menus/{menu['id']}",
+            json={"discount": 10},
+        )
+        measure(
+            client,
+            "PATCH",
+            "/reservations/{reservation_id}",
+            f"/reservations/{reservation['id']}",
+            json={"amount_of_people": 4},
+        )
+        measure(
+            client,
+            "PATCH",
+            "/menus/{menu_id}/link_dish",
+            f"/menus/{menu['id']}/link_dish",
+            json={"menu_id": menu["id"], "dish_ids": [dish["id"]]},
+        )
+        measure(
+            client,
+            "DELETE",
+            "/menus/{menu_id}/unlink_dish/{dish_id}",
+            f"/menus/{menu['id']}/unlink_dish/{dish['id']}",
+        )
+        measure(client, "DELETE", "/dishes/{dish_id}", f"/dishes/{dish['id']}")
+        measure(client, "DELETE", "/menus/{menu_id}", f"/menus/{menu['id']}")
+        measure(
+            client,
+            "DELETE",
+            "/reservations/{reservation_id}",
+            f"/reservations/{reservation['id']}",
+        )
+
+    width = max(len(route) for route, _, _ in rows)
+    print(f"{'route':<{width}}  statements  commits")
+    for route, statements, commits in rows:
+        print(f"{route:<{width}}  {statements:>10}  {commits:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Time spent encoding a large reservation listing into a response body.
+
+Builds reservations in memory (no database) and times each way the API can
+turn them into JSON bytes:
+
+    python -m benchmarks.serialization --count 10000 --repeat 5
+"""
+
+import argparse
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from coworld.models.reservations import Reservation, ReservationCategory
+
+RESERVATIONS = TypeAdapter(list[Reservation])
+
+
+def reservations(count: int) -> list[Reservation]:
+    start = datetime(2024, 6, 1, 12, 0)
+    return [
+        Reservation(
+            id=uuid.uuid4(),
+            created_at=start,
+            reservation_category=ReservationCategory.SIMPLE,
+            name="Bench",
+            family_name=f"Mark {i}",
+            amount_of_people=2 + i % 6,
+            email_address=f"bench{i}@coworld.fr",
+            reservation_time=start + timedelta(minutes=15 * i),
+            phone_number="+33611223344",
+        )
+        for i in range(count)
+    ]
+
+
+def encoders(rows: list[Reservation]) -> dict:
+    return {
+        "jsonable_encoder + json": lambda: JSONResponse(jsonable_encoder(rows)).body,
+        "pydantic + json": lambda: JSONResponse(
+            RESERVATIONS.dump_python(rows, mode="json")
+        ).body,
+        "pydantic + orjson": lambda: ORJSONResponse(
+            RESERVATIONS.dump_python(rows, mode="json")
+        ).body,
+        "orjson (native types)": lambda: ORJSONResponse(
+            [row.model_dump() for row in rows]
+        ).body,
+        "TypeAdapter.dump_json": lambda: RESERVATIONS.dump_json(rows),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = reservations(args.count)
+    results = []
+    for name, encode in encoders(rows).items():
+        body = encode()
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            encode()
+            best = min(best, time.perf_counter() - start)
+        results.append((name, best * 1000, len(body)))
+
+    width = max(len(name) for name, _, _ in results)
+    print(f"{args.count} reservations, best of {args.repeat}")
+    print(f"{'encoder':<{width}}  {'ms':>8}  {'bytes':>9}")
+    for name, ms, size in results:
+        print(f"{name:<{width}}  {ms:>8.1f}  {size:>9}")
+
+
+if __name__ == "__main__":
+    main()
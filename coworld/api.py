@@ -1,29 +1,116 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 from urllib.request import Request
 
 from fastapi import FastAPI
-from starlette.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from fastapi.utils import is_body_allowed_for_status_code
+from starlette.exceptions import HTTPException
+from loguru import logger
 
+from coworld.availability import create_seating_plan_from_settings
+from coworld.cache import create_cache_from_settings
+from coworld.compression import CompressionMiddleware
+from coworld.controllers.reservations import ReservationController
+from coworld.database import create_schema, get_engine, table_names
+from coworld.dependencies import new_session
+from coworld.idempotency import (
+    IdempotencyMiddleware,
+    create_idempotency_store_from_settings,
+    error_response,
+)
 from coworld.models.errors import BaseError
+from coworld.models.reservations import SeatingGrid, SeatingSlot
+from coworld.observability import RequestContextMiddleware, configure_logging
+from coworld.responses import ENCODED_RESPONSE_CODEC, default_response_class
 from coworld.routes.dishes import router as dishes_router
 from coworld.routes.menus import router as menus_router
+from coworld.routes.metrics import router as metrics_router
 from coworld.routes.reservations import router as reservations_router
+from coworld.settings import get_settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    settings = get_settings()
+    engine = get_engine()
+    created_tables = set()
+    if settings.database_create_schema:
+        created_tables = await create_schema(engine)
+    seating_tables = {SeatingSlot.__tablename__, SeatingGrid.__tablename__}
+    if seating_tables <= await table_names(engine):
+        async with new_session() as session:
+            if await ReservationController(
+                session, app.state.seating_plan
+            ).sync_seating_slots(
+                force=settings.availability_rebuild_on_startup
+                or SeatingSlot.__tablename__ in created_tables
+            ):
+                logger.info("Rebuilt seating slot counters from reservations")
+    else:
+        logger.warning(
+            "Seating slot tables are missing, capacity counters were not checked"
+        )
+    cache = app.state.cache
+    if cache is not None:
+        await cache.start()
+    idempotency_store = app.state.idempotency_store
+    if idempotency_store is not None:
+        await idempotency_store.start()
+    yield
+    if idempotency_store is not None:
+        await idempotency_store.close()
+    if cache is not None:
+        await cache.close()
+    await engine.dispose()
 
 
 def create_app():
-    app = FastAPI(title="Coworld API")
+    settings = get_settings()
+    configure_logging(settings)
+    response_class = default_response_class(settings)
+    app = FastAPI(
+        title="Coworld API", lifespan=lifespan, default_response_class=response_class
+    )
+    app.state.cache = create_cache_from_settings(settings, ENCODED_RESPONSE_CODEC)
+    app.state.seating_plan = create_seating_plan_from_settings(settings)
+    app.state.idempotency_store = create_idempotency_store_from_settings(
+        settings, new_session
+    )
+    if app.state.idempotency_store is not None:
+        app.add_middleware(
+            IdempotencyMiddleware,
+            store=app.state.idempotency_store,
+            response_class=response_class,
+        )
+    if settings.compression_enabled:
+        app.add_middleware(CompressionMiddleware, settings=settings)
+    app.add_middleware(RequestContextMiddleware)
     app.include_router(dishes_router)
     app.include_router(menus_router)
     app.include_router(reservations_router)
+    app.include_router(metrics_router)
 
     @app.exception_handler(BaseError)
     async def exception_handler(request: Request, exc: BaseError) -> JSONResponse:
-        return JSONResponse(
-            status_code=exc.status_code,
-            content={
-                "message": exc.message,
-                "name": exc.name,
-                "status_code": exc.status_code,
-            },
+        return error_response(exc, response_class)
+
+    @app.exception_handler(HTTPException)
+    async def http_exception_handler(request: Request, exc: HTTPException) -> Response:
+        if not is_body_allowed_for_status_code(exc.status_code):
+            return Response(status_code=exc.status_code, headers=exc.headers)
+        return response_class(
+            {"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers
+        )
+
+    @app.exception_handler(RequestValidationError)
+    async def validation_exception_handler(
+        request: Request, exc: RequestValidationError
+    ) -> JSONResponse:
+        return response_class(
+            {"detail": jsonable_encoder(exc.errors())}, status_code=422
         )
 
     return app
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import date, datetime, time, timedelta
+from typing import Mapping
+
+from coworld.models.reservations import ReservationAvailability, SlotAvailability
+from coworld.settings import Settings
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class SeatingPlan:
+    def __init__(
+        self,
+        capacity: int,
+        slot_minutes: int,
+        seating_minutes: int,
+        opening_time: time,
+        closing_time: time,
+    ):
+        self.capacity = capacity
+        self.slot_minutes = slot_minutes
+        self.seating_slots = -(-seating_minutes // slot_minutes)
+        self.opening_time = opening_time
+        self.closing_time = closing_time
+        self.lock = asyncio.Lock()
+
+    def slot(self, moment: datetime) -> int:
+        return int((moment - EPOCH).total_seconds() // 60) // self.slot_minutes
+
+    def slot_time(self, slot: int) -> datetime:
+        return EPOCH + timedelta(minutes=slot * self.slot_minutes)
+
+    def slot_times(self, reservation_time: datetime) -> list[datetime]:
+        first_slot = self.slot(reservation_time)
+        return [
+            self.slot_time(slot)
+            for slot in range(first_slot, first_slot + self.seating_slots)
+        ]
+
+    def availability_window(self, day: date) -> tuple[datetime, datetime]:
+        first_slot = self.slot(datetime.combine(day, self.opening_time))
+        last_slot = self.slot(datetime.combine(day, self.closing_time))
+        return self.slot_time(first_slot), self.slot_time(
+            last_slot + self.seating_slots - 1
+        )
+
+    def availability(
+        self, day: date, booked_seats: Mapping[datetime, int]
+    ) -> ReservationAvailability:
+        first_slot = self.slot(datetime.combine(day, self.opening_time))
+        last_slot = self.slot(datetime.combine(day, self.closing_time))
+        free_seats = [
+            self.capacity - booked_seats.get(self.slot_time(slot), 0)
+            for slot in range(first_slot, last_slot + self.seating_slots - 1)
+        ]
+        return ReservationAvailability(
+            day=day,
+            capacity=self.capacity,
+            slot_minutes=self.slot_minutes,
+            seating_minutes=self.seating_slots * self.slot_minutes,
+            slots=[
+                SlotAvailability(
+                    time=self.slot_time(first_slot + index),
+                    booked_seats=self.capacity - free_seats[index],
+                    available_seats=max(
+                        min(free_seats[index : index + self.seating_slots]), 0
+                    ),
+                )
+                for index in range(last_slot - first_slot)
+            ],
+        )
+
+
+def create_seating_plan_from_settings(settings: Settings) -> SeatingPlan:
+    return SeatingPlan(
+        capacity=settings.availability_capacity,
+        slot_minutes=settings.availability_slot_minutes,
+        seating_minutes=settings.availability_seating_minutes,
+        opening_time=settings.availability_opening_time,
+        closing_time=settings.availability_closing_time,
+    )
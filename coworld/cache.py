@@ -0,0 +1,461 @@
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, Iterable, TypeVar
+from uuid import UUID, uuid4
+
+from loguru import logger
+
+from coworld.models.metrics import CacheStatistics
+from coworld.settings import Settings
+
+T = TypeVar("T")
+
+DISHES_TAG = "dishes"
+MENUS_TAG = "menus"
+
+
+def dish_tag(dish_id: UUID) -> str:
+    return f"dish:{dish_id}"
+
+
+def menu_tag(menu_id: UUID) -> str:
+    return f"menu:{menu_id}"
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    async def get(self, key: Hashable) -> tuple[bool, object]:
+        ...
+
+    @abstractmethod
+    async def generation(self) -> int:
+        ...
+
+    @abstractmethod
+    async def set(
+        self, key: Hashable, value: object, tags: Iterable[str], generation: int
+    ) -> bool:
+        ...
+
+    @abstractmethod
+    async def invalidate(self, *tags: str) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    async def statistics(self) -> CacheStatistics:
+        ...
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        load: Callable[[], Awaitable[T]],
+        tags: Callable[[T], Iterable[str]],
+    ) -> T:
+        found, value = await self.get(key)
+        if found:
+            return value
+        generation = await self.generation()
+        value = await load()
+        await self.set(key, value, tags(value), generation)
+        return value
+
+
+@dataclass
+class CacheEntry:
+    value: object
+    tags: frozenset[str]
+    expires_at: float
+
+
+class MemoryCacheBackend(CacheBackend):
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self.keys_by_tag: dict[str, set[Hashable]] = {}
+        self.invalidated_at: dict[str, int] = {}
+        self.current_generation = 0
+        self.cleared_at = 0
+        self.loads_in_flight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    async def get(self, key: Hashable) -> tuple[bool, object]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        if entry.expires_at <= self.clock():
+            self.remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return True, entry.value
+
+    async def generation(self) -> int:
+        return self.current_generation
+
+    async def set(
+        self, key: Hashable, value: object, tags: Iterable[str], generation: int
+    ) -> bool:
+        tags = frozenset(tags)
+        if generation < self.cleared_at or any(
+            self.invalidated_at.get(tag, -1) > generation for tag in tags
+        ):
+            return False
+        if key in self.entries:
+            self.remove(key)
+        self.entries[key] = CacheEntry(value, tags, self.clock() + self.ttl_seconds)
+        for tag in tags:
+            self.keys_by_tag.setdefault(tag, set()).add(key)
+        while len(self.entries) > self.max_entries:
+            self.remove(next(iter(self.entries)))
+            self.evictions += 1
+        return True
+
+    def remove(self, key: Hashable) -> None:
+        entry = self.entries.pop(key)
+        for tag in entry.tags:
+            keys = self.keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.keys_by_tag[tag]
+
+    async def invalidate(self, *tags: str) -> None:
+        self.current_generation += 1
+        for tag in tags:
+            if self.loads_in_flight:
+                self.invalidated_at[tag] = self.current_generation
+            for key in list(self.keys_by_tag.get(tag, ())):
+                self.remove(key)
+                self.invalidations += 1
+
+    async def clear(self) -> None:
+        self.current_generation += 1
+        self.cleared_at = self.current_generation
+        self.entries.clear()
+        self.keys_by_tag.clear()
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        load: Callable[[], Awaitable[T]],
+        tags: Callable[[T], Iterable[str]],
+    ) -> T:
+        self.loads_in_flight += 1
+        try:
+            return await super().get_or_load(key, load, tags)
+        finally:
+            self.loads_in_flight -= 1
+            if not self.loads_in_flight:
+                self.invalidated_at.clear()
+
+    async def statistics(self) -> CacheStatistics:
+        lookups = self.hits + self.misses
+        return CacheStatistics(
+            backend="memory",
+            entries=len(self.entries),
+            max_entries=self.max_entries,
+            ttl_seconds=self.ttl_seconds,
+            hits=self.hits,
+            misses=self.misses,
+            hit_ratio=self.hits / lookups if lookups else 0.0,
+            evictions=self.evictions,
+            expirations=self.expirations,
+            invalidations=self.invalidations,
+        )
+
+
+@dataclass(frozen=True)
+class Codec:
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+
+
+JSON_CODEC = Codec(lambda value: json.dumps(value).encode(), json.loads)
+
+
+def invalidation_message(origin: str, tags: Iterable[str]) -> str:
+    return json.dumps({"origin": origin, "tags": list(tags)})
+
+
+class RedisCacheBackend(CacheBackend):
+    def __init__(
+        self,
+        client: Any,
+        ttl_seconds: float,
+        prefix: str,
+        codec: Codec = JSON_CODEC,
+    ):
+        self.client = client
+        self.codec = codec
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.prefix = prefix
+        self.channel = f"{prefix}:invalidations"
+        self.origin = uuid4().hex
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def entry_key(self, key: Hashable) -> str:
+        return f"{self.prefix}:entry:{key!r}"
+
+    def tag_key(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    def invalidated_key(self, tag: str) -> str:
+        return f"{self.prefix}:invalidated:{tag}"
+
+    async def get(self, key: Hashable) -> tuple[bool, object]:
+        raw = await self.client.get(self.entry_key(key))
+        if raw is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, self.codec.loads(raw)
+
+    async def generation(self) -> int:
+        return int(await self.client.get(f"{self.prefix}:generation") or 0)
+
+    async def set(
+        self, key: Hashable, value: object, tags: Iterable[str], generation: int
+    ) -> bool:
+        from redis.exceptions import WatchError
+
+        tags = sorted(set(tags))
+        invalidated_keys = [self.invalidated_key(tag) for tag in tags]
+        entry_key = self.entry_key(key)
+        async with self.client.pipeline(transaction=True) as pipe:
+            try:
+                if invalidated_keys:
+                    await pipe.watch(*invalidated_keys)
+                    invalidated = await pipe.mget(invalidated_keys)
+                    if any(
+                        marker is not None and int(marker) > generation
+                        for marker in invalidated
+                    ):
+                        return False
+                pipe.multi()
+                pipe.set(entry_key, self.codec.dumps(value), px=self.ttl_ms)
+                for tag in tags:
+                    pipe.sadd(self.tag_key(tag), entry_key)
+                    pipe.pexpire(self.tag_key(tag), self.ttl_ms)
+                await pipe.execute()
+                return True
+            except WatchError:
+                return False
+
+    async def invalidate(self, *tags: str) -> None:
+        generation = await self.client.incr(f"{self.prefix}:generation")
+        async with self.client.pipeline(transaction=True) as pipe:
+            for tag in tags:
+                pipe.set(self.invalidated_key(tag), generation, px=self.ttl_ms)
+                pipe.smembers(self.tag_key(tag))
+                pipe.delete(self.tag_key(tag))
+            results = await pipe.execute()
+        entry_keys = set().union(*results[1::3]) if tags else set()
+        if entry_keys:
+            self.invalidations += await self.client.delete(*entry_keys)
+        await self.client.publish(self.channel, invalidation_message(self.origin, tags))
+
+    async def clear(self) -> None:
+        await self.client.incr(f"{self.prefix}:generation")
+        keys = [key async for key in self.client.scan_iter(f"{self.prefix}:entry:*")]
+        if keys:
+            await self.client.delete(*keys)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    async def statistics(self) -> CacheStatistics:
+        lookups = self.hits + self.misses
+        return CacheStatistics(
+            backend="redis",
+            entries=None,
+            max_entries=None,
+            ttl_seconds=self.ttl_ms / 1000,
+            hits=self.hits,
+            misses=self.misses,
+            hit_ratio=self.hits / lookups if lookups else 0.0,
+            evictions=None,
+            expirations=None,
+            invalidations=self.invalidations,
+        )
+
+
+class BroadcastCacheBackend(CacheBackend):
+    def __init__(
+        self,
+        local: CacheBackend,
+        client: Any,
+        channel: str,
+        reconnect_delay_seconds: float = 1.0,
+        subscribe_timeout_seconds: float = 5.0,
+    ):
+        self.local = local
+        self.client = client
+        self.channel = channel
+        self.reconnect_delay_seconds = reconnect_delay_seconds
+        self.subscribe_timeout_seconds = subscribe_timeout_seconds
+        self.origin = uuid4().hex
+        self.listener: asyncio.Task | None = None
+        self.subscribed = asyncio.Event()
+        self.received = 0
+
+    async def get(self, key: Hashable) -> tuple[bool, object]:
+        if not self.subscribed.is_set():
+            return False, None
+        return await self.local.get(key)
+
+    async def generation(self) -> int:
+        return await self.local.generation()
+
+    async def set(
+        self, key: Hashable, value: object, tags: Iterable[str], generation: int
+    ) -> bool:
+        if not self.subscribed.is_set():
+            return False
+        return await self.local.set(key, value, tags, generation)
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        load: Callable[[], Awaitable[T]],
+        tags: Callable[[T], Iterable[str]],
+    ) -> T:
+        if not self.subscribed.is_set():
+            return await load()
+        return await self.local.get_or_load(key, load, tags)
+
+    async def invalidate(self, *tags: str) -> None:
+        await self.local.invalidate(*tags)
+        try:
+            await self.client.publish(
+                self.channel, invalidation_message(self.origin, tags)
+            )
+        except Exception as error:
+            logger.warning("Could not broadcast cache invalidation: {}", error)
+
+    async def clear(self) -> None:
+        await self.local.clear()
+
+    async def start(self) -> None:
+        self.listener = asyncio.create_task(self.listen())
+        try:
+            await asyncio.wait_for(
+                self.subscribed.wait(), self.subscribe_timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Cache invalidation channel unreachable after {}s, "
+                "serving uncached until it subscribes",
+                self.subscribe_timeout_seconds,
+            )
+
+    async def listen(self) -> None:
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                await self.local.clear()
+                self.subscribed.set()
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    payload = json.loads(message["data"])
+                    if payload["origin"] != self.origin:
+                        self.received += 1
+                        await self.local.invalidate(*payload["tags"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning("Cache invalidation listener disconnected: {}", error)
+                self.subscribed.clear()
+                await self.local.clear()
+                await asyncio.sleep(self.reconnect_delay_seconds)
+            finally:
+                await pubsub.aclose()
+
+    async def close(self) -> None:
+        if self.listener is not None:
+            self.listener.cancel()
+            try:
+                await self.listener
+            except asyncio.CancelledError:
+                pass
+        await self.client.aclose()
+
+    async def statistics(self) -> CacheStatistics:
+        statistics = await self.local.statistics()
+        statistics.backend = f"{statistics.backend}+broadcast"
+        return statistics
+
+
+def redis_client(url: str) -> Any:
+    try:
+        from redis import asyncio as redis
+    except ImportError:
+        raise RuntimeError("The redis package is required for a Redis cache")
+    return redis.from_url(url)
+
+
+def create_cache_from_settings(
+    settings: Settings, codec: Codec = JSON_CODEC
+) -> CacheBackend | None:
+    if not settings.cache_enabled:
+        return None
+    if settings.cache_backend == "redis":
+        if settings.cache_redis_url is None:
+            raise ValueError("COWORLD_CACHE_REDIS_URL is required for a Redis cache")
+        return RedisCacheBackend(
+            redis_client(settings.cache_redis_url),
+            settings.cache_ttl_seconds,
+            settings.cache_redis_prefix,
+            codec,
+        )
+    memory = MemoryCacheBackend(settings.cache_max_entries, settings.cache_ttl_seconds)
+    if settings.cache_redis_url is None:
+        return memory
+    return BroadcastCacheBackend(
+        memory,
+        redis_client(settings.cache_redis_url),
+        f"{settings.cache_redis_prefix}:invalidations",
+        subscribe_timeout_seconds=settings.cache_redis_subscribe_timeout_seconds,
+    )
+
+
+async def cached(
+    cache: CacheBackend | None,
+    key: Hashable,
+    load: Callable[[], Awaitable[T]],
+    tags: Callable[[T], Iterable[str]],
+) -> T:
+    if cache is None:
+        return await load()
+    return await cache.get_or_load(key, load, tags)
@@ -0,0 +1,147 @@
+import gzip
+import zlib
+from typing import Iterable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from coworld.settings import Settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODINGS = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def accepted_encodings(header: str) -> dict[str, float]:
+    qualities = {}
+    for coding in header.split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+    return qualities
+
+
+def negotiate_encoding(header: str, available: Iterable[str]) -> str | None:
+    qualities = accepted_encodings(header)
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(content: bytes, encoding: str, settings: Settings) -> bytes:
+    if encoding == "br":
+        return brotli.compress(content, quality=settings.compression_brotli_quality)
+    return gzip.compress(content, compresslevel=settings.compression_level, mtime=0)
+
+
+class StreamCompressor:
+    def __init__(self, encoding: str, settings: Settings):
+        self.encoding = encoding
+        if encoding == "br":
+            self.compressor = brotli.Compressor(
+                quality=settings.compression_brotli_quality
+            )
+        else:
+            self.compressor = zlib.compressobj(
+                settings.compression_level, zlib.DEFLATED, zlib.MAX_WBITS | 16
+            )
+
+    def compress(self, data: bytes, last: bool) -> bytes:
+        if self.encoding == "br":
+            compressed = self.compressor.process(data)
+            return compressed + (
+                self.compressor.finish() if last else self.compressor.flush()
+            )
+        compressed = self.compressor.compress(data)
+        return compressed + self.compressor.flush(
+            zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH
+        )
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, settings: Settings) -> None:
+        self.app = app
+        self.settings = settings
+        self.media_types = {
+            media_type.lower() for media_type in settings.compression_media_types
+        }
+
+    def compressible(self, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return media_type in self.media_types
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), ENCODINGS
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        compressor: StreamCompressor | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(scope=start)
+                if self.compressible(headers) and (
+                    more_body or len(body) >= self.settings.compression_min_bytes
+                ):
+                    compressor = StreamCompressor(encoding, self.settings)
+                    headers["Content-Encoding"] = encoding
+                    headers.add_vary_header("Accept-Encoding")
+                    etag = headers.get("etag")
+                    if etag is not None and not etag.startswith("W/"):
+                        headers["ETag"] = f"W/{etag}"
+                    del headers["Content-Length"]
+                    if not more_body:
+                        body = compressor.compress(body, last=True)
+                        headers["Content-Length"] = str(len(body))
+                        message = {**message, "body": body}
+                        compressor = None
+                await send(start)
+                start = None
+            elif compressor is None:
+                await send(message)
+                return
+
+            if compressor is not None:
+                message = {
+                    **message,
+                    "body": compressor.compress(body, last=not more_body),
+                }
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,93 @@
+import functools
+from typing import Callable
+
+import phonenumbers
+from pydantic.networks import MAX_EMAIL_LENGTH, validate_email
+from pydantic_core import PydanticCustomError
+
+from coworld.models.errors import InvalidEmailAddressError, InvalidPhoneNumberError
+from coworld.models.metrics import ValidationCacheStatistics
+from coworld.settings import get_settings
+
+MAX_PHONE_NUMBER_LENGTH = 64
+
+
+def read_phone_number(value: str, region: str | None) -> tuple[str, str] | None:
+    try:
+        parsed = phonenumbers.parse(value, region)
+    except phonenumbers.NumberParseException:
+        return None
+    if not phonenumbers.is_valid_number(parsed):
+        return None
+    return (
+        phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164),
+        phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.RFC3966),
+    )
+
+
+def read_email_address(value: str) -> str | None:
+    try:
+        _, email_address = validate_email(value)
+    except PydanticCustomError:
+        return None
+    return email_address
+
+
+@functools.cache
+def phone_number_cache() -> Callable[[str, str | None], tuple[str, str] | None]:
+    return functools.lru_cache(maxsize=get_settings().contact_validation_cache_size)(
+        read_phone_number
+    )
+
+
+@functools.cache
+def email_address_cache() -> Callable[[str], str | None]:
+    return functools.lru_cache(maxsize=get_settings().contact_validation_cache_size)(
+        read_email_address
+    )
+
+
+def parse_phone_number(value: str, region: str | None) -> tuple[str, str] | None:
+    if len(value) > MAX_PHONE_NUMBER_LENGTH:
+        return None
+    return phone_number_cache()(value, region)
+
+
+def parse_email_address(value: str) -> str | None:
+    if len(value) > MAX_EMAIL_LENGTH:
+        return None
+    return email_address_cache()(value)
+
+
+def phone_number_formats(value: str) -> tuple[str, str]:
+    formats = parse_phone_number(value, get_settings().phone_default_region)
+    if formats is None:
+        raise InvalidPhoneNumberError(phone_number=value)
+    return formats
+
+
+def normalize_email(value: str) -> str:
+    normalized = parse_email_address(value)
+    if normalized is None:
+        raise InvalidEmailAddressError(email_address=value)
+    return normalized
+
+
+def cache_statistics(name: str, cached) -> ValidationCacheStatistics:
+    info = cached.cache_info()
+    lookups = info.hits + info.misses
+    return ValidationCacheStatistics(
+        name=name,
+        entries=info.currsize,
+        max_entries=info.maxsize,
+        hits=info.hits,
+        misses=info.misses,
+        hit_ratio=info.hits / lookups if lookups else 0.0,
+    )
+
+
+def validation_cache_statistics() -> list[ValidationCacheStatistics]:
+    return [
+        cache_statistics("phone_number", phone_number_cache()),
+        cache_statistics("email_address", email_address_cache()),
+    ]
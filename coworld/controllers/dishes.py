@@ -1,60 +1,130 @@
 from typing import Sequence
 from coworld.models.dishes import DishCreate, DishUpdate, Category
-from coworld.models.models import Dish
+from coworld.models.models import Dish, DishInMenu, DishRead
+from coworld.models.menus_dishes_links import MenuDishLinks
 from coworld.models.errors import DishNotFoundError, DishAlreadyExistsError
+from coworld.models.bulk import BulkCreateResult, bulk_create_result
+from coworld.cache import CacheBackend, DISHES_TAG, dish_tag, menu_tag
+from coworld.database import insert_new_rows, retry_on_busy, row_values
+from coworld.pagination import Page, paginate
 from uuid import UUID
 
+from sqlalchemy import delete, insert, update
 from sqlalchemy.exc import IntegrityError, NoResultFound
-from sqlmodel import Session, select
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+def dish_listing_tags(dishes: Sequence[DishInMenu]) -> set[str]:
+    tags = {DISHES_TAG}
+    for dish in dishes:
+        tags.add(dish_tag(dish.id))
+        tags.update(menu_tag(menu.id) for menu in dish.menus or [])
+    return tags
 
 
 class DishController:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession, cache: CacheBackend | None = None):
         self.session = session
+        self.cache = cache
+
+    async def invalidate(self, *tags: str) -> None:
+        if self.cache is not None:
+            await self.cache.invalidate(*tags)
 
-    async def get_dishes(self) -> Sequence[Dish]:
-        return self.session.exec(select(Dish)).all()
+    async def get_dishes(
+        self, cursor: str | None = None, limit: int | None = None
+    ) -> Page[DishInMenu]:
+        dishes = await paginate(
+            self.session,
+            select(Dish)
+            .options(selectinload(Dish.menus))
+            .execution_options(populate_existing=True),
+            Dish,
+            cursor,
+            limit,
+        )
+        return Page(
+            [DishInMenu.model_validate(dish) for dish in dishes],
+            dishes.next_cursor,
+        )
 
-    async def get_dish_by_id(self, dish_id: UUID) -> Dish:
+    async def get_dish_by_id(self, dish_id: UUID) -> DishRead:
         try:
-            return self.session.exec(select(Dish).where(Dish.id == dish_id)).one()
+            dish = (
+                await self.session.exec(select(Dish).where(Dish.id == dish_id))
+            ).one()
         except NoResultFound:
             raise DishNotFoundError(dish_id=dish_id)
+        return DishRead.model_validate(dish)
 
+    @retry_on_busy
     async def create_dish(self, dish_create: DishCreate) -> Dish:
+        new_dish = Dish(**dish_create.model_dump())
         try:
-            new_dish = Dish(**dish_create.model_dump())
-            self.session.add(new_dish)
-            self.session.commit()
-            self.session.refresh(new_dish)
-            return new_dish
+            created_dish = (
+                await self.session.exec(
+                    insert(Dish).values(**row_values(new_dish)).returning(Dish)
+                )
+            ).scalar_one()
+            await self.session.commit()
+            await self.invalidate(DISHES_TAG)
+            return created_dish
         except IntegrityError:
+            await self.session.rollback()
             raise DishAlreadyExistsError(title=dish_create.title)
 
+    @retry_on_busy
+    async def create_dishes(self, dish_creates: list[DishCreate]) -> BulkCreateResult:
+        dishes = [Dish(**dish_create.model_dump()) for dish_create in dish_creates]
+        created_ids = await insert_new_rows(self.session, Dish, dishes)
+        await self.session.commit()
+        if created_ids:
+            await self.invalidate(DISHES_TAG)
+        return bulk_create_result(
+            dishes, created_ids, lambda dish: DishAlreadyExistsError(title=dish.title)
+        )
+
+    @retry_on_busy
     async def delete_dish(self, dish_id: UUID) -> None:
-        try:
-            dish = self.session.exec(select(Dish).where(Dish.id == dish_id)).one()
-            self.session.delete(dish)
-            self.session.commit()
-        except NoResultFound:
+        await self.session.exec(
+            delete(MenuDishLinks).where(MenuDishLinks.dish_id == dish_id)
+        )
+        deleted = await self.session.exec(delete(Dish).where(Dish.id == dish_id))
+        if deleted.rowcount == 0:
             raise DishNotFoundError(dish_id=dish_id)
+        await self.session.commit()
+        await self.invalidate(DISHES_TAG, dish_tag(dish_id))
 
+    @retry_on_busy
     async def update_dish(self, dish_id: UUID, dish_update: DishUpdate) -> Dish:
-        try:
-            dish = self.session.exec(select(Dish).where(Dish.id == dish_id)).one()
-            for key, value in dish_update.dict(exclude_unset=True).items():
-                setattr(dish, key, value)
-            self.session.add(dish)
-            self.session.commit()
-            self.session.refresh(dish)
-            return dish
-        except NoResultFound:
+        changes = dish_update.model_dump(exclude_unset=True)
+        if not changes:
+            return await self.get_dish_by_id(dish_id)
+        dish = (
+            await self.session.exec(
+                update(Dish).where(Dish.id == dish_id).values(**changes).returning(Dish)
+            )
+        ).scalar_one_or_none()
+        if dish is None:
             raise DishNotFoundError(dish_id=dish_id)
+        await self.session.commit()
+        await self.invalidate(DISHES_TAG, dish_tag(dish_id))
+        return dish
 
-    async def get_halal_dishes(self, is_halal: bool) -> Sequence[Dish]:
-        return self.session.exec(select(Dish).where(Dish.halal == is_halal)).all()
+    async def get_halal_dishes(self, is_halal: bool) -> Sequence[DishRead]:
+        dishes = (
+            await self.session.exec(select(Dish).where(Dish.halal == is_halal))
+        ).all()
+        return [DishRead.model_validate(dish) for dish in dishes]
 
-    async def get_dishes_by_category(self, dishes_category: Category) -> Sequence[Dish]:
-        return self.session.exec(
-            select(Dish).where(Dish.category == dishes_category)
+    async def get_dishes_by_category(
+        self, dishes_category: Category
+    ) -> Sequence[DishRead]:
+        dishes = (
+            await self.session.exec(
+                select(Dish).where(Dish.category == dishes_category)
+            )
         ).all()
+        return [DishRead.model_validate(dish) for dish in dishes]
@@ -1,91 +1,246 @@
-from typing import Sequence
-from coworld.models.menus import MenuCreate, MenuUpdate
-from coworld.models.models import Menu, Dish
+from datetime import datetime
+from typing import AsyncIterator, Sequence
+from coworld.models.menus import MenuCreate, MenuUpdate, discounted_price
+from coworld.models.models import Menu, Dish, MenuRead, MenuWithDishes
 from coworld.models.errors import (
     MenuNotFoundError,
     MenuAlreadyExistsError,
     DishInMenuNotFoundError,
-    DishAlreadyInMenuError,
 )
 from uuid import UUID
+from sqlalchemy import delete, insert, update
 from sqlalchemy.exc import IntegrityError, NoResultFound
-from sqlmodel import Session, select
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from coworld.models.bulk import BulkCreateResult, bulk_create_result
+from coworld.cache import CacheBackend, MENUS_TAG, dish_tag, menu_tag
+from coworld.database import (
+    insert_ignoring_conflicts,
+    insert_new_rows,
+    retry_on_busy,
+    row_values,
+)
+from coworld.pagination import Page, paginate
+from coworld.settings import get_settings
+from coworld.models.menus_dishes_links import (
+    MenuDishLinksCreate,
+    MenuDishLinks,
+    MenuDishLinkResult,
+    MenuDishLinksResult,
+    MenuDishLinkStatus,
+)
+
+
+PRICE_SHEET_COLUMNS = [
+    "menu",
+    "menu_price",
+    "discount",
+    "discounted_price",
+    "dish",
+    "category",
+    "dish_price",
+]
 
-from coworld.models.menus_dishes_links import MenuDishLinksCreate, MenuDishLinks
+
+def menu_tags(menus: Sequence[MenuWithDishes]) -> set[str]:
+    tags = set()
+    for menu in menus:
+        tags.add(menu_tag(menu.id))
+        tags.update(dish_tag(dish.id) for dish in menu.dishes)
+    return tags
 
 
 class MenuController:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession, cache: CacheBackend | None = None):
         self.session = session
+        self.cache = cache
+
+    async def invalidate(self, *tags: str) -> None:
+        if self.cache is not None:
+            await self.cache.invalidate(*tags)
 
-    async def get_menus(self) -> Sequence[Menu]:
-        return self.session.exec(select(Menu)).all()
+    async def get_menus(
+        self, cursor: str | None = None, limit: int | None = None
+    ) -> Page[MenuWithDishes]:
+        menus = await paginate(
+            self.session,
+            select(Menu)
+            .options(selectinload(Menu.dishes))
+            .execution_options(populate_existing=True),
+            Menu,
+            cursor,
+            limit,
+        )
+        return Page(
+            [MenuWithDishes.model_validate(menu) for menu in menus],
+            menus.next_cursor,
+        )
 
+    @retry_on_busy
     async def create_menu(self, menu_create: MenuCreate) -> Menu:
+        new_menu = Menu(**menu_create.model_dump())
         try:
-            new_menu = Menu(**menu_create.model_dump())
-            self.session.add(new_menu)
-            self.session.commit()
-            self.session.refresh(new_menu)
-            return new_menu
+            created_menu = (
+                await self.session.exec(
+                    insert(Menu).values(**row_values(new_menu)).returning(Menu)
+                )
+            ).scalar_one()
+            await self.session.commit()
+            await self.invalidate(MENUS_TAG)
+            return created_menu
         except IntegrityError:
+            await self.session.rollback()
             raise MenuAlreadyExistsError(title=menu_create.title)
 
-    async def get_menu_by_id(self, menu_id: UUID) -> Menu:
+    @retry_on_busy
+    async def create_menus(self, menu_creates: list[MenuCreate]) -> BulkCreateResult:
+        menus = [Menu(**menu_create.model_dump()) for menu_create in menu_creates]
+        created_ids = await insert_new_rows(self.session, Menu, menus)
+        await self.session.commit()
+        if created_ids:
+            await self.invalidate(MENUS_TAG)
+        return bulk_create_result(
+            menus, created_ids, lambda menu: MenuAlreadyExistsError(title=menu.title)
+        )
+
+    async def get_menu_by_id(self, menu_id: UUID) -> MenuWithDishes:
         try:
-            return self.session.exec(select(Menu).where(Menu.id == menu_id)).one()
+            menu = (
+                await self.session.exec(
+                    select(Menu)
+                    .where(Menu.id == menu_id)
+                    .options(selectinload(Menu.dishes))
+                    .execution_options(populate_existing=True)
+                )
+            ).one()
         except NoResultFound:
             raise MenuNotFoundError(menu_id=menu_id)
+        return MenuWithDishes.model_validate(menu)
 
+    @retry_on_busy
     async def delete_menu(self, menu_id: UUID) -> None:
-        try:
-            menu = self.session.exec(select(Menu).where(Menu.id == menu_id)).one()
-            self.session.delete(menu)
-            self.session.commit()
-        except NoResultFound:
+        await self.session.exec(
+            delete(MenuDishLinks).where(MenuDishLinks.menu_id == menu_id)
+        )
+        deleted = await self.session.exec(delete(Menu).where(Menu.id == menu_id))
+        if deleted.rowcount == 0:
             raise MenuNotFoundError(menu_id=menu_id)
+        await self.session.commit()
+        await self.invalidate(MENUS_TAG, menu_tag(menu_id))
 
+    @retry_on_busy
     async def update_menu(self, menu_id: UUID, menu_update: MenuUpdate) -> Menu:
+        changes = menu_update.model_dump(exclude_unset=True)
+        if not changes:
+            return await self.get_menu_by_id(menu_id)
+        menu = (
+            await self.session.exec(
+                update(Menu).where(Menu.id == menu_id).values(**changes).returning(Menu)
+            )
+        ).scalar_one_or_none()
+        if menu is None:
+            raise MenuNotFoundError(menu_id=menu_id)
+        await self.session.commit()
+        await self.invalidate(MENUS_TAG, menu_tag(menu_id))
+        return menu
+
+    async def link_dishes(
+        self, menu_id: UUID, dish_ids: list[UUID]
+    ) -> tuple[set[UUID], set[UUID]]:
         try:
-            menu = self.session.exec(select(Menu).where(Menu.id == menu_id)).one()
-            for key, value in menu_update.dict(exclude_unset=True).items():
-                setattr(menu, key, value)
-            self.session.add(menu)
-            self.session.commit()
-            self.session.refresh(menu)
-            return menu
+            (await self.session.exec(select(Menu.id).where(Menu.id == menu_id))).one()
         except NoResultFound:
             raise MenuNotFoundError(menu_id=menu_id)
+        existing_dish_ids = set(
+            (
+                await self.session.exec(select(Dish.id).where(Dish.id.in_(dish_ids)))
+            ).all()
+        )
+        if not existing_dish_ids:
+            return existing_dish_ids, set()
+        links = MenuDishLinks.__table__
+        now = datetime.now()
+        linked = await self.session.exec(
+            insert_ignoring_conflicts(self.session, links).returning(links.c.dish_id),
+            params=[
+                {"dish_id": dish_id, "menu_id": menu_id, "created_at": now}
+                for dish_id in existing_dish_ids
+            ],
+        )
+        linked_dish_ids = set(linked.scalars().all())
+        await self.session.commit()
+        return existing_dish_ids, linked_dish_ids
 
+    @retry_on_busy
     async def add_dish_to_menu(
         self, menu_id: UUID, menu_dish_links_create: MenuDishLinksCreate
-    ) -> Menu:
+    ) -> MenuDishLinksResult:
+        dish_ids = list(dict.fromkeys(menu_dish_links_create.dish_ids))
         try:
-            menu = self.session.exec(select(Menu).where(Menu.id == menu_id)).one()
-            for dish_id in menu_dish_links_create.dish_ids:
-                dish = self.session.exec(select(Dish).where(Dish.id == dish_id)).one()
-                menu_dish_links = MenuDishLinks(dish_id=dish_id, menu_id=menu_id)
-                self.session.add(menu_dish_links)
-            self.session.commit()
-            self.session.refresh(menu)
-            return menu
-        except NoResultFound:
-            raise MenuNotFoundError(menu_id=menu_id)
+            existing_dish_ids, linked_dish_ids = await self.link_dishes(
+                menu_id, dish_ids
+            )
         except IntegrityError:
-            self.session.rollback()
-            raise DishAlreadyInMenuError(dish=dish.title, menu_id=menu_id)
+            await self.session.rollback()
+            existing_dish_ids, linked_dish_ids = await self.link_dishes(
+                menu_id, dish_ids
+            )
+        if linked_dish_ids:
+            await self.invalidate(
+                menu_tag(menu_id), *(dish_tag(dish_id) for dish_id in linked_dish_ids)
+            )
+        results = []
+        for dish_id in dish_ids:
+            if dish_id not in existing_dish_ids:
+                status = MenuDishLinkStatus.DISH_NOT_FOUND
+            elif dish_id in linked_dish_ids:
+                status = MenuDishLinkStatus.LINKED
+            else:
+                status = MenuDishLinkStatus.ALREADY_LINKED
+            results.append(MenuDishLinkResult(dish_id=dish_id, status=status))
+        return MenuDishLinksResult(menu_id=menu_id, dishes=results)
 
+    @retry_on_busy
     async def delete_dish_from_menu(self, menu_id: UUID, dish_id: UUID) -> None:
-        try:
-            menu_dish_link = self.session.exec(
-                select(MenuDishLinks)
-                .where(MenuDishLinks.menu_id == menu_id)
-                .where(MenuDishLinks.dish_id == dish_id)
-            ).one()
-            self.session.delete(menu_dish_link)
-            self.session.commit()
-        except NoResultFound:
+        deleted = await self.session.exec(
+            delete(MenuDishLinks)
+            .where(MenuDishLinks.menu_id == menu_id)
+            .where(MenuDishLinks.dish_id == dish_id)
+        )
+        if deleted.rowcount == 0:
             raise DishInMenuNotFoundError(menu_id=menu_id, dish_id=dish_id)
+        await self.session.commit()
+        await self.invalidate(menu_tag(menu_id), dish_tag(dish_id))
+
+    async def get_discounted_menus(self) -> Sequence[MenuRead]:
+        menus = (await self.session.exec(select(Menu).where(Menu.discount > 0))).all()
+        return [MenuRead.model_validate(menu) for menu in menus]
 
-    async def get_discounted_menus(self) -> Sequence[Menu]:
-        return self.session.exec(select(Menu).where(Menu.discount > 0)).all()
+    async def stream_price_sheet(self) -> AsyncIterator[list[dict]]:
+        result = await self.session.stream(
+            select(
+                Menu.title.label("menu"),
+                Menu.price.label("menu_price"),
+                Menu.discount,
+                Dish.title.label("dish"),
+                Dish.category,
+                Dish.price.label("dish_price"),
+            )
+            .select_from(Menu)
+            .outerjoin(MenuDishLinks, MenuDishLinks.menu_id == Menu.id)
+            .outerjoin(Dish, Dish.id == MenuDishLinks.dish_id)
+            .order_by(Menu.title, Dish.title)
+            .execution_options(yield_per=get_settings().export_chunk_size)
+        )
+        async for rows in result.mappings().partitions():
+            yield [
+                {
+                    **row,
+                    "discounted_price": discounted_price(
+                        row["menu_price"], row["discount"]
+                    ),
+                }
+                for row in rows
+            ]
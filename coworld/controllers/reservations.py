@@ -1,62 +1,424 @@
-from typing import Sequence
+from datetime import date, datetime, time, timedelta
+from collections import Counter
+from contextlib import nullcontext
+from typing import AsyncContextManager, AsyncIterator, Sequence
 from uuid import UUID
+from sqlalchemy import RowMapping, case, delete, insert, text, update
 from sqlalchemy.exc import NoResultFound
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from coworld.models.errors import ReservationNotFoundError
+from coworld.availability import SeatingPlan
+from coworld.contacts import normalize_email, phone_number_formats
+from coworld.models.errors import (
+    MissingSearchCriteriaError,
+    ReservationCapacityExceededError,
+    ReservationNotFoundError,
+)
 from coworld.models.reservations import (
     Reservation,
+    ReservationAvailability,
+    ReservationCategory,
     ReservationCreate,
     ReservationUpdate,
+    SeatingGrid,
+    SeatingSlot,
 )
+from coworld.models.bulk import BulkCreateResult, bulk_create_result
+from coworld.database import insert_ignoring_conflicts, retry_on_busy, row_values
+from coworld.pagination import Page, page_size, paginate
+from coworld.settings import get_settings
+
+RESERVATION_COLUMNS = [column.name for column in Reservation.__table__.columns]
+
+
+def filter_reservations(
+    statement,
+    reservation_time_from: datetime | None = None,
+    reservation_time_to: datetime | None = None,
+    reservation_category: ReservationCategory | None = None,
+):
+    if reservation_time_from is not None:
+        statement = statement.where(
+            Reservation.reservation_time >= reservation_time_from
+        )
+    if reservation_time_to is not None:
+        statement = statement.where(Reservation.reservation_time < reservation_time_to)
+    if reservation_category is not None:
+        statement = statement.where(
+            Reservation.reservation_category == reservation_category
+        )
+    return statement
+
+
+def capacity_error(reservation: Reservation) -> ReservationCapacityExceededError:
+    return ReservationCapacityExceededError(
+        reservation_time=reservation.reservation_time,
+        amount_of_people=reservation.amount_of_people,
+    )
 
 
 class ReservationController:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession, seating_plan: SeatingPlan | None = None):
         self.session = session
+        self.seating_plan = seating_plan
+
+    def seating_lock(self) -> AsyncContextManager:
+        if self.session.bind.dialect.name == "sqlite":
+            return self.seating_plan.lock
+        return nullcontext()
+
+    async def lock_seating_slots(self, reservations: list[Reservation]) -> None:
+        slot_times = sorted(
+            {
+                slot_time
+                for reservation in reservations
+                for slot_time in self.seating_plan.slot_times(
+                    reservation.reservation_time
+                )
+            }
+        )
+        await self.session.exec(
+            insert_ignoring_conflicts(self.session, SeatingSlot.__table__),
+            params=[{"slot_time": slot_time} for slot_time in slot_times],
+        )
+        if self.session.bind.dialect.name == "postgresql":
+            await self.session.exec(
+                select(SeatingSlot.slot_time)
+                .where(SeatingSlot.slot_time.in_(slot_times))
+                .order_by(SeatingSlot.slot_time)
+                .with_for_update()
+            )
+
+    async def reserve_seats(self, reservation: Reservation) -> bool:
+        slot_times = self.seating_plan.slot_times(reservation.reservation_time)
+        slots = SeatingSlot.slot_time.in_(slot_times)
+        reserved = (
+            (
+                await self.session.exec(
+                    update(SeatingSlot)
+                    .where(
+                        slots,
+                        SeatingSlot.booked_seats + reservation.amount_of_people
+                        <= self.seating_plan.capacity,
+                    )
+                    .values(
+                        booked_seats=SeatingSlot.booked_seats
+                        + reservation.amount_of_people
+                    )
+                    .returning(SeatingSlot.slot_time)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if len(reserved) == len(slot_times):
+            return True
+        if reserved:
+            await self.release_seats(reservation, reserved)
+        return False
+
+    async def release_seats(
+        self, reservation: Reservation, slot_times: list[datetime] | None = None
+    ) -> None:
+        if slot_times is None:
+            slot_times = self.seating_plan.slot_times(reservation.reservation_time)
+        await self.session.exec(
+            update(SeatingSlot)
+            .where(SeatingSlot.slot_time.in_(slot_times))
+            .values(
+                booked_seats=SeatingSlot.booked_seats - reservation.amount_of_people
+            )
+        )
+
+    def seating_grid(self) -> dict[str, int]:
+        return {
+            "slot_minutes": self.seating_plan.slot_minutes,
+            "seating_minutes": self.seating_plan.seating_slots
+            * self.seating_plan.slot_minutes,
+        }
+
+    async def seating_slots_are_current(self) -> bool:
+        grid = (await self.session.exec(select(SeatingGrid))).one_or_none()
+        return (
+            grid is not None
+            and {
+                "slot_minutes": grid.slot_minutes,
+                "seating_minutes": grid.seating_minutes,
+            }
+            == self.seating_grid()
+        )
+
+    @retry_on_busy
+    async def rebuild_seating_slots(self) -> None:
+        async with self.seating_lock():
+            if self.session.bind.dialect.name == "postgresql":
+                await self.session.exec(
+                    text(f"LOCK TABLE {SeatingSlot.__tablename__} IN EXCLUSIVE MODE")
+                )
+            booked_seats = Counter()
+            result = await self.session.stream(
+                select(
+                    Reservation.reservation_time, Reservation.amount_of_people
+                ).execution_options(yield_per=get_settings().export_chunk_size)
+            )
+            async for reservation in result:
+                for slot_time in self.seating_plan.slot_times(
+                    reservation.reservation_time
+                ):
+                    booked_seats[slot_time] += reservation.amount_of_people
+            await self.session.exec(delete(SeatingSlot))
+            if booked_seats:
+                await self.session.exec(
+                    insert(SeatingSlot.__table__),
+                    params=[
+                        {"slot_time": slot_time, "booked_seats": seats}
+                        for slot_time, seats in booked_seats.items()
+                    ],
+                )
+            await self.session.exec(delete(SeatingGrid))
+            await self.session.exec(
+                insert(SeatingGrid.__table__).values(**self.seating_grid())
+            )
+            await self.session.commit()
+
+    async def sync_seating_slots(self, force: bool = False) -> bool:
+        if not force and await self.seating_slots_are_current():
+            return False
+        await self.rebuild_seating_slots()
+        return True
+
+    async def get_availability(self, day: date) -> ReservationAvailability:
+        start, end = self.seating_plan.availability_window(day)
+        slots = (
+            await self.session.exec(
+                select(SeatingSlot).where(
+                    SeatingSlot.slot_time >= start, SeatingSlot.slot_time < end
+                )
+            )
+        ).all()
+        return self.seating_plan.availability(
+            day, {slot.slot_time: slot.booked_seats for slot in slots}
+        )
 
-    async def get_reservations(self) -> Sequence[Reservation]:
-        return self.session.exec(select(Reservation)).all()
+    async def get_reservations(
+        self,
+        cursor: str | None = None,
+        limit: int | None = None,
+        reservation_time_from: datetime | None = None,
+        reservation_time_to: datetime | None = None,
+        reservation_category: ReservationCategory | None = None,
+    ) -> Page[Reservation]:
+        filters = (reservation_time_from, reservation_time_to, reservation_category)
+        if all(value is None for value in filters):
+            return await paginate(
+                self.session, select(Reservation), Reservation, cursor, limit
+            )
+        return await paginate(
+            self.session,
+            filter_reservations(select(Reservation), *filters),
+            Reservation,
+            cursor,
+            limit,
+            key=Reservation.reservation_time,
+        )
+
+    async def get_reservations_for_day(
+        self, day: date, reservation_category: ReservationCategory | None = None
+    ) -> Sequence[Reservation]:
+        start = datetime.combine(day, time.min)
+        statement = filter_reservations(
+            select(Reservation), start, start + timedelta(days=1), reservation_category
+        )
+        return (
+            await self.session.exec(
+                statement.order_by(Reservation.reservation_time, Reservation.id)
+            )
+        ).all()
+
+    async def search_reservations(
+        self,
+        email_address: str | None = None,
+        phone_number: str | None = None,
+        limit: int | None = None,
+    ) -> Sequence[Reservation]:
+        if email_address is None and phone_number is None:
+            raise MissingSearchCriteriaError()
+        statement = select(Reservation)
+        if email_address is not None:
+            statement = statement.where(
+                Reservation.email_address == normalize_email(email_address)
+            )
+        if phone_number is not None:
+            statement = statement.where(
+                Reservation.phone_number.in_(phone_number_formats(phone_number))
+            )
+        now = datetime.now()
+        return (
+            await self.session.exec(
+                statement.order_by(
+                    Reservation.reservation_time < now,
+                    case(
+                        (
+                            Reservation.reservation_time >= now,
+                            Reservation.reservation_time,
+                        )
+                    ),
+                    Reservation.reservation_time.desc(),
+                ).limit(page_size(limit))
+            )
+        ).all()
+
+    async def stream_reservations(
+        self,
+        reservation_time_from: datetime | None = None,
+        reservation_time_to: datetime | None = None,
+    ) -> AsyncIterator[Sequence[RowMapping]]:
+        statement = filter_reservations(
+            Reservation.__table__.select(), reservation_time_from, reservation_time_to
+        )
+        result = await self.session.stream(
+            statement.order_by(
+                Reservation.reservation_time, Reservation.id
+            ).execution_options(yield_per=get_settings().export_chunk_size)
+        )
+        async for rows in result.mappings().partitions():
+            yield rows
 
     async def get_reservation_by_id(self, reservation_id: UUID) -> Reservation:
         try:
-            return self.session.exec(
-                select(Reservation).where(Reservation.id == reservation_id)
+            return (
+                await self.session.exec(
+                    select(Reservation).where(Reservation.id == reservation_id)
+                )
             ).one()
         except NoResultFound:
             raise ReservationNotFoundError(reservation_id=reservation_id)
 
+    @retry_on_busy
     async def create_reservation(
         self, reservation_create: ReservationCreate
     ) -> Reservation:
         new_reservation = Reservation(**reservation_create.model_dump())
-        self.session.add(new_reservation)
-        self.session.commit()
-        self.session.refresh(new_reservation)
-        return new_reservation
+        if self.seating_plan is None:
+            return await self.insert_reservation(new_reservation)
+        async with self.seating_lock():
+            await self.lock_seating_slots([new_reservation])
+            if not await self.reserve_seats(new_reservation):
+                await self.session.rollback()
+                raise capacity_error(new_reservation)
+            return await self.insert_reservation(new_reservation)
+
+    async def insert_reservation(self, new_reservation: Reservation) -> Reservation:
+        created_reservation = (
+            await self.session.exec(
+                insert(Reservation)
+                .values(**row_values(new_reservation))
+                .returning(Reservation)
+            )
+        ).scalar_one()
+        await self.session.commit()
+        return created_reservation
 
+    @retry_on_busy
+    async def create_reservations(
+        self, reservation_creates: list[ReservationCreate]
+    ) -> BulkCreateResult:
+        reservations = [
+            Reservation(**reservation_create.model_dump())
+            for reservation_create in reservation_creates
+        ]
+        if self.seating_plan is None:
+            return await self.insert_reservations(reservations, reservations)
+        async with self.seating_lock():
+            await self.lock_seating_slots(reservations)
+            seated = [
+                reservation
+                for reservation in reservations
+                if await self.reserve_seats(reservation)
+            ]
+            return await self.insert_reservations(reservations, seated)
+
+    async def insert_reservations(
+        self, reservations: list[Reservation], seated: list[Reservation]
+    ) -> BulkCreateResult:
+        if seated:
+            await self.session.exec(
+                insert(Reservation.__table__),
+                params=[row_values(reservation) for reservation in seated],
+            )
+            await self.session.commit()
+        return bulk_create_result(
+            reservations, {reservation.id for reservation in seated}, capacity_error
+        )
+
+    @retry_on_busy
     async def delete_reservation(self, reservation_id: UUID) -> None:
-        try:
-            reservation = self.session.exec(
-                select(Reservation).where(Reservation.id == reservation_id)
-            ).one()
-            self.session.delete(reservation)
-            self.session.commit()
-        except NoResultFound:
+        if self.seating_plan is None:
+            return await self.apply_delete(reservation_id)
+        async with self.seating_lock():
+            deleted = (
+                await self.session.exec(
+                    delete(Reservation)
+                    .where(Reservation.id == reservation_id)
+                    .returning(
+                        Reservation.reservation_time, Reservation.amount_of_people
+                    )
+                )
+            ).one_or_none()
+            if deleted is None:
+                raise ReservationNotFoundError(reservation_id=reservation_id)
+            await self.release_seats(deleted)
+            await self.session.commit()
+
+    async def apply_delete(self, reservation_id: UUID) -> None:
+        deleted = await self.session.exec(
+            delete(Reservation).where(Reservation.id == reservation_id)
+        )
+        if deleted.rowcount == 0:
             raise ReservationNotFoundError(reservation_id=reservation_id)
+        await self.session.commit()
 
+    @retry_on_busy
     async def update_reservation(
         self, reservation_id: UUID, reservation_update: ReservationUpdate
     ) -> Reservation:
-        try:
-            reservation = self.session.exec(
-                select(Reservation).where(Reservation.id == reservation_id)
-            ).one()
-            for key, value in reservation_update.dict(exclude_unset=True).items():
-                setattr(reservation, key, value)
-            self.session.add(reservation)
-            self.session.commit()
-            self.session.refresh(reservation)
-            return reservation
-        except NoResultFound:
+        changes = reservation_update.model_dump(exclude_unset=True)
+        if not changes:
+            return await self.get_reservation_by_id(reservation_id)
+        if self.seating_plan is None or not changes.keys() & {
+            "reservation_time",
+            "amount_of_people",
+        }:
+            return await self.apply_update(reservation_id, changes)
+        async with self.seating_lock():
+            current = (
+                await self.session.exec(
+                    select(Reservation)
+                    .where(Reservation.id == reservation_id)
+                    .with_for_update()
+                )
+            ).one_or_none()
+            if current is None:
+                raise ReservationNotFoundError(reservation_id=reservation_id)
+            updated = Reservation(**{**current.model_dump(), **changes})
+            await self.lock_seating_slots([current, updated])
+            await self.release_seats(current)
+            if not await self.reserve_seats(updated):
+                await self.session.rollback()
+                raise capacity_error(updated)
+            return await self.apply_update(reservation_id, changes)
+
+    async def apply_update(self, reservation_id: UUID, changes: dict) -> Reservation:
+        reservation = (
+            await self.session.exec(
+                update(Reservation)
+                .where(Reservation.id == reservation_id)
+                .values(**changes)
+                .returning(Reservation)
+            )
+        ).scalar_one_or_none()
+        if reservation is None:
             raise ReservationNotFoundError(reservation_id=reservation_id)
+        await self.session.commit()
+        return reservation
@@ -1,9 +1,237 @@
-from sqlalchemy import create_engine
+import asyncio
+import functools
+import time
+from typing import Sequence
+from uuid import UUID
+
+from sqlalchemy import Insert, Table, event, exc, inspect, make_url
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool, StaticPool
 from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from coworld.models import (  # noqa: F401 (registers tables)
+    idempotency,
+    models,
+    reservations,
+)
+from coworld.models.metrics import PoolStatistics
+from coworld.observability import SlowQueryLogger
+from coworld.settings import Settings, get_settings
+
+
+class PoolStatisticsCollector:
+    def __init__(self) -> None:
+        self.connections_created = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+
+    def listen(self, pool: Pool) -> None:
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def record_wait(self, seconds: float) -> None:
+        self.checkout_wait_total += seconds
+        self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+
+    def snapshot(self, pool: Pool) -> PoolStatistics:
+        live = {}
+        if isinstance(pool, QueuePool):
+            live = {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            }
+        return PoolStatistics(
+            pool_class=type(pool).__name__,
+            **live,
+            connections_created=self.connections_created,
+            checkouts=self.checkouts,
+            checkins=self.checkins,
+            invalidations=self.invalidations,
+            checkout_timeouts=self.checkout_timeouts,
+            checkout_wait_total_ms=self.checkout_wait_total * 1000,
+            checkout_wait_max_ms=self.checkout_wait_max * 1000,
+            checkout_wait_avg_ms=(
+                self.checkout_wait_total * 1000 / self.checkouts
+                if self.checkouts
+                else 0.0
+            ),
+        )
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connections_created += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, proxy) -> None:
+        self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self.invalidations += 1
+
+
+pool_statistics = PoolStatisticsCollector()
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_statistics.checkout_timeouts += 1
+            raise
+        finally:
+            pool_statistics.record_wait(time.perf_counter() - start)
+
+
+def is_memory_database(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def sqlite_pragmas(settings: Settings, url: URL) -> dict[str, str | int]:
+    pragmas = {
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "foreign_keys": "ON" if settings.sqlite_foreign_keys else "OFF",
+        "cache_size": -settings.sqlite_cache_size_kib,
+    }
+    if not is_memory_database(url):
+        pragmas.update(
+            journal_mode=settings.sqlite_journal_mode,
+            synchronous=settings.sqlite_synchronous,
+            mmap_size=settings.sqlite_mmap_size,
+        )
+    return pragmas
+
+
+def listen_sqlite_pragmas(engine: AsyncEngine, pragmas: dict[str, str | int]) -> None:
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def is_busy_error(error: exc.OperationalError) -> bool:
+    message = str(error.orig).lower()
+    return "database is locked" in message or "database table is locked" in message
+
+
+def retry_on_busy(method):
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        settings = get_settings()
+        for attempt in range(settings.database_busy_retries + 1):
+            try:
+                return await method(self, *args, **kwargs)
+            except exc.OperationalError as error:
+                if (
+                    not is_busy_error(error)
+                    or attempt == settings.database_busy_retries
+                ):
+                    raise
+                await self.session.rollback()
+                await asyncio.sleep(
+                    settings.database_busy_retry_backoff_ms * 2**attempt / 1000
+                )
+
+    return wrapper
+
+
+def insert_ignoring_conflicts(session: AsyncSession, table: Table) -> Insert:
+    dialect_inserts = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+    return dialect_inserts[session.bind.dialect.name](table).on_conflict_do_nothing()
+
+
+def row_values(row: SQLModel) -> dict:
+    return {column.key: getattr(row, column.key) for column in row.__table__.columns}
+
+
+async def insert_new_rows(
+    session: AsyncSession, model: type[SQLModel], rows: Sequence[SQLModel]
+) -> set[UUID]:
+    if not rows:
+        return set()
+    table = model.__table__
+    inserted = await session.exec(
+        insert_ignoring_conflicts(session, table).returning(table.c.id),
+        params=[row_values(row) for row in rows],
+    )
+    return set(inserted.scalars().all())
+
+
+def create_engine_from_settings(settings: Settings) -> AsyncEngine:
+    url = make_url(settings.database_url)
+    engine_options = {
+        "echo": settings.database_echo,
+        "query_cache_size": settings.database_query_cache_size,
+    }
+    if is_memory_database(url):
+        engine_options["poolclass"] = StaticPool
+        engine_options["connect_args"] = {"check_same_thread": False}
+    else:
+        engine_options.update(
+            poolclass=TimedAsyncAdaptedQueuePool,
+            pool_size=settings.database_pool_size,
+            max_overflow=settings.database_max_overflow,
+            pool_timeout=settings.database_pool_timeout,
+            pool_pre_ping=settings.database_pool_pre_ping,
+            pool_recycle=settings.database_pool_recycle,
+        )
+    if url.get_backend_name() == "postgresql":
+        url = url.update_query_dict(
+            {
+                "prepared_statement_cache_size": str(
+                    settings.database_statement_cache_size
+                )
+            }
+        )
+    engine = create_async_engine(url, **engine_options)
+    if url.get_backend_name() == "sqlite" and settings.sqlite_tuning_enabled:
+        listen_sqlite_pragmas(engine, sqlite_pragmas(settings, url))
+    pool_statistics.listen(engine.sync_engine.pool)
+    if settings.slow_query_log_enabled:
+        SlowQueryLogger(settings.slow_query_threshold_ms).listen(engine.sync_engine)
+    return engine
+
+
+@functools.lru_cache
+def get_engine() -> AsyncEngine:
+    return create_engine_from_settings(get_settings())
+
+
+async def table_names(engine: AsyncEngine) -> set[str]:
+    async with engine.connect() as connection:
+        return await connection.run_sync(
+            lambda connection: set(inspect(connection).get_table_names())
+        )
+
 
-sqlite_file_name = "database.db"
-sqlite_url = f"sqlite:///{sqlite_file_name}"
+def create_tables_and_indexes(connection) -> None:
+    SQLModel.metadata.create_all(connection)
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
 
-engine = create_engine(sqlite_url, echo=True)
 
-SQLModel.metadata.create_all(engine)
+async def create_schema(engine: AsyncEngine) -> set[str]:
+    existing_tables = await table_names(engine)
+    async with engine.begin() as connection:
+        await connection.run_sync(create_tables_and_indexes)
+    return set(SQLModel.metadata.tables) - existing_tables
@@ -1,26 +1,34 @@
-from typing import Generator
+from typing import AsyncGenerator, Callable
 
-from fastapi import Depends
-from sqlmodel import Session
+from fastapi import Depends, Request
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from coworld.controllers.dishes import DishController
 from coworld.controllers.menus import MenuController
 from coworld.controllers.reservations import ReservationController
-from coworld.database import engine
+from coworld.database import get_engine
 
 
-def get_session() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+def new_session() -> AsyncSession:
+    return AsyncSession(get_engine(), expire_on_commit=False)
+
+
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    async with new_session() as session:
         yield session
 
 
-def get_dish_controller(session=Depends(get_session)):
-    return DishController(session)
+def get_session_factory() -> Callable[[], AsyncSession]:
+    return new_session
+
+
+def get_dish_controller(request: Request, session=Depends(get_session)):
+    return DishController(session, request.app.state.cache)
 
 
-def get_menu_controller(session=Depends(get_session)):
-    return MenuController(session)
+def get_menu_controller(request: Request, session=Depends(get_session)):
+    return MenuController(session, request.app.state.cache)
 
 
-def get_reservation_controller(session=Depends(get_session)):
-    return ReservationController(session)
+def get_reservation_controller(request: Request, session=Depends(get_session)):
+    return ReservationController(session, request.app.state.seating_plan)
@@ -0,0 +1,69 @@
+import csv
+import io
+import tempfile
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Mapping, Sequence
+from uuid import UUID
+
+from starlette.concurrency import run_in_threadpool
+
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+XLSX_READ_SIZE = 64 * 1024
+
+RowChunks = AsyncIterator[Sequence[Mapping]]
+
+
+def cell(value: object) -> object:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def csv_cell(value: object) -> object:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return cell(value)
+
+
+def drain(buffer: io.StringIO) -> bytes:
+    content = buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    return content
+
+
+async def csv_chunks(columns: Sequence[str], chunks: RowChunks) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield drain(buffer)
+    async for rows in chunks:
+        writer.writerows([csv_cell(row[column]) for column in columns] for row in rows)
+        yield drain(buffer)
+
+
+def append_rows(sheet, columns: Sequence[str], rows: Sequence[Mapping]) -> None:
+    for row in rows:
+        sheet.append([cell(row[column]) for column in columns])
+
+
+async def xlsx_chunks(
+    title: str, columns: Sequence[str], chunks: RowChunks
+) -> AsyncIterator[bytes]:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    sheet.append(list(columns))
+    async for rows in chunks:
+        await run_in_threadpool(append_rows, sheet, columns, rows)
+    with tempfile.TemporaryFile() as file:
+        await run_in_threadpool(workbook.save, file)
+        file.seek(0)
+        while content := await run_in_threadpool(file.read, XLSX_READ_SIZE):
+            yield content
@@ -0,0 +1,268 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Callable
+
+from loguru import logger
+from sqlalchemy import delete, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from coworld.database import insert_ignoring_conflicts
+from coworld.models.errors import (
+    BaseError,
+    IdempotencyKeyInProgressError,
+    IdempotencyKeyReusedError,
+)
+from coworld.models.idempotency import IdempotencyKey
+from coworld.settings import Settings
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENT_METHODS = {"POST", "PATCH"}
+
+
+def digest(*parts: bytes) -> str:
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        hasher.update(len(part).to_bytes(8, "big"))
+        hasher.update(part)
+    return hasher.hexdigest()
+
+
+def key_digest(scope: Scope, key: str) -> str:
+    return digest(scope["method"].encode(), scope["path"].encode(), key.encode())
+
+
+def request_digest(scope: Scope, body: bytes) -> str:
+    return digest(scope.get("query_string", b""), body)
+
+
+class IdempotencyStore:
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        ttl_seconds: float,
+        purge_interval_seconds: float,
+    ):
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval_seconds = purge_interval_seconds
+        self.purger: asyncio.Task | None = None
+
+    async def get(self, key: str) -> IdempotencyKey | None:
+        async with self.session_factory() as session:
+            return (
+                await session.exec(
+                    select(IdempotencyKey).where(
+                        IdempotencyKey.key == key,
+                        IdempotencyKey.expires_at > datetime.now(),
+                    )
+                )
+            ).one_or_none()
+
+    async def claim(self, key: str, request_hash: str) -> bool:
+        now = datetime.now()
+        async with self.session_factory() as session:
+            await session.exec(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.key == key, IdempotencyKey.expires_at <= now
+                )
+            )
+            claimed = await session.exec(
+                insert_ignoring_conflicts(session, IdempotencyKey.__table__).values(
+                    key=key,
+                    request_hash=request_hash,
+                    expires_at=now + timedelta(seconds=self.ttl_seconds),
+                )
+            )
+            await session.commit()
+            return claimed.rowcount == 1
+
+    async def save(
+        self, key: str, status_code: int, headers: list[tuple[str, str]], body: bytes
+    ) -> None:
+        async with self.session_factory() as session:
+            await session.exec(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key)
+                .values(status_code=status_code, headers=json.dumps(headers), body=body)
+            )
+            await session.commit()
+
+    async def release(self, key: str) -> None:
+        async with self.session_factory() as session:
+            await session.exec(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+            await session.commit()
+
+    async def purge(self) -> int:
+        async with self.session_factory() as session:
+            purged = await session.exec(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.expires_at <= datetime.now()
+                )
+            )
+            await session.commit()
+            return purged.rowcount
+
+    async def start(self) -> None:
+        self.purger = asyncio.create_task(self.purge_periodically())
+
+    async def purge_periodically(self) -> None:
+        while True:
+            try:
+                await self.purge()
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning("Could not purge expired idempotency keys: {}", error)
+            await asyncio.sleep(self.purge_interval_seconds)
+
+    async def close(self) -> None:
+        if self.purger is not None:
+            self.purger.cancel()
+            try:
+                await self.purger
+            except asyncio.CancelledError:
+                pass
+
+
+def error_response(
+    error: BaseError, response_class: type[JSONResponse] = JSONResponse
+) -> JSONResponse:
+    return response_class(
+        status_code=error.status_code,
+        content={
+            "message": error.message,
+            "name": error.name,
+            "status_code": error.status_code,
+        },
+    )
+
+
+async def read_body(receive: Receive) -> bytes:
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+class IdempotencyMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: IdempotencyStore,
+        response_class: type[JSONResponse] = JSONResponse,
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.response_class = response_class
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+        idempotency_key = Headers(scope=scope).get(IDEMPOTENCY_KEY_HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = await read_body(receive)
+        key = key_digest(scope, idempotency_key)
+        request_hash = request_digest(scope, body)
+
+        stored = await self.store.get(key)
+        if stored is None and not await self.store.claim(key, request_hash):
+            stored = await self.store.get(key)
+        if stored is not None:
+            await self.replay(stored, idempotency_key, request_hash, scope, send)
+            return
+
+        body_sent = False
+
+        async def receive_body() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        start: Message | None = None
+        response_body = b""
+
+        async def send_recorded(message: Message) -> None:
+            nonlocal start, response_body
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                response_body += message.get("body", b"")
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_recorded)
+        except BaseException:
+            await self.store.release(key)
+            raise
+        if start is None or start["status"] >= 500:
+            await self.store.release(key)
+            return
+        await self.store.save(
+            key,
+            start["status"],
+            [
+                (name.decode("latin-1"), value.decode("latin-1"))
+                for name, value in start.get("headers", [])
+            ],
+            response_body,
+        )
+
+    async def replay(
+        self,
+        stored: IdempotencyKey,
+        idempotency_key: str,
+        request_hash: str,
+        scope: Scope,
+        send: Send,
+    ) -> None:
+        if stored.request_hash != request_hash:
+            response = error_response(
+                IdempotencyKeyReusedError(key=idempotency_key), self.response_class
+            )
+        elif stored.status_code is None:
+            response = error_response(
+                IdempotencyKeyInProgressError(key=idempotency_key), self.response_class
+            )
+        else:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": stored.status_code,
+                    "headers": [
+                        (name.encode("latin-1"), value.encode("latin-1"))
+                        for name, value in json.loads(stored.headers)
+                    ]
+                    + [(IDEMPOTENT_REPLAYED_HEADER.lower().encode(), b"true")],
+                }
+            )
+            await send({"type": "http.response.body", "body": stored.body})
+            return
+        await response(scope, None, send)
+
+
+def create_idempotency_store_from_settings(
+    settings: Settings, session_factory: Callable[[], AsyncSession]
+) -> IdempotencyStore | None:
+    if not settings.idempotency_enabled:
+        return None
+    return IdempotencyStore(
+        session_factory,
+        settings.idempotency_ttl_seconds,
+        settings.idempotency_purge_interval_seconds,
+    )
@@ -0,0 +1,60 @@
+from enum import Enum
+from typing import Callable, Sequence
+from uuid import UUID
+
+from sqlmodel import SQLModel
+
+from coworld.models.errors import BaseError
+
+
+class BulkItemStatus(str, Enum):
+    CREATED = "CREATED"
+    CONFLICT = "CONFLICT"
+
+
+class BulkItemError(SQLModel):
+    name: str
+    message: str
+    status_code: int
+
+
+class BulkItemResult(SQLModel):
+    index: int
+    status: BulkItemStatus
+    id: UUID | None = None
+    error: BulkItemError | None = None
+
+
+class BulkCreateResult(SQLModel):
+    created: int
+    conflicts: int
+    items: list[BulkItemResult]
+
+
+def bulk_create_result(
+    rows: Sequence[SQLModel],
+    created_ids: set[UUID],
+    conflict_error: Callable[[SQLModel], BaseError],
+) -> BulkCreateResult:
+    items = []
+    for index, row in enumerate(rows):
+        if row.id in created_ids:
+            items.append(
+                BulkItemResult(index=index, status=BulkItemStatus.CREATED, id=row.id)
+            )
+            continue
+        error = conflict_error(row)
+        items.append(
+            BulkItemResult(
+                index=index,
+                status=BulkItemStatus.CONFLICT,
+                error=BulkItemError(
+                    name=error.name,
+                    message=error.message,
+                    status_code=error.status_code,
+                ),
+            )
+        )
+    return BulkCreateResult(
+        created=len(created_ids), conflicts=len(rows) - len(created_ids), items=items
+    )
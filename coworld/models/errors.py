@@ -1,3 +1,4 @@
+from datetime import datetime
 from uuid import UUID
 
 
@@ -72,6 +73,67 @@ class ReservationNotFoundError(BaseError):
         )
 
 
+class ReservationCapacityExceededError(BaseError):
+    def __init__(
+        self,
+        reservation_time: datetime,
+        amount_of_people: int,
+        status_code: int = 409,
+        name: str = "ReservationCapacityExceededError",
+    ):
+        self.name = name
+        self.message = (
+            f"Not enough seats for {amount_of_people} people"
+            f" at {reservation_time.isoformat()}"
+        )
+        self.status_code = status_code
+        super().__init__(
+            name=self.name, message=self.message, status_code=self.status_code
+        )
+
+
+class InvalidPhoneNumberError(BaseError):
+    def __init__(
+        self,
+        phone_number: str,
+        status_code: int = 400,
+        name: str = "InvalidPhoneNumberError",
+    ):
+        self.name = name
+        self.message = f"Phone number: {phone_number} is not a valid phone number"
+        self.status_code = status_code
+        super().__init__(
+            name=self.name, message=self.message, status_code=self.status_code
+        )
+
+
+class InvalidEmailAddressError(BaseError):
+    def __init__(
+        self,
+        email_address: str,
+        status_code: int = 400,
+        name: str = "InvalidEmailAddressError",
+    ):
+        self.name = name
+        self.message = f"Email address: {email_address} is not a valid email address"
+        self.status_code = status_code
+        super().__init__(
+            name=self.name, message=self.message, status_code=self.status_code
+        )
+
+
+class MissingSearchCriteriaError(BaseError):
+    def __init__(
+        self, status_code: int = 400, name: str = "MissingSearchCriteriaError"
+    ):
+        self.name = name
+        self.message = "Provide an email address or a phone number to search"
+        self.status_code = status_code
+        super().__init__(
+            name=self.name, message=self.message, status_code=self.status_code
+        )
+
+
 class DishInMenuNotFoundError(BaseError):
     def __init__(
         self,
@@ -88,16 +150,39 @@ class DishInMenuNotFoundError(BaseError):
         )
 
 
-class DishAlreadyInMenuError(BaseError):
+class InvalidCursorError(BaseError):
+    def __init__(
+        self, cursor: str, status_code: int = 400, name: str = "InvalidCursorError"
+    ):
+        self.name = name
+        self.message = f"Cursor: {cursor} is not a valid pagination cursor"
+        self.status_code = status_code
+        super().__init__(
+            name=self.name, message=self.message, status_code=self.status_code
+        )
+
+
+class IdempotencyKeyReusedError(BaseError):
+    def __init__(
+        self, key: str, status_code: int = 422, name: str = "IdempotencyKeyReusedError"
+    ):
+        self.name = name
+        self.message = f"Idempotency key: {key} was used for a different request"
+        self.status_code = status_code
+        super().__init__(
+            name=self.name, message=self.message, status_code=self.status_code
+        )
+
+
+class IdempotencyKeyInProgressError(BaseError):
     def __init__(
         self,
-        dish: str,
-        menu_id: UUID,
+        key: str,
         status_code: int = 409,
-        name: str = "DishAlreadyInMenuError",
+        name: str = "IdempotencyKeyInProgressError",
     ):
         self.name = name
-        self.message = f"Dish: {dish} in Menu: {menu_id} already in menu."
+        self.message = f"A request with idempotency key: {key} is still in progress"
         self.status_code = status_code
         super().__init__(
             name=self.name, message=self.message, status_code=self.status_code
@@ -0,0 +1,13 @@
+from datetime import datetime
+
+from sqlalchemy import LargeBinary
+from sqlmodel import Field, SQLModel
+
+
+class IdempotencyKey(SQLModel, table=True):
+    key: str = Field(primary_key=True)
+    request_hash: str
+    status_code: int | None = None
+    headers: str | None = None
+    body: bytes | None = Field(default=None, sa_type=LargeBinary)
+    expires_at: datetime = Field(index=True)
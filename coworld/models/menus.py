@@ -2,6 +2,12 @@ from pydantic import PositiveFloat, computed_field
 from sqlmodel import Field, SQLModel
 
 
+def discounted_price(price: float, discount: float) -> float:
+    if discount > 0.0:
+        return round(price * (1 - discount / 100), 2)
+    return price
+
+
 class MenuBase(SQLModel):
     title: str = Field(unique=True, index=True)
     description: str
@@ -10,10 +16,7 @@ class MenuBase(SQLModel):
 
     @computed_field
     def discounted_price(self) -> float:
-        if self.discount > 0.0:
-            discounted_price = self.price * (1 - self.discount / 100)
-            return round(discounted_price, 2)
-        return self.price
+        return discounted_price(self.price, self.discount)
 
 
 class MenuCreate(MenuBase):
@@ -1,3 +1,4 @@
+from enum import Enum
 from uuid import UUID
 from datetime import datetime
 from sqlmodel import SQLModel, Field
@@ -21,3 +22,19 @@ class MenuDishLinksCreate(SQLModel):
 
 class MenuDishLinksUpdate(SQLModel):
     pass
+
+
+class MenuDishLinkStatus(str, Enum):
+    LINKED = "LINKED"
+    ALREADY_LINKED = "ALREADY_LINKED"
+    DISH_NOT_FOUND = "DISH_NOT_FOUND"
+
+
+class MenuDishLinkResult(SQLModel):
+    dish_id: UUID
+    status: MenuDishLinkStatus
+
+
+class MenuDishLinksResult(SQLModel):
+    menu_id: UUID
+    dishes: list[MenuDishLinkResult]
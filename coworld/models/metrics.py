@@ -0,0 +1,40 @@
+from sqlmodel import SQLModel
+
+
+class PoolStatistics(SQLModel):
+    pool_class: str
+    size: int | None = None
+    checked_in: int | None = None
+    checked_out: int | None = None
+    overflow: int | None = None
+    connections_created: int
+    checkouts: int
+    checkins: int
+    invalidations: int
+    checkout_timeouts: int
+    checkout_wait_total_ms: float
+    checkout_wait_max_ms: float
+    checkout_wait_avg_ms: float
+
+
+class CacheStatistics(SQLModel):
+    enabled: bool = True
+    backend: str | None = None
+    entries: int | None = 0
+    max_entries: int | None = 0
+    ttl_seconds: float = 0.0
+    hits: int = 0
+    misses: int = 0
+    hit_ratio: float = 0.0
+    evictions: int | None = 0
+    expirations: int | None = 0
+    invalidations: int = 0
+
+
+class ValidationCacheStatistics(SQLModel):
+    name: str
+    entries: int
+    max_entries: int
+    hits: int
+    misses: int
+    hit_ratio: float
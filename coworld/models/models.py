@@ -1,5 +1,6 @@
 from datetime import datetime
 from uuid import UUID, uuid4
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship
 from coworld.models.dishes import DishBase
 from coworld.models.menus import MenuBase
@@ -7,6 +8,8 @@ from coworld.models.menus_dishes_links import MenuDishLinks
 
 
 class Menu(MenuBase, table=True):
+    __table_args__ = (Index("ix_menu_created_at_id", "created_at", "id"),)
+
     id: UUID = Field(default_factory=uuid4, primary_key=True, unique=True)
     created_at: datetime = Field(default_factory=lambda: datetime.now())
     dishes: list["Dish"] = Relationship(
@@ -15,6 +18,8 @@ class Menu(MenuBase, table=True):
 
 
 class Dish(DishBase, table=True):
+    __table_args__ = (Index("ix_dish_created_at_id", "created_at", "id"),)
+
     id: UUID | None = Field(default_factory=uuid4, primary_key=True, unique=True)
     created_at: datetime = Field(default_factory=lambda: datetime.now())
     menus: list["Menu"] = Relationship(
@@ -22,13 +27,23 @@ class Dish(DishBase, table=True):
     )
 
 
+class DishRead(DishBase):
+    id: UUID
+    created_at: datetime
+
+
+class MenuRead(MenuBase):
+    id: UUID
+    created_at: datetime
+
+
 class DishInMenu(DishBase):
     id: UUID
     created_at: datetime
-    menus: list["Menu"] | None = None
+    menus: list[MenuRead] | None = None
 
 
 class MenuWithDishes(MenuBase):
     id: UUID
     created_at: datetime
-    dishes: list["Dish"] = []
+    dishes: list[DishRead] = []
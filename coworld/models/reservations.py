@@ -1,10 +1,63 @@
 from uuid import UUID, uuid4
-from datetime import datetime
-from pydantic_extra_types.phone_numbers import PhoneNumber
-from pydantic import EmailStr
+from datetime import date, datetime, timezone
+from typing import Annotated
+from pydantic_core import PydanticCustomError
+from pydantic import AfterValidator, StringConstraints, WithJsonSchema
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, AutoString
 from enum import Enum
 
+from coworld.contacts import (
+    MAX_PHONE_NUMBER_LENGTH,
+    parse_email_address,
+    parse_phone_number,
+)
+from coworld.settings import get_settings
+
+
+def validate_phone_number(phone_number: str) -> str:
+    formats = parse_phone_number(phone_number, get_settings().phone_default_region)
+    if formats is None:
+        raise PydanticCustomError("value_error", "value is not a valid phone number")
+    return formats[0]
+
+
+def validate_email_address(email_address: str) -> str:
+    normalized = parse_email_address(email_address)
+    if normalized is None:
+        raise PydanticCustomError("value_error", "value is not a valid email address")
+    return normalized
+
+
+E164PhoneNumber = Annotated[
+    str,
+    StringConstraints(min_length=7, max_length=MAX_PHONE_NUMBER_LENGTH),
+    AfterValidator(validate_phone_number),
+    WithJsonSchema(
+        {
+            "type": "string",
+            "format": "phone",
+            "minLength": 7,
+            "maxLength": MAX_PHONE_NUMBER_LENGTH,
+        }
+    ),
+]
+
+
+def to_naive_utc(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+ReservationTime = Annotated[datetime, AfterValidator(to_naive_utc)]
+
+EmailAddress = Annotated[
+    str,
+    AfterValidator(validate_email_address),
+    WithJsonSchema({"type": "string", "format": "email"}),
+]
+
 
 class ReservationCategory(Enum):
     BIRTHDAY = "BIRTHDAY"
@@ -15,17 +68,39 @@ class ReservationBase(SQLModel):
     reservation_category: ReservationCategory
     name: str
     family_name: str
-    amount_of_people: int
-    email_address: EmailStr = Field(index=True, sa_type=AutoString)
-    reservation_time: datetime
-    phone_number: PhoneNumber = Field(index=True, sa_type=AutoString)
+    amount_of_people: int = Field(gt=0)
+    email_address: EmailAddress = Field(index=True, sa_type=AutoString)
+    reservation_time: ReservationTime
+    phone_number: E164PhoneNumber = Field(index=True, sa_type=AutoString)
 
 
 class Reservation(ReservationBase, table=True):
+    __table_args__ = (
+        Index("ix_reservation_created_at_id", "created_at", "id"),
+        Index("ix_reservation_reservation_time_id", "reservation_time", "id"),
+        Index(
+            "ix_reservation_category_reservation_time_id",
+            "reservation_category",
+            "reservation_time",
+            "id",
+        ),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True, unique=True)
     created_at: datetime = Field(default_factory=lambda: datetime.now())
 
 
+class SeatingSlot(SQLModel, table=True):
+    slot_time: datetime = Field(primary_key=True)
+    booked_seats: int = 0
+
+
+class SeatingGrid(SQLModel, table=True):
+    id: int = Field(default=1, primary_key=True)
+    slot_minutes: int
+    seating_minutes: int
+
+
 class ReservationCreate(ReservationBase):
     pass
 
@@ -34,7 +109,21 @@ class ReservationUpdate(SQLModel):
     reservation_category: ReservationCategory | None = None
     name: str | None = None
     family_name: str | None = None
-    amount_of_people: int | None = None
-    email_address: EmailStr | None = None
-    reservation_time: datetime | None = None
-    phone_number: PhoneNumber | None = None
+    amount_of_people: int | None = Field(default=None, gt=0)
+    email_address: EmailAddress | None = None
+    reservation_time: ReservationTime | None = None
+    phone_number: E164PhoneNumber | None = None
+
+
+class SlotAvailability(SQLModel):
+    time: datetime
+    booked_seats: int
+    available_seats: int
+
+
+class ReservationAvailability(SQLModel):
+    day: date
+    capacity: int
+    slot_minutes: int
+    seating_minutes: int
+    slots: list[SlotAvailability]
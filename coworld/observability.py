@@ -0,0 +1,124 @@
+import sys
+import time
+from contextvars import ContextVar
+from typing import Any
+from uuid import uuid4
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from coworld.settings import Settings
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+request_scope_var: ContextVar[Scope | None] = ContextVar("request_scope", default=None)
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+
+def current_route() -> str | None:
+    scope = request_scope_var.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    path = route.path if route is not None else scope["path"]
+    return f"{scope['method']} {path}"
+
+
+class RequestContextMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        request_id = request_id or uuid4().hex
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+
+        scope_token = request_scope_var.set(scope)
+        request_id_token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_scope_var.reset(scope_token)
+            request_id_var.reset(request_id_token)
+
+
+def parameters_shape(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class SlowQueryLogger:
+    def __init__(self, threshold_ms: float) -> None:
+        self.threshold_ms = threshold_ms
+
+    def listen(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        if context is not None:
+            context.query_start_time = time.perf_counter()
+
+    def _after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        start_time = getattr(context, "query_start_time", None)
+        if start_time is None:
+            return
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+        if executemany:
+            shape = {
+                "executemany": len(parameters),
+                "row": parameters_shape(parameters[0]) if parameters else None,
+            }
+        else:
+            shape = parameters_shape(parameters)
+        logger.bind(
+            slow_query=True,
+            duration_ms=round(duration_ms, 3),
+            statement=statement,
+            parameters=shape,
+            route=current_route(),
+            request_id=request_id_var.get(),
+        ).warning("Slow query took {:.1f} ms", duration_ms)
+
+
+def is_slow_query(record: dict) -> bool:
+    return "slow_query" in record["extra"]
+
+
+def configure_logging(settings: Settings) -> None:
+    logger.remove()
+    logger.add(
+        sys.stderr,
+        level=settings.log_level,
+        filter=lambda record: not is_slow_query(record),
+    )
+    logger.add(
+        sys.stderr,
+        level=settings.log_level,
+        filter=is_slow_query,
+        serialize=True,
+    )
@@ -0,0 +1,67 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Generic, TypeVar
+from uuid import UUID
+
+from fastapi import Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+
+from coworld.models.errors import InvalidCursorError
+from coworld.settings import get_settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+T = TypeVar("T")
+
+
+class Page(list, Generic[T]):
+    def __init__(self, items=(), next_cursor: str | None = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(key: datetime, id: UUID) -> str:
+    raw = f"{key.isoformat()}|{id.hex}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        key, id = raw.split("|")
+        return datetime.fromisoformat(key), UUID(id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursorError(cursor=cursor)
+
+
+def page_size(limit: int | None) -> int:
+    settings = get_settings()
+    return min(limit or settings.page_size_default, settings.page_size_max)
+
+
+async def paginate(
+    session: AsyncSession,
+    statement: SelectOfScalar[T],
+    model: type[T],
+    cursor: str | None = None,
+    limit: int | None = None,
+    key: InstrumentedAttribute[datetime] | None = None,
+) -> Page[T]:
+    key = model.created_at if key is None else key
+    size = page_size(limit)
+    if cursor is not None:
+        statement = statement.where(tuple_(key, model.id) > decode_cursor(cursor))
+    rows = (await session.exec(statement.order_by(key, model.id).limit(size + 1))).all()
+    if len(rows) <= size:
+        return Page(rows)
+    last = rows[size - 1]
+    return Page(rows[:size], next_cursor=encode_cursor(getattr(last, key.key), last.id))
+
+
+def set_next_cursor_header(response: Response, page: Page) -> None:
+    if page.next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
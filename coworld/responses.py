@@ -0,0 +1,196 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Hashable, Iterable, Mapping, TypeVar
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+from coworld.cache import CacheBackend, Codec, cached
+from coworld.compression import ENCODINGS, compress, negotiate_encoding
+from coworld.pagination import NEXT_CURSOR_HEADER
+from coworld.settings import Settings, get_settings
+
+T = TypeVar("T")
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def default_response_class(settings: Settings) -> type[JSONResponse]:
+    if settings.response_class == "json":
+        return JSONResponse
+    if settings.response_class != "orjson":
+        raise ValueError(f"Unknown response class: {settings.response_class}")
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        raise RuntimeError("The orjson package is required for the orjson responses")
+    return ORJSONResponse
+
+
+class ResponseEncoder:
+    def __init__(
+        self, model: type, many: bool = False, exclude: set[str] | None = None
+    ):
+        self.model = model
+        self.many = many
+        self.exclude = exclude
+        self.adapter = TypeAdapter(list[model] if many else model)
+
+    def encode(self, value: object) -> bytes:
+        items = value if self.many else (value,)
+        if not all(isinstance(item, self.model) for item in items):
+            value = self.adapter.validate_python(value, from_attributes=True)
+        return self.adapter.dump_json(value, exclude=self.exclude)
+
+
+@dataclass(frozen=True)
+class EncodedResponse:
+    content: bytes
+    compressed: dict[str, bytes]
+    tags: frozenset[str]
+    digest: str
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+def dump_encoded_response(encoded: EncodedResponse) -> bytes:
+    bodies = {"identity": encoded.content, **encoded.compressed}
+    metadata = json.dumps(
+        {
+            "tags": sorted(encoded.tags),
+            "digest": encoded.digest,
+            "headers": encoded.headers,
+            "sizes": {encoding: len(body) for encoding, body in bodies.items()},
+        }
+    ).encode()
+    return len(metadata).to_bytes(4, "big") + metadata + b"".join(bodies.values())
+
+
+def load_encoded_response(raw: bytes) -> EncodedResponse:
+    offset = 4 + int.from_bytes(raw[:4], "big")
+    metadata = json.loads(raw[4:offset])
+    bodies = {}
+    for encoding, size in metadata["sizes"].items():
+        bodies[encoding] = raw[offset : offset + size]
+        offset += size
+    content = bodies.pop("identity")
+    return EncodedResponse(
+        content,
+        bodies,
+        frozenset(metadata["tags"]),
+        metadata["digest"],
+        metadata["headers"],
+    )
+
+
+ENCODED_RESPONSE_CODEC = Codec(dump_encoded_response, load_encoded_response)
+
+
+def encode_response(
+    encoder: ResponseEncoder,
+    value: object,
+    tags: Iterable[str],
+    precompress: bool = False,
+) -> EncodedResponse:
+    settings = get_settings()
+    content = encoder.encode(value)
+    compressed = {}
+    if (
+        precompress
+        and settings.compression_enabled
+        and settings.response_cache_precompress
+        and len(content) >= settings.compression_min_bytes
+    ):
+        compressed = {
+            encoding: compress(content, encoding, settings) for encoding in ENCODINGS
+        }
+    headers = {}
+    next_cursor = getattr(value, "next_cursor", None)
+    if next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return EncodedResponse(
+        content,
+        compressed,
+        frozenset(tags),
+        hashlib.blake2b(content, digest_size=16).hexdigest(),
+        headers,
+    )
+
+
+def cache_control(request: Request) -> str:
+    settings = get_settings()
+    path = getattr(request.scope.get("route"), "path", request.url.path)
+    return settings.cache_control_routes.get(path, settings.cache_control_default)
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def encoded_json_response(request: Request, encoded: EncodedResponse) -> Response:
+    headers = dict(encoded.headers)
+    headers["Cache-Control"] = cache_control(request)
+    content = encoded.content
+    etag = f'"{encoded.digest}"'
+    if encoded.compressed:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = negotiate_encoding(
+            request.headers.get("accept-encoding", ""), encoded.compressed
+        )
+        if encoding is not None:
+            content = encoded.compressed[encoding]
+            etag = f'"{encoded.digest}-{encoding}"'
+            headers["Content-Encoding"] = encoding
+    headers["ETag"] = etag
+    if if_none_match(request, etag):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    return Response(content, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+def json_response(
+    request: Request,
+    encoder: ResponseEncoder,
+    value: object,
+    tags: Iterable[str] = (),
+) -> Response:
+    return encoded_json_response(request, encode_response(encoder, value, tags))
+
+
+def model_response(
+    encoder: ResponseEncoder, value: object, status_code: int = 200
+) -> Response:
+    return Response(
+        encoder.encode(value), status_code=status_code, media_type=JSON_MEDIA_TYPE
+    )
+
+
+async def cached_json_response(
+    request: Request,
+    cache: CacheBackend | None,
+    key: Hashable,
+    encoder: ResponseEncoder,
+    load: Callable[[], Awaitable[T]],
+    tags: Callable[[T], Iterable[str]],
+) -> Response:
+    async def encode() -> EncodedResponse:
+        value = await load()
+        return encode_response(encoder, value, tags(value), precompress=True)
+
+    encoded = await cached(cache, ("json", key), encode, lambda encoded: encoded.tags)
+    return encoded_json_response(request, encoded)
+
+
+def ndjson_lines(rows: Iterable[Mapping]) -> bytes:
+    return b"".join(to_json(dict(row)) + b"\n" for row in rows)
+
+
+def attachment(filename: str) -> dict[str, str]:
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
@@ -1,10 +1,12 @@
-from typing import Sequence
 from uuid import UUID
-from fastapi import APIRouter, Depends
-from coworld.controllers.dishes import DishController
+from fastapi import APIRouter, Depends, Query, Request, Response
+from coworld.cache import DISHES_TAG, dish_tag
+from coworld.controllers.dishes import DishController, dish_listing_tags
 from coworld.dependencies import get_dish_controller
 from coworld.models.dishes import DishCreate, DishUpdate, Category
-from coworld.models.models import Dish, DishInMenu
+from coworld.models.models import Dish, DishInMenu, DishRead
+from coworld.models.bulk import BulkCreateResult
+from coworld.responses import ResponseEncoder, cached_json_response, model_response
 
 router = APIRouter(
     prefix="/dishes",
@@ -12,28 +14,66 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+DISH_LISTING = ResponseEncoder(DishInMenu, many=True)
+DISH = ResponseEncoder(Dish)
+DISH_READ = ResponseEncoder(DishRead)
+DISHES = ResponseEncoder(DishRead, many=True)
+BULK_RESULT = ResponseEncoder(BulkCreateResult)
+
 
 @router.post("/", response_model=Dish, status_code=201)
 async def create_dish(
     *,
     dish_create: DishCreate,
     dish_controller: DishController = Depends(get_dish_controller)
-) -> Dish:
-    return await dish_controller.create_dish(dish_create)
+) -> Response:
+    dish = await dish_controller.create_dish(dish_create)
+    return model_response(DISH, dish, status_code=201)
+
+
+@router.post("/bulk", response_model=BulkCreateResult, status_code=200)
+async def create_dishes(
+    *,
+    dish_creates: list[DishCreate],
+    dish_controller: DishController = Depends(get_dish_controller)
+) -> Response:
+    result = await dish_controller.create_dishes(dish_creates)
+    return model_response(BULK_RESULT, result)
 
 
 @router.get("/", response_model=list[DishInMenu])
 async def get_dishes(
-    *, dish_controller: DishController = Depends(get_dish_controller)
-) -> Sequence[Dish]:
-    return await dish_controller.get_dishes()
+    *,
+    request: Request,
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
+    dish_controller: DishController = Depends(get_dish_controller)
+) -> Response:
+    return await cached_json_response(
+        request,
+        dish_controller.cache,
+        ("dishes", cursor, limit),
+        DISH_LISTING,
+        lambda: dish_controller.get_dishes(cursor, limit),
+        dish_listing_tags,
+    )
 
 
 @router.get("/{dish_id}", response_model=Dish)
 async def get_dish_by_id(
-    *, dish_id: UUID, dish_controller: DishController = Depends(get_dish_controller)
-) -> Dish:
-    return await dish_controller.get_dish_by_id(dish_id)
+    *,
+    request: Request,
+    dish_id: UUID,
+    dish_controller: DishController = Depends(get_dish_controller)
+) -> Response:
+    return await cached_json_response(
+        request,
+        dish_controller.cache,
+        ("dish", dish_id),
+        DISH_READ,
+        lambda: dish_controller.get_dish_by_id(dish_id),
+        lambda dish: {dish_tag(dish.id)},
+    )
 
 
 @router.delete("/{dish_id}", status_code=204)
@@ -49,19 +89,39 @@ async def update_dish(
     dish_id: UUID,
     dish_update: DishUpdate,
     dish_controller: DishController = Depends(get_dish_controller)
-) -> Dish:
-    return await dish_controller.update_dish(dish_id, dish_update)
+) -> Response:
+    dish = await dish_controller.update_dish(dish_id, dish_update)
+    return model_response(DISH, dish)
 
 
 @router.get("/type/halal", response_model=list[Dish])
 async def get_halal_dishes(
-    *, is_halal: bool, dish_controller: DishController = Depends(get_dish_controller)
-) -> Sequence[Dish]:
-    return await dish_controller.get_halal_dishes(is_halal)
+    *,
+    request: Request,
+    is_halal: bool,
+    dish_controller: DishController = Depends(get_dish_controller)
+) -> Response:
+    return await cached_json_response(
+        request,
+        dish_controller.cache,
+        ("halal_dishes", is_halal),
+        DISHES,
+        lambda: dish_controller.get_halal_dishes(is_halal),
+        lambda _: {DISHES_TAG},
+    )
 
 
 @router.get("/type/category", response_model=list[Dish])
 async def get_dishes_by_category(
-    category: Category, dish_controller: DishController = Depends(get_dish_controller)
-) -> Sequence[Dish]:
-    return await dish_controller.get_dishes_by_category(category)
+    request: Request,
+    category: Category,
+    dish_controller: DishController = Depends(get_dish_controller),
+) -> Response:
+    return await cached_json_response(
+        request,
+        dish_controller.cache,
+        ("dishes_by_category", category),
+        DISHES,
+        lambda: dish_controller.get_dishes_by_category(category),
+        lambda _: {DISHES_TAG},
+    )
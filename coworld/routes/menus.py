@@ -1,11 +1,22 @@
+from typing import Callable
 from uuid import UUID
-from fastapi import APIRouter, Depends
-from typing import Sequence
-from coworld.controllers.menus import MenuController
-from coworld.dependencies import get_menu_controller
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+from coworld.cache import MENUS_TAG
+from coworld.controllers.menus import PRICE_SHEET_COLUMNS, MenuController, menu_tags
+from coworld.dependencies import get_menu_controller, get_session_factory
+from coworld.exports import CSV_MEDIA_TYPE, XLSX_MEDIA_TYPE, csv_chunks, xlsx_chunks
 from coworld.models.menus import MenuCreate, MenuUpdate
-from coworld.models.models import Menu, MenuWithDishes
-from coworld.models.menus_dishes_links import MenuDishLinksCreate
+from coworld.models.models import Menu, MenuRead, MenuWithDishes
+from coworld.models.menus_dishes_links import MenuDishLinksCreate, MenuDishLinksResult
+from coworld.models.bulk import BulkCreateResult
+from coworld.responses import (
+    ResponseEncoder,
+    attachment,
+    cached_json_response,
+    model_response,
+)
 
 router = APIRouter(
     prefix="/menus",
@@ -13,28 +24,103 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+MENU_LISTING = ResponseEncoder(MenuWithDishes, many=True)
+MENU = ResponseEncoder(Menu)
+MENU_READ = ResponseEncoder(MenuWithDishes, exclude={"dishes"})
+MENUS = ResponseEncoder(MenuRead, many=True)
+LINKS_RESULT = ResponseEncoder(MenuDishLinksResult)
+BULK_RESULT = ResponseEncoder(BulkCreateResult)
+
 
 @router.post("/", response_model=Menu, status_code=201)
 async def create_menu(
     *,
     menu_create: MenuCreate,
     menu_controller: MenuController = Depends(get_menu_controller)
-) -> Menu:
-    return await menu_controller.create_menu(menu_create)
+) -> Response:
+    menu = await menu_controller.create_menu(menu_create)
+    return model_response(MENU, menu, status_code=201)
+
+
+@router.post("/bulk", response_model=BulkCreateResult, status_code=200)
+async def create_menus(
+    *,
+    menu_creates: list[MenuCreate],
+    menu_controller: MenuController = Depends(get_menu_controller)
+) -> Response:
+    result = await menu_controller.create_menus(menu_creates)
+    return model_response(BULK_RESULT, result)
 
 
 @router.get("/", response_model=list[MenuWithDishes])
 async def get_menus(
-    *, menu_controller: MenuController = Depends(get_menu_controller)
-) -> Sequence[Menu]:
-    return await menu_controller.get_menus()
+    *,
+    request: Request,
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
+    menu_controller: MenuController = Depends(get_menu_controller)
+) -> Response:
+    return await cached_json_response(
+        request,
+        menu_controller.cache,
+        ("menus", cursor, limit),
+        MENU_LISTING,
+        lambda: menu_controller.get_menus(cursor, limit),
+        lambda menus: {MENUS_TAG} | menu_tags(menus),
+    )
+
+
+async def price_sheet_rows(session_factory: Callable[[], AsyncSession]):
+    async with session_factory() as session:
+        async for rows in MenuController(session).stream_price_sheet():
+            yield rows
+
+
+@router.get(
+    "/export.csv",
+    response_class=StreamingResponse,
+    responses={200: {"content": {CSV_MEDIA_TYPE: {}}}},
+)
+async def export_price_sheet_csv(
+    session_factory: Callable[[], AsyncSession] = Depends(get_session_factory),
+) -> StreamingResponse:
+    return StreamingResponse(
+        csv_chunks(PRICE_SHEET_COLUMNS, price_sheet_rows(session_factory)),
+        media_type=CSV_MEDIA_TYPE,
+        headers=attachment("menus.csv"),
+    )
+
+
+@router.get(
+    "/export.xlsx",
+    response_class=StreamingResponse,
+    responses={200: {"content": {XLSX_MEDIA_TYPE: {}}}},
+)
+async def export_price_sheet_xlsx(
+    session_factory: Callable[[], AsyncSession] = Depends(get_session_factory),
+) -> StreamingResponse:
+    return StreamingResponse(
+        xlsx_chunks("Menus", PRICE_SHEET_COLUMNS, price_sheet_rows(session_factory)),
+        media_type=XLSX_MEDIA_TYPE,
+        headers=attachment("menus.xlsx"),
+    )
 
 
 @router.get("/{menu_id}", response_model=Menu)
 async def get_menu_by_id(
-    *, menu_id: UUID, menu_controller: MenuController = Depends(get_menu_controller)
-) -> Menu:
-    return await menu_controller.get_menu_by_id(menu_id)
+    *,
+    request: Request,
+    menu_id: UUID,
+    menu_controller: MenuController = Depends(get_menu_controller)
+) -> Response:
+    return await cached_json_response(
+        request,
+        menu_controller.cache,
+        ("menu", menu_id),
+        MENU_READ,
+        lambda: menu_controller.get_menu_by_id(menu_id),
+        lambda menu: menu_tags([menu]),
+    )
 
 
 @router.delete("/{menu_id}", status_code=204)
@@ -50,18 +136,22 @@ async def update_menu(
     menu_id: UUID,
     menu_update: MenuUpdate,
     menu_controller: MenuController = Depends(get_menu_controller)
-) -> Menu:
-    return await menu_controller.update_menu(menu_id, menu_update)
+) -> Response:
+    menu = await menu_controller.update_menu(menu_id, menu_update)
+    return model_response(MENU, menu)
 
 
-@router.patch("/{menu_id}/link_dish", response_model=Menu, status_code=200)
+@router.patch(
+    "/{menu_id}/link_dish", response_model=MenuDishLinksResult, status_code=200
+)
 async def add_dish_to_menu(
     *,
     menu_id: UUID,
     menu_dish_links_create: MenuDishLinksCreate,
     menu_controller: MenuController = Depends(get_menu_controller)
-) -> Menu:
-    return await menu_controller.add_dish_to_menu(menu_id, menu_dish_links_create)
+) -> Response:
+    result = await menu_controller.add_dish_to_menu(menu_id, menu_dish_links_create)
+    return model_response(LINKS_RESULT, result)
 
 
 @router.delete("/{menu_id}/unlink_dish/{dish_id}", status_code=204)
@@ -76,6 +166,14 @@ async def delete_dish_from_menu(
 
 @router.get("/type/discount", response_model=list[Menu])
 async def get_discounted_menus(
+    request: Request,
     menu_controller: MenuController = Depends(get_menu_controller),
-) -> Sequence[Menu]:
-    return await menu_controller.get_discounted_menus()
+) -> Response:
+    return await cached_json_response(
+        request,
+        menu_controller.cache,
+        "discounted_menus",
+        MENUS,
+        menu_controller.get_discounted_menus,
+        lambda _: {MENUS_TAG},
+    )
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Request, Response
+
+from coworld.contacts import validation_cache_statistics
+from coworld.database import get_engine, pool_statistics
+from coworld.models.metrics import (
+    CacheStatistics,
+    PoolStatistics,
+    ValidationCacheStatistics,
+)
+from coworld.responses import ResponseEncoder, json_response
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+)
+
+POOL_STATISTICS = ResponseEncoder(PoolStatistics)
+CACHE_STATISTICS = ResponseEncoder(CacheStatistics)
+VALIDATION_CACHE_STATISTICS = ResponseEncoder(ValidationCacheStatistics, many=True)
+
+
+@router.get("/database", response_model=PoolStatistics)
+async def get_database_metrics(request: Request) -> Response:
+    return json_response(
+        request,
+        POOL_STATISTICS,
+        pool_statistics.snapshot(get_engine().sync_engine.pool),
+    )
+
+
+@router.get("/cache", response_model=CacheStatistics)
+async def get_cache_metrics(request: Request) -> Response:
+    cache = request.app.state.cache
+    if cache is None:
+        statistics = CacheStatistics(enabled=False)
+    else:
+        statistics = await cache.statistics()
+    return json_response(request, CACHE_STATISTICS, statistics)
+
+
+@router.get("/validation", response_model=list[ValidationCacheStatistics])
+async def get_validation_metrics(request: Request) -> Response:
+    return json_response(
+        request, VALIDATION_CACHE_STATISTICS, validation_cache_statistics()
+    )
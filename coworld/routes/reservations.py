@@ -1,13 +1,32 @@
+from datetime import date, datetime
+from typing import Callable
 from uuid import UUID
-from fastapi import APIRouter, Depends
-from typing import Sequence
-from coworld.controllers.reservations import ReservationController
-from coworld.dependencies import get_reservation_controller
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+from coworld.controllers.reservations import (
+    RESERVATION_COLUMNS,
+    ReservationController,
+)
+from coworld.dependencies import get_reservation_controller, get_session_factory
+from coworld.exports import CSV_MEDIA_TYPE, XLSX_MEDIA_TYPE, csv_chunks, xlsx_chunks
 from coworld.models.reservations import (
     Reservation,
+    ReservationAvailability,
+    ReservationCategory,
     ReservationCreate,
+    ReservationTime,
     ReservationUpdate,
 )
+from coworld.models.bulk import BulkCreateResult
+from coworld.responses import (
+    NDJSON_MEDIA_TYPE,
+    ResponseEncoder,
+    attachment,
+    json_response,
+    model_response,
+    ndjson_lines,
+)
 
 router = APIRouter(
     prefix="/reservations",
@@ -15,22 +34,153 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+RESERVATION = ResponseEncoder(Reservation)
+RESERVATIONS = ResponseEncoder(Reservation, many=True)
+BULK_RESULT = ResponseEncoder(BulkCreateResult)
+AVAILABILITY = ResponseEncoder(ReservationAvailability)
+
+
+@router.post("/bulk", response_model=BulkCreateResult, status_code=200)
+async def create_reservations(
+    *,
+    reservation_creates: list[ReservationCreate],
+    reservation_controller: ReservationController = Depends(get_reservation_controller)
+) -> Response:
+    result = await reservation_controller.create_reservations(reservation_creates)
+    return model_response(BULK_RESULT, result)
+
 
 @router.get("/", response_model=list[Reservation])
 async def get_reservations(
     *,
+    request: Request,
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
+    reservation_time_from: ReservationTime | None = Query(default=None, alias="from"),
+    reservation_time_to: ReservationTime | None = Query(default=None, alias="to"),
+    category: ReservationCategory | None = None,
     reservation_controller: ReservationController = Depends(get_reservation_controller)
-) -> Sequence[Reservation]:
-    return await reservation_controller.get_reservations()
+) -> Response:
+    reservations = await reservation_controller.get_reservations(
+        cursor, limit, reservation_time_from, reservation_time_to, category
+    )
+    return json_response(request, RESERVATIONS, reservations)
+
+
+@router.get("/day/{day}", response_model=list[Reservation])
+async def get_reservations_for_day(
+    *,
+    request: Request,
+    day: date,
+    category: ReservationCategory | None = None,
+    reservation_controller: ReservationController = Depends(get_reservation_controller)
+) -> Response:
+    reservations = await reservation_controller.get_reservations_for_day(day, category)
+    return json_response(request, RESERVATIONS, reservations)
+
+
+@router.get("/search", response_model=list[Reservation])
+async def search_reservations(
+    *,
+    request: Request,
+    email: str | None = None,
+    phone: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
+    reservation_controller: ReservationController = Depends(get_reservation_controller)
+) -> Response:
+    reservations = await reservation_controller.search_reservations(email, phone, limit)
+    return json_response(request, RESERVATIONS, reservations)
+
+
+@router.get("/availability", response_model=ReservationAvailability)
+async def get_availability(
+    *,
+    request: Request,
+    day: date = Query(alias="date"),
+    reservation_controller: ReservationController = Depends(get_reservation_controller)
+) -> Response:
+    availability = await reservation_controller.get_availability(day)
+    return json_response(request, AVAILABILITY, availability)
+
+
+async def reservation_rows(
+    session_factory: Callable[[], AsyncSession],
+    reservation_time_from: datetime | None,
+    reservation_time_to: datetime | None,
+):
+    async with session_factory() as session:
+        async for rows in ReservationController(session).stream_reservations(
+            reservation_time_from, reservation_time_to
+        ):
+            yield rows
+
+
+@router.get(
+    "/export.ndjson",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+async def export_reservations_ndjson(
+    *,
+    reservation_time_from: ReservationTime | None = Query(default=None, alias="from"),
+    reservation_time_to: ReservationTime | None = Query(default=None, alias="to"),
+    session_factory: Callable[[], AsyncSession] = Depends(get_session_factory)
+) -> StreamingResponse:
+    rows = reservation_rows(session_factory, reservation_time_from, reservation_time_to)
+    return StreamingResponse(
+        (ndjson_lines(chunk) async for chunk in rows),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers=attachment("reservations.ndjson"),
+    )
+
+
+@router.get(
+    "/export.csv",
+    response_class=StreamingResponse,
+    responses={200: {"content": {CSV_MEDIA_TYPE: {}}}},
+)
+async def export_reservations_csv(
+    *,
+    reservation_time_from: ReservationTime | None = Query(default=None, alias="from"),
+    reservation_time_to: ReservationTime | None = Query(default=None, alias="to"),
+    session_factory: Callable[[], AsyncSession] = Depends(get_session_factory)
+) -> StreamingResponse:
+    rows = reservation_rows(session_factory, reservation_time_from, reservation_time_to)
+    return StreamingResponse(
+        csv_chunks(RESERVATION_COLUMNS, rows),
+        media_type=CSV_MEDIA_TYPE,
+        headers=attachment("reservations.csv"),
+    )
+
+
+@router.get(
+    "/export.xlsx",
+    response_class=StreamingResponse,
+    responses={200: {"content": {XLSX_MEDIA_TYPE: {}}}},
+)
+async def export_reservations_xlsx(
+    *,
+    reservation_time_from: ReservationTime | None = Query(default=None, alias="from"),
+    reservation_time_to: ReservationTime | None = Query(default=None, alias="to"),
+    session_factory: Callable[[], AsyncSession] = Depends(get_session_factory)
+) -> StreamingResponse:
+    rows = reservation_rows(session_factory, reservation_time_from, reservation_time_to)
+    return StreamingResponse(
+        xlsx_chunks("Reservations", RESERVATION_COLUMNS, rows),
+        media_type=XLSX_MEDIA_TYPE,
+        headers=attachment("reservations.xlsx"),
+    )
 
 
 @router.get("/{reservation_id}", response_model=Reservation)
 async def get_reservation_by_id(
     *,
+    request: Request,
     reservation_id: UUID,
     dish_controller: ReservationController = Depends(get_reservation_controller)
-) -> Reservation:
-    return await dish_controller.get_reservation_by_id(reservation_id)
+) -> Response:
+    reservation = await dish_controller.get_reservation_by_id(reservation_id)
+    return json_response(request, RESERVATION, reservation)
 
 
 @router.post("/", response_model=Reservation, status_code=201)
@@ -38,8 +188,9 @@ async def create_reservation(
     *,
     reservation_create: ReservationCreate,
     reservation_controller: ReservationController = Depends(get_reservation_controller)
-) -> Reservation:
-    return await reservation_controller.create_reservation(reservation_create)
+) -> Response:
+    reservation = await reservation_controller.create_reservation(reservation_create)
+    return model_response(RESERVATION, reservation, status_code=201)
 
 
 @router.delete("/{reservation_id}", status_code=204)
@@ -57,7 +208,8 @@ async def update_reservation(
     reservation_id: UUID,
     reservation_update: ReservationUpdate,
     reservation_controller: ReservationController = Depends(get_reservation_controller)
-) -> Reservation:
-    return await reservation_controller.update_reservation(
+) -> Response:
+    reservation = await reservation_controller.update_reservation(
         reservation_id, reservation_update
     )
+    return model_response(RESERVATION, reservation)
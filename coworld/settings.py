@@ -0,0 +1,78 @@
+from datetime import time
+from functools import lru_cache
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="COWORLD_", env_file=".env", extra="ignore"
+    )
+
+    database_url: str = "sqlite+aiosqlite:///database.db"
+    database_echo: bool = False
+    database_create_schema: bool = True
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30.0
+    database_pool_pre_ping: bool = True
+    database_pool_recycle: int = 1800
+    database_query_cache_size: int = 500
+    database_statement_cache_size: int = 100
+    database_busy_retries: int = 3
+    database_busy_retry_backoff_ms: float = 20.0
+    sqlite_tuning_enabled: bool = True
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_cache_size_kib: int = 65536
+    sqlite_mmap_size: int = 268435456
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_foreign_keys: bool = True
+    page_size_default: int = 100
+    page_size_max: int = 500
+    export_chunk_size: int = 1000
+    contact_validation_cache_size: int = 4096
+    phone_default_region: str | None = None
+    availability_capacity: int = 40
+    availability_slot_minutes: int = 15
+    availability_seating_minutes: int = 120
+    availability_opening_time: time = time(11, 0)
+    availability_closing_time: time = time(23, 0)
+    availability_rebuild_on_startup: bool = False
+    cache_enabled: bool = True
+    cache_max_entries: int = 1024
+    cache_ttl_seconds: float = 60.0
+    cache_backend: str = "memory"
+    cache_redis_url: str | None = None
+    cache_redis_prefix: str = "coworld:cache"
+    cache_redis_subscribe_timeout_seconds: float = 5.0
+    response_class: str = "orjson"
+    response_cache_precompress: bool = True
+    compression_enabled: bool = True
+    compression_min_bytes: int = 1024
+    compression_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_media_types: list[str] = [
+        "application/json",
+        "application/x-ndjson",
+        "text/csv",
+        "text/plain",
+        "text/html",
+    ]
+    cache_control_default: str = "no-cache"
+    cache_control_routes: dict[str, str] = {
+        "/metrics/database": "no-store",
+        "/metrics/cache": "no-store",
+        "/metrics/validation": "no-store",
+    }
+    idempotency_enabled: bool = True
+    idempotency_ttl_seconds: float = 86400.0
+    idempotency_purge_interval_seconds: float = 3600.0
+    log_level: str = "INFO"
+    slow_query_log_enabled: bool = True
+    slow_query_threshold_ms: float = 100.0
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
@@ -1,26 +1,52 @@
+from pathlib import Path
+
 import pytest
+import pytest_asyncio
 from faker import Faker
 from fastapi import FastAPI
-from sqlalchemy import create_engine
-from sqlmodel import SQLModel, Session
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.testclient import TestClient
 from coworld.api import create_app
 from coworld.controllers.dishes import DishController
 from coworld.controllers.menus import MenuController
 from coworld.controllers.reservations import ReservationController
+from coworld.database import get_engine
+from coworld.settings import get_settings
+
+
+@pytest_asyncio.fixture(name="engine")
+async def fixture_engine() -> AsyncEngine:
+    sqlite_url = "sqlite+aiosqlite:///:memory:"
+    engine = create_async_engine(
+        sqlite_url,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
 
+@pytest.fixture(name="statements")
+def fixture_statements(engine: AsyncEngine) -> list[str]:
+    statements = []
 
-@pytest.fixture(name="engine")
-def fixture_engine():
-    sqlite_url = "sqlite:///:memory:"
-    engine = create_engine(sqlite_url, connect_args={"check_same_thread": False})
-    SQLModel.metadata.create_all(engine)
-    return engine
+    def record_statement(conn, cursor, statement, *args) -> None:
+        statements.append(statement)
 
+    event.listen(engine.sync_engine, "before_cursor_execute", record_statement)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", record_statement)
 
-@pytest.fixture(name="session")
-def fixture_session(engine) -> Session:
-    with Session(engine) as session:
+
+@pytest_asyncio.fixture(name="session")
+async def fixture_session(engine: AsyncEngine) -> AsyncSession:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
 
 
@@ -52,3 +78,14 @@ def get_test_app() -> FastAPI:
 @pytest.fixture(name="client")
 def get_test_client(app: FastAPI) -> TestClient:
     return TestClient(app)
+
+
+@pytest.fixture(name="database_path")
+def fixture_database_path(tmp_path, monkeypatch) -> Path:
+    database_path = tmp_path / "coworld.db"
+    monkeypatch.setenv("COWORLD_DATABASE_URL", f"sqlite+aiosqlite:///{database_path}")
+    get_settings.cache_clear()
+    get_engine.cache_clear()
+    yield database_path
+    get_settings.cache_clear()
+    get_engine.cache_clear()
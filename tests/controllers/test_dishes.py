@@ -2,17 +2,22 @@ import random
 
 import pytest
 from faker import Faker
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from coworld.controllers.dishes import DishController
+from coworld.controllers.menus import MenuController
+from coworld.models.bulk import BulkItemStatus
 from coworld.models.dishes import DishCreate, Category, DishUpdate
 from coworld.models.errors import DishNotFoundError, DishAlreadyExistsError
-from coworld.models.models import Dish
+from coworld.models.menus import MenuCreate
+from coworld.models.menus_dishes_links import MenuDishLinks, MenuDishLinksCreate
+from coworld.models.models import Dish, DishInMenu
 
 
 @pytest.mark.asyncio
 async def test_create_dish(
-    dish_controller: DishController, session: Session, faker: Faker
+    dish_controller: DishController, session: AsyncSession, faker: Faker
 ) -> None:
     # Prepare
     dish_create = DishCreate(
@@ -26,7 +31,7 @@ async def test_create_dish(
     # Act
     result = await dish_controller.create_dish(dish_create)
 
-    dish = session.exec(select(Dish).where(Dish.id == result.id)).one()
+    dish = (await session.exec(select(Dish).where(Dish.id == result.id))).one()
 
     # Assert
     assert result.title == dish_create.title == dish.title
@@ -58,6 +63,93 @@ async def test_create_dish_already_exist(
         await dish_controller.create_dish(dish_create)
 
 
+@pytest.mark.asyncio
+async def test_create_dishes(
+    dish_controller: DishController,
+    session: AsyncSession,
+    statements: list[str],
+    faker: Faker,
+) -> None:
+    # Prepare
+    dish_creates = [
+        DishCreate(
+            title=faker.unique.text(max_nb_chars=12),
+            description=faker.text(max_nb_chars=24),
+            category=random.choice(list(Category)),
+            ingredients=faker.text(max_nb_chars=24),
+            price=random.uniform(0.99, 99.99),
+            halal=random.choice([True, False]),
+        )
+        for _ in range(50)
+    ]
+    statements.clear()
+
+    # Act
+    result = await dish_controller.create_dishes(dish_creates)
+
+    # Assert
+    assert len(statements) == 1
+    assert result.created == 50
+    assert result.conflicts == 0
+    assert [item.index for item in result.items] == list(range(50))
+    assert all(item.status == BulkItemStatus.CREATED for item in result.items)
+    dishes = (await session.exec(select(Dish))).all()
+    assert {dish.id for dish in dishes} == {item.id for item in result.items}
+    assert {dish.title for dish in dishes} == {
+        dish_create.title for dish_create in dish_creates
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_dishes_reports_conflicts_without_aborting(
+    dish_controller: DishController, session: AsyncSession, faker: Faker
+) -> None:
+    # Prepare
+    existing_dish = await dish_controller.create_dish(
+        DishCreate(
+            title=faker.unique.text(max_nb_chars=12),
+            description=faker.text(max_nb_chars=24),
+            category=random.choice(list(Category)),
+            ingredients=faker.text(max_nb_chars=24),
+            price=random.uniform(0.99, 99.99),
+            halal=random.choice([True, False]),
+        )
+    )
+    new_dish_create = DishCreate(
+        title=faker.unique.text(max_nb_chars=12),
+        description=faker.text(max_nb_chars=24),
+        category=random.choice(list(Category)),
+        ingredients=faker.text(max_nb_chars=24),
+        price=random.uniform(0.99, 99.99),
+        halal=random.choice([True, False]),
+    )
+    conflicting_dish_create = new_dish_create.model_copy(
+        update={"title": existing_dish.title}
+    )
+
+    # Act
+    result = await dish_controller.create_dishes(
+        [conflicting_dish_create, new_dish_create, new_dish_create]
+    )
+
+    # Assert
+    assert result.created == 1
+    assert result.conflicts == 2
+    assert [item.status for item in result.items] == [
+        BulkItemStatus.CONFLICT,
+        BulkItemStatus.CREATED,
+        BulkItemStatus.CONFLICT,
+    ]
+    assert result.items[0].id is None
+    assert result.items[0].error.model_dump() == {
+        "name": "DishAlreadyExistsError",
+        "message": DishAlreadyExistsError(title=existing_dish.title).message,
+        "status_code": 409,
+    }
+    dishes = (await session.exec(select(Dish))).all()
+    assert {dish.id for dish in dishes} == {existing_dish.id, result.items[1].id}
+
+
 @pytest.mark.asyncio
 async def test_get_dish_by_id(dish_controller: DishController, faker: Faker) -> None:
     # Prepare
@@ -159,6 +251,35 @@ async def test_update_dish(dish_controller: DishController, faker: Faker) -> Non
     assert updated_dish.halal == dish_update.halal
 
 
+@pytest.mark.asyncio
+async def test_update_dish_is_a_single_statement(
+    dish_controller: DishController, statements: list[str], faker: Faker
+) -> None:
+    # Prepare
+    new_dish = await dish_controller.create_dish(
+        DishCreate(
+            title=faker.unique.text(max_nb_chars=12),
+            description=faker.text(max_nb_chars=24),
+            category=random.choice(list(Category)),
+            ingredients=faker.text(max_nb_chars=24),
+            price=random.uniform(0.99, 99.99),
+            halal=random.choice([True, False]),
+        )
+    )
+    statements.clear()
+
+    # Act
+    updated_dish = await dish_controller.update_dish(
+        new_dish.id, DishUpdate(price=12.5)
+    )
+
+    # Assert
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE dish")
+    assert updated_dish.price == 12.5
+    assert updated_dish.title == new_dish.title
+
+
 @pytest.mark.asyncio
 async def test_update_dish_not_found_error(
     dish_controller: DishController, faker: Faker
@@ -200,6 +321,46 @@ async def test_delete_dish(dish_controller: DishController, faker: Faker) -> Non
         await dish_controller.get_dish_by_id(new_dish.id)
 
 
+@pytest.mark.asyncio
+async def test_delete_dish_removes_menu_links(
+    dish_controller: DishController,
+    menu_controller: MenuController,
+    session: AsyncSession,
+    faker: Faker,
+) -> None:
+    # Prepare
+    menu = await menu_controller.create_menu(
+        MenuCreate(
+            title=faker.unique.text(max_nb_chars=12),
+            description=faker.text(max_nb_chars=24),
+            price=random.uniform(2.99, 99.99),
+        )
+    )
+    dish = await dish_controller.create_dish(
+        DishCreate(
+            title=faker.unique.text(max_nb_chars=12),
+            description=faker.text(max_nb_chars=24),
+            category=random.choice(list(Category)),
+            ingredients=faker.text(max_nb_chars=24),
+            price=random.uniform(0.99, 99.99),
+            halal=random.choice([True, False]),
+        )
+    )
+    await menu_controller.add_dish_to_menu(
+        menu_id=menu.id,
+        menu_dish_links_create=MenuDishLinksCreate(dish_ids=[dish.id], menu_id=menu.id),
+    )
+
+    # Act
+    await dish_controller.delete_dish(dish.id)
+
+    # Assert
+    links = (await session.exec(select(MenuDishLinks))).all()
+    assert links == []
+    updated_menu = await menu_controller.get_menu_by_id(menu.id)
+    assert updated_menu.dishes == []
+
+
 @pytest.mark.asyncio
 async def test_delete_dish_not_found_error(
     dish_controller: DishController, faker: Faker
@@ -290,3 +451,59 @@ async def test_get_halal_dishes(dish_controller: DishController, faker: Faker) -
 
     assert len(non_halal_result) == len(non_halal_dishes)
     assert not any(dish.halal for dish in non_halal_result)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("number_dishes", [1, 5, 25])
+async def test_get_dishes_query_count_does_not_grow_with_dishes(
+    dish_controller: DishController,
+    menu_controller: MenuController,
+    session: AsyncSession,
+    statements: list[str],
+    faker: Faker,
+    number_dishes: int,
+) -> None:
+    # Prepare
+    menus = [
+        await menu_controller.create_menu(
+            MenuCreate(
+                title=faker.unique.text(max_nb_chars=12),
+                description=faker.text(max_nb_chars=24),
+                price=random.uniform(2.99, 99.99),
+            )
+        )
+        for _ in range(2)
+    ]
+    dish_ids = []
+    for _ in range(number_dishes):
+        dish = await dish_controller.create_dish(
+            DishCreate(
+                title=faker.unique.text(max_nb_chars=12),
+                description=faker.text(max_nb_chars=24),
+                category=random.choice(list(Category)),
+                ingredients=faker.text(max_nb_chars=24),
+                price=random.uniform(0.99, 99.99),
+                halal=random.choice([True, False]),
+            )
+        )
+        dish_ids.append(dish.id)
+    for menu in menus:
+        await menu_controller.add_dish_to_menu(
+            menu_id=menu.id,
+            menu_dish_links_create=MenuDishLinksCreate(
+                dish_ids=dish_ids, menu_id=menu.id
+            ),
+        )
+    session.expunge_all()
+    statements.clear()
+
+    # Act
+    dishes = await dish_controller.get_dishes()
+    serialized = [
+        DishInMenu.model_validate(dish).model_dump(mode="json") for dish in dishes
+    ]
+
+    # Assert
+    assert len(serialized) == number_dishes
+    assert all(len(dish["menus"]) == 2 for dish in serialized)
+    assert len(statements) == 2
@@ -1,25 +1,34 @@
 from coworld.controllers.dishes import DishController
 from coworld.controllers.menus import MenuController
+from coworld.database import create_schema, get_engine
+from coworld.models.bulk import BulkItemStatus
 import pytest
 import random
+import sqlite3
+from pathlib import Path
 from faker import Faker
-from sqlmodel import Session, select
+from sqlalchemy import event
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from coworld.models.dishes import DishCreate, Category
 from coworld.models.errors import (
     MenuAlreadyExistsError,
     MenuNotFoundError,
-    DishAlreadyInMenuError,
     DishInMenuNotFoundError,
 )
 from coworld.models.menus import MenuCreate, MenuUpdate
-from coworld.models.menus_dishes_links import MenuDishLinksCreate
-from coworld.models.models import Menu
+from coworld.models.menus_dishes_links import (
+    MenuDishLinks,
+    MenuDishLinksCreate,
+    MenuDishLinkStatus,
+)
+from coworld.models.models import Menu, MenuWithDishes
 
 
 @pytest.mark.asyncio
 async def test_create_menu(
-    menu_controller: MenuController, session: Session, faker: Faker
+    menu_controller: MenuController, session: AsyncSession, faker: Faker
 ) -> None:
     # Prepare
     menu_create = MenuCreate(
@@ -31,7 +40,7 @@ async def test_create_menu(
     # Act
     result = await menu_controller.create_menu(menu_create)
 
-    menu = session.exec(select(Menu).where(Menu.id == result.id)).one()
+    menu = (await session.exec(select(Menu).where(Menu.id == result.id))).one()
 
     # Assert
     assert result.title == menu_create.title == menu.title
@@ -58,6 +67,44 @@ async def test_create_menu_already_exist_error(
         await menu_controller.create_menu(menu_create)
 
 
+@pytest.mark.asyncio
+async def test_create_menus(
+    menu_controller: MenuController, session: AsyncSession, faker: Faker
+) -> None:
+    # Prepare
+    existing_menu = await menu_controller.create_menu(
+        MenuCreate(
+            title=faker.unique.text(max_nb_chars=12),
+            description=faker.text(max_nb_chars=24),
+            price=random.uniform(2.99, 99.99),
+        )
+    )
+    new_menu_create = MenuCreate(
+        title=faker.unique.text(max_nb_chars=12),
+        description=faker.text(max_nb_chars=24),
+        price=random.uniform(2.99, 99.99),
+    )
+    conflicting_menu_create = new_menu_create.model_copy(
+        update={"title": existing_menu.title}
+    )
+
+    # Act
+    result = await menu_controller.create_menus(
+        [new_menu_create, conflicting_menu_create]
+    )
+
+    # Assert
+    assert result.created == 1
+    assert result.conflicts == 1
+    assert [item.status for item in result.items] == [
+        BulkItemStatus.CREATED,
+        BulkItemStatus.CONFLICT,
+    ]
+    assert result.items[1].error.name == "MenuAlreadyExistsError"
+    menus = (await session.exec(select(Menu))).all()
+    assert {menu.id for menu in menus} == {existing_menu.id, result.items[0].id}
+
+
 @pytest.mark.asyncio
 async def test_get_menu_by_id(menu_controller: MenuController, faker: Faker) -> None:
     # Prepare
@@ -183,6 +230,51 @@ async def test_delete_menu(menu_controller: MenuController, faker: Faker) -> Non
         await menu_controller.get_menu_by_id(new_menu.id)
 
 
+@pytest.mark.asyncio
+async def test_delete_menu_with_dishes(
+    menu_controller: MenuController,
+    dish_controller: DishController,
+    session: AsyncSession,
+    faker: Faker,
+) -> None:
+    # Prepare
+    await create_menus_with_dishes(
+        menu_controller, dish_controller, faker, number_menus=1, dishes_per_menu=3
+    )
+    menu = (await session.exec(select(Menu))).one()
+
+    # Act
+    await menu_controller.delete_menu(menu.id)
+
+    # Assert
+    assert (await session.exec(select(MenuDishLinks))).all() == []
+    assert len((await dish_controller.get_dishes())) == 3
+    with pytest.raises(MenuNotFoundError):
+        await menu_controller.get_menu_by_id(menu.id)
+
+
+@pytest.mark.asyncio
+async def test_update_menu_without_changes(
+    menu_controller: MenuController, statements: list[str], faker: Faker
+) -> None:
+    # Prepare
+    menu = await menu_controller.create_menu(
+        MenuCreate(
+            title=faker.unique.text(max_nb_chars=12),
+            description=faker.text(max_nb_chars=24),
+            price=random.uniform(2.99, 99.99),
+        )
+    )
+    statements.clear()
+
+    # Act
+    updated_menu = await menu_controller.update_menu(menu.id, MenuUpdate())
+
+    # Assert
+    assert [statement.split()[0] for statement in statements] == ["SELECT", "SELECT"]
+    assert updated_menu.title == menu.title
+
+
 @pytest.mark.asyncio
 async def test_delete_menu_not_found_error(
     menu_controller: MenuController, faker: Faker
@@ -222,19 +314,186 @@ async def test_add_dish_to_menu(
     menu_dish_links_create = MenuDishLinksCreate(
         dish_ids=[created_dish.id], menu_id=created_menu.id
     )
-    updated_menu = await menu_controller.add_dish_to_menu(
+    result = await menu_controller.add_dish_to_menu(
         menu_id=created_menu.id, menu_dish_links_create=menu_dish_links_create
     )
+    updated_menu = await menu_controller.get_menu_by_id(created_menu.id)
 
     # Assert
+    assert result.menu_id == created_menu.id
+    assert [(link.dish_id, link.status) for link in result.dishes] == [
+        (created_dish.id, MenuDishLinkStatus.LINKED)
+    ]
     assert created_dish.id in [dish.id for dish in updated_menu.dishes]
-    assert updated_menu.id == created_menu.id
 
     # Act again: Try to add the same dish to the menu
-    with pytest.raises(DishAlreadyInMenuError):
-        await menu_controller.add_dish_to_menu(
-            menu_id=created_menu.id, menu_dish_links_create=menu_dish_links_create
+    result = await menu_controller.add_dish_to_menu(
+        menu_id=created_menu.id, menu_dish_links_create=menu_dish_links_create
+    )
+
+    # Assert
+    assert [(link.dish_id, link.status) for link in result.dishes] == [
+        (created_dish.id, MenuDishLinkStatus.ALREADY_LINKED)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_add_dish_to_menu_reports_status_per_dish(
+    menu_controller: MenuController, dish_controller: DishController, faker: Faker
+) -> None:
+    # Prepare
+    menu = await menu_controller.create_menu(
+        MenuCreate(
+            title=faker.unique.text(max_nb_chars=12),
+            description=faker.text(max_nb_chars=24),
+            price=random.uniform(2.99, 99.99),
+        )
+    )
+    dishes = []
+    for _ in range(2):
+        dish = await dish_controller.create_dish(
+            DishCreate(
+                title=faker.unique.text(max_nb_chars=12),
+                description=faker.text(max_nb_chars=24),
+                category=random.choice(list(Category)),
+                ingredients=faker.text(max_nb_chars=24),
+                price=random.uniform(0.99, 99.99),
+                halal=random.choice([True, False]),
+            )
+        )
+        dishes.append(dish)
+    await menu_controller.add_dish_to_menu(
+        menu_id=menu.id,
+        menu_dish_links_create=MenuDishLinksCreate(
+            dish_ids=[dishes[0].id], menu_id=menu.id
+        ),
+    )
+    nonexistent_dish_id = faker.uuid4(cast_to=None)
+
+    # Act
+    result = await menu_controller.add_dish_to_menu(
+        menu_id=menu.id,
+        menu_dish_links_create=MenuDishLinksCreate(
+            dish_ids=[dishes[0].id, nonexistent_dish_id, dishes[1].id, dishes[1].id],
+            menu_id=menu.id,
+        ),
+    )
+
+    # Assert
+    assert [(link.dish_id, link.status) for link in result.dishes] == [
+        (dishes[0].id, MenuDishLinkStatus.ALREADY_LINKED),
+        (nonexistent_dish_id, MenuDishLinkStatus.DISH_NOT_FOUND),
+        (dishes[1].id, MenuDishLinkStatus.LINKED),
+    ]
+    updated_menu = await menu_controller.get_menu_by_id(menu.id)
+    assert {dish.id for dish in updated_menu.dishes} == {dish.id for dish in dishes}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("number_dishes", [1, 200])
+async def test_add_dish_to_menu_round_trips_do_not_grow_with_dishes(
+    menu_controller: MenuController,
+    dish_controller: DishController,
+    statements: list[str],
+    faker: Faker,
+    number_dishes: int,
+) -> None:
+    # Prepare
+    menu = await menu_controller.create_menu(
+        MenuCreate(
+            title=faker.unique.text(max_nb_chars=12),
+            description=faker.text(max_nb_chars=24),
+            price=random.uniform(2.99, 99.99),
         )
+    )
+    dish_ids = []
+    for _ in range(number_dishes):
+        dish = await dish_controller.create_dish(
+            DishCreate(
+                title=faker.unique.text(max_nb_chars=12),
+                description=faker.text(max_nb_chars=24),
+                category=random.choice(list(Category)),
+                ingredients=faker.text(max_nb_chars=24),
+                price=random.uniform(0.99, 99.99),
+                halal=random.choice([True, False]),
+            )
+        )
+        dish_ids.append(dish.id)
+    statements.clear()
+
+    # Act
+    result = await menu_controller.add_dish_to_menu(
+        menu_id=menu.id,
+        menu_dish_links_create=MenuDishLinksCreate(dish_ids=dish_ids, menu_id=menu.id),
+    )
+
+    # Assert
+    assert len(statements) == 3
+    assert all(link.status == MenuDishLinkStatus.LINKED for link in result.dishes)
+
+
+@pytest.mark.asyncio
+async def test_add_dish_to_menu_reports_dish_deleted_concurrently(
+    database_path: Path, faker: Faker
+) -> None:
+    # Prepare
+    engine = get_engine()
+    await create_schema(engine)
+    session = AsyncSession(engine, expire_on_commit=False)
+    menu_controller = MenuController(session)
+    dish_controller = DishController(session)
+    menu = await menu_controller.create_menu(
+        MenuCreate(
+            title=faker.unique.text(max_nb_chars=12),
+            description=faker.text(max_nb_chars=24),
+            price=random.uniform(2.99, 99.99),
+        )
+    )
+    dish_ids = []
+    for _ in range(2):
+        dish = await dish_controller.create_dish(
+            DishCreate(
+                title=faker.unique.text(max_nb_chars=12),
+                description=faker.text(max_nb_chars=24),
+                category=random.choice(list(Category)),
+                ingredients=faker.text(max_nb_chars=24),
+                price=random.uniform(0.99, 99.99),
+                halal=random.choice([True, False]),
+            )
+        )
+        dish_ids.append(dish.id)
+    deleted = []
+
+    def delete_dish_before_linking(conn, cursor, statement, *args) -> None:
+        if statement.startswith("INSERT INTO menudishlinks") and not deleted:
+            deleted.append(dish_ids[0])
+            with sqlite3.connect(database_path) as other_worker:
+                other_worker.execute(
+                    "DELETE FROM dish WHERE id = ?", (dish_ids[0].hex,)
+                )
+
+    event.listen(
+        engine.sync_engine, "before_cursor_execute", delete_dish_before_linking
+    )
+
+    # Act
+    try:
+        result = await menu_controller.add_dish_to_menu(
+            menu_id=menu.id,
+            menu_dish_links_create=MenuDishLinksCreate(
+                dish_ids=dish_ids, menu_id=menu.id
+            ),
+        )
+    finally:
+        await session.close()
+        await engine.dispose()
+
+    # Assert
+    assert deleted == [dish_ids[0]]
+    assert [(link.dish_id, link.status) for link in result.dishes] == [
+        (dish_ids[0], MenuDishLinkStatus.DISH_NOT_FOUND),
+        (dish_ids[1], MenuDishLinkStatus.LINKED),
+    ]
 
 
 @pytest.mark.asyncio
@@ -350,3 +609,125 @@ async def test_get_discounted_menus(
     assert len(all_discounted_menus) == 5
     for menu in all_discounted_menus:
         assert menu.discount > 0
+
+
+async def create_menus_with_dishes(
+    menu_controller: MenuController,
+    dish_controller: DishController,
+    faker: Faker,
+    number_menus: int,
+    dishes_per_menu: int,
+) -> None:
+    for _ in range(number_menus):
+        menu = await menu_controller.create_menu(
+            MenuCreate(
+                title=faker.unique.text(max_nb_chars=12),
+                description=faker.text(max_nb_chars=24),
+                price=random.uniform(2.99, 99.99),
+            )
+        )
+        dish_ids = []
+        for _ in range(dishes_per_menu):
+            dish = await dish_controller.create_dish(
+                DishCreate(
+                    title=faker.unique.text(max_nb_chars=12),
+                    description=faker.text(max_nb_chars=24),
+                    category=random.choice(list(Category)),
+                    ingredients=faker.text(max_nb_chars=24),
+                    price=random.uniform(0.99, 99.99),
+                    halal=random.choice([True, False]),
+                )
+            )
+            dish_ids.append(dish.id)
+        await menu_controller.add_dish_to_menu(
+            menu_id=menu.id,
+            menu_dish_links_create=MenuDishLinksCreate(
+                dish_ids=dish_ids, menu_id=menu.id
+            ),
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("number_menus", [1, 5, 25])
+async def test_get_menus_query_count_does_not_grow_with_menus(
+    menu_controller: MenuController,
+    dish_controller: DishController,
+    session: AsyncSession,
+    statements: list[str],
+    faker: Faker,
+    number_menus: int,
+) -> None:
+    # Prepare
+    await create_menus_with_dishes(
+        menu_controller, dish_controller, faker, number_menus, dishes_per_menu=3
+    )
+    session.expunge_all()
+    statements.clear()
+
+    # Act
+    menus = await menu_controller.get_menus()
+    serialized = [
+        MenuWithDishes.model_validate(menu).model_dump(mode="json") for menu in menus
+    ]
+
+    # Assert
+    assert len(serialized) == number_menus
+    assert all(len(menu["dishes"]) == 3 for menu in serialized)
+    assert len(statements) == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_price_sheet(
+    menu_controller: MenuController, dish_controller: DishController, faker: Faker
+) -> None:
+    # Prepare
+    menu = await menu_controller.create_menu(
+        MenuCreate(
+            title="A menu",
+            description=faker.text(max_nb_chars=24),
+            price=20.0,
+            discount=25.0,
+        )
+    )
+    await menu_controller.create_menu(
+        MenuCreate(title="B menu", description=faker.text(max_nb_chars=24), price=9.5)
+    )
+    dishes = [
+        await dish_controller.create_dish(
+            DishCreate(
+                title=title,
+                description=faker.text(max_nb_chars=24),
+                category=Category.PLATS,
+                ingredients=faker.text(max_nb_chars=24),
+                price=price,
+                halal=True,
+            )
+        )
+        for title, price in [("Burger", 12.0), ("Apple pie", 6.0)]
+    ]
+    await menu_controller.add_dish_to_menu(
+        menu.id,
+        MenuDishLinksCreate(dish_ids=[dish.id for dish in dishes], menu_id=menu.id),
+    )
+
+    # Act
+    rows = [
+        row async for chunk in menu_controller.stream_price_sheet() for row in chunk
+    ]
+
+    # Assert
+    assert [
+        (
+            row["menu"],
+            row["menu_price"],
+            row["discounted_price"],
+            row["dish"],
+            row["category"],
+            row["dish_price"],
+        )
+        for row in rows
+    ] == [
+        ("A menu", 20.0, 15.0, "Apple pie", Category.PLATS, 6.0),
+        ("A menu", 20.0, 15.0, "Burger", Category.PLATS, 12.0),
+        ("B menu", 9.5, 9.5, None, None, None),
+    ]
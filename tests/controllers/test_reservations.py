@@ -1,29 +1,40 @@
 import pytest
 import random
+from datetime import date, datetime, time, timedelta
 from faker import Faker
 from pydantic_extra_types.phone_numbers import PhoneNumber
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from coworld.availability import SeatingPlan
 from coworld.controllers.reservations import ReservationController
-from coworld.models.errors import ReservationNotFoundError
+from coworld.models.bulk import BulkItemStatus
+from coworld.models.errors import (
+    InvalidCursorError,
+    InvalidPhoneNumberError,
+    MissingSearchCriteriaError,
+    ReservationCapacityExceededError,
+    ReservationNotFoundError,
+)
 from coworld.models.reservations import (
     ReservationCreate,
     ReservationCategory,
     Reservation,
     ReservationUpdate,
 )
+from coworld.settings import get_settings
 
 
 @pytest.mark.asyncio
 async def test_create_reservation(
-    reservation_controller: ReservationController, session: Session, faker: Faker
+    reservation_controller: ReservationController, session: AsyncSession, faker: Faker
 ) -> None:
     # Prepare
     reservation_create = ReservationCreate(
         reservation_category=random.choice(list(ReservationCategory)),
         name=faker.name(),
         family_name=faker.name(),
-        amount_of_people=random.randint(0, 100),
+        amount_of_people=random.randint(1, 100),
         email_address=faker.email(),
         phone_number=PhoneNumber("+33611223344"),
         reservation_time=faker.date_time(),
@@ -31,8 +42,8 @@ async def test_create_reservation(
     # Act
     result = await reservation_controller.create_reservation(reservation_create)
 
-    reservation = session.exec(
-        select(Reservation).where(Reservation.id == result.id)
+    reservation = (
+        await session.exec(select(Reservation).where(Reservation.id == result.id))
     ).one()
 
     # Assert
@@ -67,6 +78,59 @@ async def test_create_reservation(
     )
 
 
+@pytest.mark.asyncio
+async def test_create_reservations(
+    reservation_controller: ReservationController,
+    session: AsyncSession,
+    statements: list[str],
+    faker: Faker,
+) -> None:
+    # Prepare
+    reservation_creates = [
+        ReservationCreate(
+            reservation_category=random.choice(list(ReservationCategory)),
+            name=faker.name(),
+            family_name=faker.name(),
+            amount_of_people=random.randint(1, 100),
+            email_address=faker.email(),
+            phone_number=PhoneNumber("+33611223344"),
+            reservation_time=faker.date_time(),
+        )
+        for _ in range(20)
+    ]
+    statements.clear()
+
+    # Act
+    result = await reservation_controller.create_reservations(reservation_creates)
+
+    # Assert
+    assert len(statements) == 1
+    assert result.created == 20
+    assert result.conflicts == 0
+    assert all(item.status == BulkItemStatus.CREATED for item in result.items)
+    reservations = {
+        reservation.id: reservation
+        for reservation in (await session.exec(select(Reservation))).all()
+    }
+    for item, reservation_create in zip(result.items, reservation_creates):
+        reservation = reservations[item.id]
+        assert reservation.name == reservation_create.name
+        assert reservation.phone_number == reservation_create.phone_number
+        assert reservation.reservation_time == reservation_create.reservation_time
+
+
+@pytest.mark.asyncio
+async def test_create_reservations_empty(
+    reservation_controller: ReservationController,
+) -> None:
+    # Act
+    result = await reservation_controller.create_reservations([])
+
+    # Assert
+    assert result.created == 0
+    assert result.items == []
+
+
 @pytest.mark.asyncio
 async def test_get_reservations(
     reservation_controller: ReservationController, faker: Faker
@@ -79,7 +143,7 @@ async def test_get_reservations(
             reservation_category=random.choice(list(ReservationCategory)),
             name=faker.name(),
             family_name=faker.name(),
-            amount_of_people=random.randint(0, 100),
+            amount_of_people=random.randint(1, 100),
             email_address=faker.email(),
             phone_number=PhoneNumber("+33611223344"),
             reservation_time=faker.date_time(),
@@ -111,6 +175,50 @@ async def test_get_reservations(
         )
 
 
+@pytest.mark.asyncio
+async def test_get_reservations_paginates_with_cursor(
+    reservation_controller: ReservationController, faker: Faker
+) -> None:
+    # Prepare
+    created_ids = []
+    for _ in range(5):
+        reservation_create = ReservationCreate(
+            reservation_category=random.choice(list(ReservationCategory)),
+            name=faker.name(),
+            family_name=faker.name(),
+            amount_of_people=random.randint(1, 100),
+            email_address=faker.email(),
+            phone_number=PhoneNumber("+33611223344"),
+            reservation_time=faker.date_time(),
+        )
+        created_reservation = await reservation_controller.create_reservation(
+            reservation_create
+        )
+        created_ids.append(created_reservation.id)
+
+    # Act
+    pages = [await reservation_controller.get_reservations(limit=2)]
+    while pages[-1].next_cursor is not None:
+        pages.append(
+            await reservation_controller.get_reservations(
+                cursor=pages[-1].next_cursor, limit=2
+            )
+        )
+
+    # Assert
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [reservation.id for page in pages for reservation in page] == created_ids
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_invalid_cursor(
+    reservation_controller: ReservationController,
+) -> None:
+    # Act & Assert
+    with pytest.raises(InvalidCursorError):
+        await reservation_controller.get_reservations(cursor="not-a-cursor")
+
+
 @pytest.mark.asyncio
 async def test_get_reservation_by_id(
     reservation_controller: ReservationController, faker: Faker
@@ -120,7 +228,7 @@ async def test_get_reservation_by_id(
         reservation_category=random.choice(list(ReservationCategory)),
         name=faker.name(),
         family_name=faker.name(),
-        amount_of_people=random.randint(0, 100),
+        amount_of_people=random.randint(1, 100),
         email_address=faker.email(),
         phone_number=PhoneNumber("+33611223344"),
         reservation_time=faker.date_time(),
@@ -168,7 +276,7 @@ async def test_update_reservation(
         reservation_category=random.choice(list(ReservationCategory)),
         name=faker.name(),
         family_name=faker.name(),
-        amount_of_people=random.randint(0, 100),
+        amount_of_people=random.randint(1, 100),
         email_address=faker.email(),
         phone_number=PhoneNumber("+33611223344"),
         reservation_time=faker.date_time(),
@@ -181,7 +289,7 @@ async def test_update_reservation(
         reservation_category=random.choice(list(ReservationCategory)),
         name=faker.name(),
         family_name=faker.name(),
-        amount_of_people=random.randint(0, 100),
+        amount_of_people=random.randint(1, 100),
         email_address=faker.email(),
         phone_number=PhoneNumber("+33611223388"),
         reservation_time=faker.date_time(),
@@ -213,7 +321,7 @@ async def test_update_reservation_not_found(
         reservation_category=random.choice(list(ReservationCategory)),
         name=faker.name(),
         family_name=faker.name(),
-        amount_of_people=random.randint(0, 100),
+        amount_of_people=random.randint(1, 100),
         email_address=faker.email(),
         phone_number=PhoneNumber("+33611223377"),
         reservation_time=faker.date_time(),
@@ -236,7 +344,7 @@ async def test_delete_reservation(
         reservation_category=random.choice(list(ReservationCategory)),
         name=faker.name(),
         family_name=faker.name(),
-        amount_of_people=random.randint(0, 100),
+        amount_of_people=random.randint(1, 100),
         email_address=faker.email(),
         phone_number=PhoneNumber("+33611223344"),
         reservation_time=faker.date_time(),
@@ -253,6 +361,38 @@ async def test_delete_reservation(
         await reservation_controller.get_reservation_by_id(new_reservation.id)
 
 
+@pytest.mark.asyncio
+async def test_update_and_delete_reservation_are_single_statements(
+    reservation_controller: ReservationController,
+    statements: list[str],
+    faker: Faker,
+) -> None:
+    # Prepare
+    new_reservation = await reservation_controller.create_reservation(
+        ReservationCreate(
+            reservation_category=random.choice(list(ReservationCategory)),
+            name=faker.name(),
+            family_name=faker.name(),
+            amount_of_people=random.randint(1, 100),
+            email_address=faker.email(),
+            phone_number=PhoneNumber("+33611223344"),
+            reservation_time=faker.date_time(),
+        )
+    )
+    statements.clear()
+
+    # Act
+    updated_reservation = await reservation_controller.update_reservation(
+        new_reservation.id, ReservationUpdate(amount_of_people=4)
+    )
+    await reservation_controller.delete_reservation(new_reservation.id)
+
+    # Assert
+    assert [statement.split()[0] for statement in statements] == ["UPDATE", "DELETE"]
+    assert updated_reservation.amount_of_people == 4
+    assert updated_reservation.name == new_reservation.name
+
+
 @pytest.mark.asyncio
 async def test_delete_reservation_not_found_error(
     reservation_controller: ReservationController, faker: Faker
@@ -263,3 +403,444 @@ async def test_delete_reservation_not_found_error(
     # Act and Assert
     with pytest.raises(ReservationNotFoundError):
         await reservation_controller.delete_reservation(nonexistent_id)
+
+
+@pytest.mark.asyncio
+async def test_stream_reservations_filters_by_time_in_chunks(
+    reservation_controller: ReservationController, faker: Faker, monkeypatch
+) -> None:
+    # Prepare
+    monkeypatch.setattr(get_settings(), "export_chunk_size", 2)
+    start = datetime(2024, 6, 1, 12, 0)
+    result = await reservation_controller.create_reservations(
+        [
+            ReservationCreate(
+                reservation_category=random.choice(list(ReservationCategory)),
+                name=faker.name(),
+                family_name=faker.name(),
+                amount_of_people=random.randint(1, 100),
+                email_address=faker.email(),
+                phone_number=PhoneNumber("+33611223344"),
+                reservation_time=start + timedelta(hours=hours),
+            )
+            for hours in [5, 0, 3, 1, 4, 2, 6]
+        ]
+    )
+
+    # Act
+    chunks = [
+        chunk
+        async for chunk in reservation_controller.stream_reservations(
+            start + timedelta(hours=1), start + timedelta(hours=6)
+        )
+    ]
+
+    # Assert
+    assert result.created == 7
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert [row["reservation_time"] for chunk in chunks for row in chunk] == [
+        start + timedelta(hours=hours) for hours in range(1, 6)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_filters_by_time_and_category(
+    reservation_controller: ReservationController, faker: Faker
+) -> None:
+    # Prepare
+    start = datetime(2024, 6, 1, 18, 0)
+    await reservation_controller.create_reservations(
+        [
+            ReservationCreate(
+                reservation_category=category,
+                name=faker.name(),
+                family_name=faker.name(),
+                amount_of_people=random.randint(1, 100),
+                email_address=faker.email(),
+                phone_number=PhoneNumber("+33611223344"),
+                reservation_time=start + timedelta(minutes=minutes),
+            )
+            for minutes, category in [
+                (90, ReservationCategory.SIMPLE),
+                (-30, ReservationCategory.SIMPLE),
+                (30, ReservationCategory.BIRTHDAY),
+                (300, ReservationCategory.SIMPLE),
+                (0, ReservationCategory.SIMPLE),
+                (60, ReservationCategory.BIRTHDAY),
+            ]
+        ]
+    )
+
+    # Act
+    pages = [
+        await reservation_controller.get_reservations(
+            limit=2,
+            reservation_time_from=start,
+            reservation_time_to=start + timedelta(hours=5),
+        )
+    ]
+    while pages[-1].next_cursor is not None:
+        pages.append(
+            await reservation_controller.get_reservations(
+                cursor=pages[-1].next_cursor,
+                limit=2,
+                reservation_time_from=start,
+                reservation_time_to=start + timedelta(hours=5),
+            )
+        )
+    birthdays = await reservation_controller.get_reservations(
+        reservation_category=ReservationCategory.BIRTHDAY
+    )
+
+    # Assert
+    assert [len(page) for page in pages] == [2, 2]
+    assert [reservation.reservation_time for page in pages for reservation in page] == [
+        start + timedelta(minutes=minutes) for minutes in [0, 30, 60, 90]
+    ]
+    assert [reservation.reservation_time for reservation in birthdays] == [
+        start + timedelta(minutes=30),
+        start + timedelta(minutes=60),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_for_day(
+    reservation_controller: ReservationController, faker: Faker
+) -> None:
+    # Prepare
+    await reservation_controller.create_reservations(
+        [
+            ReservationCreate(
+                reservation_category=category,
+                name=faker.name(),
+                family_name=faker.name(),
+                amount_of_people=random.randint(1, 100),
+                email_address=faker.email(),
+                phone_number=PhoneNumber("+33611223344"),
+                reservation_time=reservation_time,
+            )
+            for reservation_time, category in [
+                (datetime(2024, 6, 1, 20, 30), ReservationCategory.SIMPLE),
+                (datetime(2024, 6, 2, 0, 0), ReservationCategory.SIMPLE),
+                (datetime(2024, 6, 1, 0, 0), ReservationCategory.BIRTHDAY),
+                (datetime(2024, 5, 31, 23, 59), ReservationCategory.SIMPLE),
+                (datetime(2024, 6, 1, 12, 15), ReservationCategory.SIMPLE),
+            ]
+        ]
+    )
+
+    # Act
+    day = await reservation_controller.get_reservations_for_day(date(2024, 6, 1))
+    simple = await reservation_controller.get_reservations_for_day(
+        date(2024, 6, 1), ReservationCategory.SIMPLE
+    )
+
+    # Assert
+    assert [reservation.reservation_time for reservation in day] == [
+        datetime(2024, 6, 1, 0, 0),
+        datetime(2024, 6, 1, 12, 15),
+        datetime(2024, 6, 1, 20, 30),
+    ]
+    assert [reservation.reservation_time for reservation in simple] == [
+        datetime(2024, 6, 1, 12, 15),
+        datetime(2024, 6, 1, 20, 30),
+    ]
+
+
+def seated_controller(session: AsyncSession) -> ReservationController:
+    return ReservationController(
+        session,
+        SeatingPlan(
+            capacity=10,
+            slot_minutes=30,
+            seating_minutes=120,
+            opening_time=time(18, 0),
+            closing_time=time(22, 0),
+        ),
+    )
+
+
+def reservation_at(
+    faker: Faker, reservation_time: datetime, amount_of_people: int
+) -> ReservationCreate:
+    return ReservationCreate(
+        reservation_category=random.choice(list(ReservationCategory)),
+        name=faker.name(),
+        family_name=faker.name(),
+        amount_of_people=amount_of_people,
+        email_address=faker.email(),
+        phone_number=PhoneNumber("+33611223344"),
+        reservation_time=reservation_time,
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_reservation_rejects_when_capacity_exceeded(
+    reservation_controller: ReservationController, session: AsyncSession, faker: Faker
+) -> None:
+    # Prepare
+    await reservation_controller.create_reservation(
+        reservation_at(faker, datetime(2024, 6, 1, 20, 0), 6)
+    )
+    controller = seated_controller(session)
+    await controller.rebuild_seating_slots()
+
+    # Act
+    with pytest.raises(ReservationCapacityExceededError):
+        await controller.create_reservation(
+            reservation_at(faker, datetime(2024, 6, 1, 21, 30), 5)
+        )
+    created = await controller.create_reservation(
+        reservation_at(faker, datetime(2024, 6, 1, 21, 30), 4)
+    )
+    late = await controller.create_reservation(
+        reservation_at(faker, datetime(2024, 6, 1, 22, 0), 6)
+    )
+
+    # Assert
+    assert created.amount_of_people == 4
+    assert late.amount_of_people == 6
+    assert len(await reservation_controller.get_reservations()) == 3
+
+
+@pytest.mark.asyncio
+async def test_create_reservations_reports_capacity_conflicts(
+    session: AsyncSession, faker: Faker
+) -> None:
+    # Prepare
+    controller = seated_controller(session)
+
+    # Act
+    result = await controller.create_reservations(
+        [
+            reservation_at(faker, datetime(2024, 6, 1, 20, 0), 6),
+            reservation_at(faker, datetime(2024, 6, 1, 21, 0), 6),
+            reservation_at(faker, datetime(2024, 6, 1, 19, 0), 4),
+        ]
+    )
+
+    # Assert
+    assert (result.created, result.conflicts) == (2, 1)
+    assert [item.status for item in result.items] == [
+        BulkItemStatus.CREATED,
+        BulkItemStatus.CONFLICT,
+        BulkItemStatus.CREATED,
+    ]
+    assert result.items[1].error.name == "ReservationCapacityExceededError"
+    assert len(await controller.get_reservations()) == 2
+
+
+@pytest.mark.asyncio
+async def test_update_and_delete_reservation_release_capacity(
+    session: AsyncSession, faker: Faker
+) -> None:
+    # Prepare
+    controller = seated_controller(session)
+    first = await controller.create_reservation(
+        reservation_at(faker, datetime(2024, 6, 1, 18, 0), 5)
+    )
+    second = await controller.create_reservation(
+        reservation_at(faker, datetime(2024, 6, 1, 21, 0), 5)
+    )
+
+    first_id, second_id = first.id, second.id
+
+    # Act
+    grown = await controller.update_reservation(
+        first_id, ReservationUpdate(amount_of_people=6)
+    )
+    grown_amount = grown.amount_of_people
+    with pytest.raises(ReservationCapacityExceededError):
+        await controller.update_reservation(
+            second_id, ReservationUpdate(reservation_time=datetime(2024, 6, 1, 19, 0))
+        )
+    await controller.delete_reservation(first_id)
+    moved = await controller.update_reservation(
+        second_id, ReservationUpdate(reservation_time=datetime(2024, 6, 1, 19, 0))
+    )
+    availability = await controller.get_availability(date(2024, 6, 1))
+
+    # Assert
+    assert grown_amount == 6
+    assert moved.reservation_time == datetime(2024, 6, 1, 19, 0)
+    assert [slot.booked_seats for slot in availability.slots] == (
+        [0] * 2 + [5] * 4 + [0] * 2
+    )
+
+
+@pytest.mark.asyncio
+async def test_seating_slots_are_locked_in_time_order_before_any_change(
+    session: AsyncSession, faker: Faker, monkeypatch
+) -> None:
+    # Prepare
+    controller = seated_controller(session)
+    calls = []
+    lock_seating_slots = ReservationController.lock_seating_slots
+    release_seats = ReservationController.release_seats
+    reserve_seats = ReservationController.reserve_seats
+
+    async def record_lock(self, reservations):
+        calls.append(
+            (
+                "lock",
+                sorted(
+                    {
+                        slot_time
+                        for reservation in reservations
+                        for slot_time in self.seating_plan.slot_times(
+                            reservation.reservation_time
+                        )
+                    }
+                ),
+            )
+        )
+        await lock_seating_slots(self, reservations)
+
+    async def record_release(self, reservation, slot_times=None):
+        calls.append(("release", reservation.reservation_time))
+        await release_seats(self, reservation, slot_times)
+
+    async def record_reserve(self, reservation):
+        calls.append(("reserve", reservation.reservation_time))
+        return await reserve_seats(self, reservation)
+
+    monkeypatch.setattr(ReservationController, "lock_seating_slots", record_lock)
+    monkeypatch.setattr(ReservationController, "release_seats", record_release)
+    monkeypatch.setattr(ReservationController, "reserve_seats", record_reserve)
+
+    # Act
+    result = await controller.create_reservations(
+        [
+            reservation_at(faker, datetime(2024, 6, 1, 21, 0), 2),
+            reservation_at(faker, datetime(2024, 6, 1, 19, 0), 2),
+        ]
+    )
+    bulk_calls = calls.copy()
+    calls.clear()
+    await controller.update_reservation(
+        result.items[0].id,
+        ReservationUpdate(reservation_time=datetime(2024, 6, 1, 18, 0)),
+    )
+
+    # Assert
+    assert bulk_calls == [
+        (
+            "lock",
+            [
+                datetime(2024, 6, 1, 19, 0) + timedelta(minutes=30 * slot)
+                for slot in range(8)
+            ],
+        ),
+        ("reserve", datetime(2024, 6, 1, 21, 0)),
+        ("reserve", datetime(2024, 6, 1, 19, 0)),
+    ]
+    assert calls == [
+        (
+            "lock",
+            [
+                datetime(2024, 6, 1, 18, 0) + timedelta(minutes=30 * slot)
+                for slot in range(4)
+            ]
+            + [
+                datetime(2024, 6, 1, 21, 0) + timedelta(minutes=30 * slot)
+                for slot in range(4)
+            ],
+        ),
+        ("release", datetime(2024, 6, 1, 21, 0)),
+        ("reserve", datetime(2024, 6, 1, 18, 0)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_availability_counts_rebuilt_seating_slots(
+    reservation_controller: ReservationController, session: AsyncSession, faker: Faker
+) -> None:
+    # Prepare
+    await reservation_controller.create_reservations(
+        [
+            reservation_at(faker, datetime(2024, 6, 1, 20, 0), 6),
+            reservation_at(faker, datetime(2024, 5, 31, 23, 0), 2),
+            reservation_at(faker, datetime(2024, 6, 2, 20, 0), 9),
+        ]
+    )
+    controller = seated_controller(session)
+
+    # Act
+    await controller.rebuild_seating_slots()
+    availability = await controller.get_availability(date(2024, 6, 1))
+
+    # Assert
+    assert availability.day == date(2024, 6, 1)
+    assert [slot.booked_seats for slot in availability.slots] == [0] * 4 + [6] * 4
+    assert [slot.available_seats for slot in availability.slots] == [10] + [4] * 7
+
+
+@pytest.mark.asyncio
+async def test_search_reservations_returns_upcoming_bookings_first(
+    reservation_controller: ReservationController, faker: Faker
+) -> None:
+    # Prepare
+    now = datetime.now()
+    reservation_times = [
+        now - timedelta(days=2),
+        now + timedelta(days=3),
+        now - timedelta(days=1),
+        now + timedelta(days=1),
+    ]
+    for reservation_time in reservation_times:
+        reservation_create = reservation_at(faker, reservation_time, 2)
+        reservation_create.email_address = "cowcow@coworld.fr"
+        await reservation_controller.create_reservation(reservation_create)
+    await reservation_controller.create_reservation(
+        reservation_at(faker, now + timedelta(hours=1), 2)
+    )
+
+    # Act
+    reservations = await reservation_controller.search_reservations(
+        email_address="cowcow@CoWorld.fr"
+    )
+    limited = await reservation_controller.search_reservations(
+        email_address="cowcow@coworld.fr", limit=2
+    )
+
+    # Assert
+    expected = [reservation_times[index] for index in [3, 1, 2, 0]]
+    assert [reservation.reservation_time for reservation in reservations] == expected
+    assert [reservation.reservation_time for reservation in limited] == expected[:2]
+
+
+@pytest.mark.asyncio
+async def test_search_reservations_by_phone_number(
+    reservation_controller: ReservationController, faker: Faker
+) -> None:
+    # Prepare
+    current = reservation_at(faker, datetime(2024, 6, 1, 20, 0), 2)
+    current.phone_number = PhoneNumber("+33611223344")
+    legacy = reservation_at(faker, datetime(2024, 6, 2, 20, 0), 2)
+    legacy.phone_number = PhoneNumber("tel:+33-6-11-22-33-44")
+    other = reservation_at(faker, datetime(2024, 6, 3, 20, 0), 2)
+    other.phone_number = PhoneNumber("+33699887766")
+    for reservation_create in [current, legacy, other]:
+        await reservation_controller.create_reservation(reservation_create)
+
+    # Act
+    reservations = await reservation_controller.search_reservations(
+        phone_number="+33 6 11 22 33 44"
+    )
+
+    # Assert
+    assert [reservation.reservation_time for reservation in reservations] == [
+        datetime(2024, 6, 2, 20, 0),
+        datetime(2024, 6, 1, 20, 0),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_search_reservations_invalid_criteria(
+    reservation_controller: ReservationController,
+) -> None:
+    # Act & Assert
+    with pytest.raises(MissingSearchCriteriaError):
+        await reservation_controller.search_reservations()
+    with pytest.raises(InvalidPhoneNumberError):
+        await reservation_controller.search_reservations(phone_number="0611223344")
@@ -5,11 +5,19 @@ import pytest
 from fastapi import FastAPI
 from starlette.testclient import TestClient
 
+from coworld.cache import MemoryCacheBackend
 from coworld.controllers.dishes import DishController
 from coworld.dependencies import get_dish_controller
+from coworld.models.bulk import (
+    BulkCreateResult,
+    BulkItemError,
+    BulkItemResult,
+    BulkItemStatus,
+)
 from coworld.models.dishes import Category
 from coworld.models.errors import DishNotFoundError, DishAlreadyExistsError
 from coworld.models.models import Dish
+from coworld.pagination import Page
 
 
 @pytest.mark.asyncio
@@ -100,7 +108,7 @@ async def test_get_dishes(
     ]
 
     def _mock_get_dishes():
-        dish_controller.get_dishes = AsyncMock(return_value=mock_dishes)
+        dish_controller.get_dishes = AsyncMock(return_value=Page(mock_dishes))
         return dish_controller
 
     app.dependency_overrides[get_dish_controller] = _mock_get_dishes
@@ -434,3 +442,118 @@ async def test_get_dishes_by_category(
     ]
 
     assert_dishes_equal(response_data, expected_data)
+
+
+@pytest.mark.asyncio
+async def test_create_dishes(
+    dish_controller: DishController, app: FastAPI, client: TestClient
+):
+    created_id = uuid.uuid4()
+    dish_data = {
+        "title": "Pizza",
+        "description": "Margherita",
+        "category": "PLATS",
+        "ingredients": "Tomato, mozzarella",
+        "price": 12.5,
+        "halal": True,
+    }
+    conflict = DishAlreadyExistsError(title="Pizza")
+
+    def _mock_create_dishes():
+        dish_controller.create_dishes = AsyncMock(
+            return_value=BulkCreateResult(
+                created=1,
+                conflicts=1,
+                items=[
+                    BulkItemResult(
+                        index=0, status=BulkItemStatus.CREATED, id=created_id
+                    ),
+                    BulkItemResult(
+                        index=1,
+                        status=BulkItemStatus.CONFLICT,
+                        error=BulkItemError(
+                            name=conflict.name,
+                            message=conflict.message,
+                            status_code=conflict.status_code,
+                        ),
+                    ),
+                ],
+            )
+        )
+        return dish_controller
+
+    app.dependency_overrides[get_dish_controller] = _mock_create_dishes
+
+    create_dishes_response = client.post("/dishes/bulk", json=[dish_data, dish_data])
+    assert create_dishes_response.status_code == 200
+    assert create_dishes_response.json() == {
+        "created": 1,
+        "conflicts": 1,
+        "items": [
+            {"index": 0, "status": "CREATED", "id": str(created_id), "error": None},
+            {
+                "index": 1,
+                "status": "CONFLICT",
+                "id": None,
+                "error": {
+                    "name": "DishAlreadyExistsError",
+                    "message": conflict.message,
+                    "status_code": 409,
+                },
+            },
+        ],
+    }
+    assert len(dish_controller.create_dishes.await_args.args[0]) == 2
+
+
+@pytest.mark.asyncio
+async def test_create_dishes_rejects_invalid_item(
+    dish_controller: DishController, app: FastAPI, client: TestClient
+):
+    def _mock_create_dishes():
+        dish_controller.create_dishes = AsyncMock()
+        return dish_controller
+
+    app.dependency_overrides[get_dish_controller] = _mock_create_dishes
+
+    create_dishes_response = client.post("/dishes/bulk", json=[{"title": "Pizza"}])
+    assert create_dishes_response.status_code == 422
+    dish_controller.create_dishes.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_get_dishes_returns_not_modified_for_matching_etag(
+    dish_controller: DishController, app: FastAPI, client: TestClient
+):
+    dish_controller.cache = MemoryCacheBackend(max_entries=10, ttl_seconds=60)
+    dish_controller.get_dishes = AsyncMock(
+        return_value=Page(
+            [
+                Dish(
+                    id=uuid.uuid4(),
+                    created_at=datetime(2020, 1, 1),
+                    category=Category("PLATS"),
+                    title="Amazing Cow",
+                    description="The Amazing Cow burger, juicy and tasty.",
+                    ingredients="Meat, Salad, Tomato, Cheese",
+                    price=6.99,
+                    halal=False,
+                )
+            ]
+        )
+    )
+    app.dependency_overrides[get_dish_controller] = lambda: dish_controller
+
+    get_dishes_response = client.get("/dishes")
+    etag = get_dishes_response.headers["etag"]
+    not_modified_response = client.get("/dishes", headers={"If-None-Match": etag})
+    modified_response = client.get("/dishes", headers={"If-None-Match": '"stale"'})
+
+    assert get_dishes_response.status_code == 200
+    assert get_dishes_response.headers["cache-control"] == "no-cache"
+    assert not_modified_response.status_code == 304
+    assert not_modified_response.content == b""
+    assert not_modified_response.headers["etag"] == etag
+    assert modified_response.status_code == 200
+    assert modified_response.content == get_dishes_response.content
+    assert dish_controller.get_dishes.await_count == 1
@@ -1,15 +1,26 @@
+import io
 import uuid
 from datetime import datetime
+from pathlib import Path
 from unittest.mock import AsyncMock
 
 import pytest
 from fastapi import FastAPI
+from openpyxl import load_workbook
 from starlette.testclient import TestClient
 
+from coworld.api import create_app
+from coworld.cache import MENUS_TAG, MemoryCacheBackend
 from coworld.controllers.menus import MenuController
 from coworld.dependencies import get_menu_controller
 from coworld.models.errors import MenuNotFoundError, MenuAlreadyExistsError
+from coworld.models.menus_dishes_links import (
+    MenuDishLinkResult,
+    MenuDishLinksResult,
+    MenuDishLinkStatus,
+)
 from coworld.models.models import Menu
+from coworld.pagination import Page
 
 
 @pytest.mark.asyncio
@@ -93,7 +104,7 @@ async def test_get_menus(
     ]
 
     def _mock_get_menus():
-        menu_controller.get_menus = AsyncMock(return_value=mock_menus)
+        menu_controller.get_menus = AsyncMock(return_value=Page(mock_menus))
         return menu_controller
 
     app.dependency_overrides[get_menu_controller] = _mock_get_menus
@@ -282,3 +293,149 @@ async def test_delete_menu_not_found_error(
     app.dependency_overrides[get_menu_controller] = _mock_delete_menu
     delete_menu_response = client.delete(f"/menus/{_id}")
     assert delete_menu_response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_add_dish_to_menu(
+    menu_controller: MenuController, app: FastAPI, client: TestClient
+):
+    _id = uuid.uuid4()
+    linked_dish_id = uuid.uuid4()
+    missing_dish_id = uuid.uuid4()
+
+    def _mock_add_dish_to_menu():
+        menu_controller.add_dish_to_menu = AsyncMock(
+            return_value=MenuDishLinksResult(
+                menu_id=_id,
+                dishes=[
+                    MenuDishLinkResult(
+                        dish_id=linked_dish_id, status=MenuDishLinkStatus.LINKED
+                    ),
+                    MenuDishLinkResult(
+                        dish_id=missing_dish_id,
+                        status=MenuDishLinkStatus.DISH_NOT_FOUND,
+                    ),
+                ],
+            )
+        )
+        return menu_controller
+
+    app.dependency_overrides[get_menu_controller] = _mock_add_dish_to_menu
+    add_dish_to_menu_response = client.patch(
+        f"/menus/{_id}/link_dish",
+        json={
+            "menu_id": str(_id),
+            "dish_ids": [str(linked_dish_id), str(missing_dish_id)],
+        },
+    )
+    assert add_dish_to_menu_response.status_code == 200
+    assert add_dish_to_menu_response.json() == {
+        "menu_id": str(_id),
+        "dishes": [
+            {"dish_id": str(linked_dish_id), "status": "LINKED"},
+            {"dish_id": str(missing_dish_id), "status": "DISH_NOT_FOUND"},
+        ],
+    }
+
+
+def mock_menus(count: int) -> list[Menu]:
+    return [
+        Menu(
+            id=uuid.uuid4(),
+            created_at=datetime(2020, 1, 1),
+            title=f"Amazing Cow {index}",
+            description="The Amazing Cow menu, juicy and tasty.",
+            price=6.99,
+            discount=0.0,
+        )
+        for index in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_menus_serves_encoded_response_until_invalidated(
+    menu_controller: MenuController, app: FastAPI, client: TestClient
+):
+    cache = MemoryCacheBackend(max_entries=10, ttl_seconds=60)
+    menu_controller.cache = cache
+    menu_controller.get_menus = AsyncMock(
+        return_value=Page(mock_menus(2), next_cursor="cursor")
+    )
+    app.dependency_overrides[get_menu_controller] = lambda: menu_controller
+
+    first_response = client.get("/menus")
+    second_response = client.get("/menus")
+    await cache.invalidate(MENUS_TAG)
+    third_response = client.get("/menus")
+
+    assert first_response.content == second_response.content
+    assert second_response.headers["X-Next-Cursor"] == "cursor"
+    assert second_response.headers["content-type"] == "application/json"
+    assert len(second_response.json()) == 2
+    assert menu_controller.get_menus.await_count == 2
+    assert third_response.content == first_response.content
+
+
+@pytest.mark.asyncio
+async def test_get_menus_serves_pre_compressed_response(
+    menu_controller: MenuController, app: FastAPI, client: TestClient
+):
+    menus = mock_menus(20)
+    menu_controller.get_menus = AsyncMock(return_value=Page(menus))
+    app.dependency_overrides[get_menu_controller] = lambda: menu_controller
+
+    gzip_response = client.get("/menus", headers={"Accept-Encoding": "gzip"})
+    identity_response = client.get("/menus", headers={"Accept-Encoding": "identity"})
+
+    assert gzip_response.headers["content-encoding"] == "gzip"
+    assert gzip_response.headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in identity_response.headers
+    assert gzip_response.headers["etag"] != identity_response.headers["etag"]
+    assert gzip_response.json() == identity_response.json()
+    assert [menu["id"] for menu in gzip_response.json()] == [
+        str(menu.id) for menu in menus
+    ]
+
+
+def test_export_price_sheet_xlsx(database_path: Path):
+    with TestClient(create_app()) as client:
+        menu = client.post(
+            "/menus/",
+            json={
+                "title": "Amazing Cow",
+                "description": "The Amazing Cow menu, juicy and tasty.",
+                "price": 10.0,
+                "discount": 10.0,
+            },
+        ).json()
+        dish = client.post(
+            "/dishes/",
+            json={
+                "category": "PLATS",
+                "title": "Amazing Burger",
+                "description": "The Amazing Cow burger, juicy and tasty.",
+                "ingredients": "Meat, Salad, Tomato, Cheese",
+                "price": 6.99,
+                "halal": False,
+            },
+        ).json()
+        client.patch(
+            f"/menus/{menu['id']}/link_dish",
+            json={"menu_id": menu["id"], "dish_ids": [dish["id"]]},
+        )
+        export_response = client.get("/menus/export.xlsx")
+
+    assert export_response.status_code == 200
+    sheet = load_workbook(io.BytesIO(export_response.content))["Menus"]
+    assert list(sheet.values) == [
+        (
+            "menu",
+            "menu_price",
+            "discount",
+            "discounted_price",
+            "dish",
+            "category",
+            "dish_price",
+        ),
+        ("Amazing Cow", 10, 10, 9, "Amazing Burger", "PLATS", 6.99),
+    ]
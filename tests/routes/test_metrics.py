@@ -0,0 +1,58 @@
+import pytest
+from starlette.testclient import TestClient
+
+
+@pytest.mark.asyncio
+async def test_get_database_metrics(client: TestClient):
+    get_database_metrics_response = client.get("/metrics/database")
+
+    assert get_database_metrics_response.status_code == 200
+    assert get_database_metrics_response.json().keys() >= {
+        "pool_class",
+        "checkouts",
+        "checkins",
+        "connections_created",
+        "checkout_timeouts",
+        "checkout_wait_avg_ms",
+        "checkout_wait_max_ms",
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_cache_metrics(client: TestClient):
+    get_cache_metrics_response = client.get("/metrics/cache")
+
+    assert get_cache_metrics_response.status_code == 200
+    assert get_cache_metrics_response.headers["cache-control"] == "no-store"
+    assert get_cache_metrics_response.json() == {
+        "enabled": True,
+        "backend": "memory",
+        "entries": 0,
+        "max_entries": 1024,
+        "ttl_seconds": 60.0,
+        "hits": 0,
+        "misses": 0,
+        "hit_ratio": 0.0,
+        "evictions": 0,
+        "expirations": 0,
+        "invalidations": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_validation_metrics(client: TestClient):
+    get_validation_metrics_response = client.get("/metrics/validation")
+
+    assert get_validation_metrics_response.status_code == 200
+    assert get_validation_metrics_response.headers["cache-control"] == "no-store"
+    assert [
+        statistics["name"] for statistics in get_validation_metrics_response.json()
+    ] == ["phone_number", "email_address"]
+    assert get_validation_metrics_response.json()[0].keys() == {
+        "name",
+        "entries",
+        "max_entries",
+        "hits",
+        "misses",
+        "hit_ratio",
+    }
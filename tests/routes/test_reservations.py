@@ -1,16 +1,24 @@
+import csv
+import io
+import json
 import uuid
 from datetime import datetime
+from pathlib import Path
 from unittest.mock import AsyncMock
 
 import pytest
 from fastapi import FastAPI
+from openpyxl import load_workbook
 from pydantic_extra_types.phone_numbers import PhoneNumber
 from starlette.testclient import TestClient
 
+from coworld.api import create_app
 from coworld.controllers.reservations import ReservationController
 from coworld.dependencies import get_reservation_controller
-from coworld.models.errors import ReservationNotFoundError
+from coworld.models.bulk import BulkCreateResult, BulkItemResult, BulkItemStatus
+from coworld.models.errors import InvalidCursorError, ReservationNotFoundError
 from coworld.models.reservations import Reservation, ReservationCategory
+from coworld.pagination import NEXT_CURSOR_HEADER, Page
 
 
 @pytest.mark.asyncio
@@ -38,6 +46,11 @@ async def test_get_reservation_by_id(
     app.dependency_overrides[get_reservation_controller] = _mock_get_reservation_by_id
 
     get_reservation_by_id_response = client.get(f"/reservations/{_id}")
+    not_modified_response = client.get(
+        f"/reservations/{_id}",
+        headers={"If-None-Match": get_reservation_by_id_response.headers["etag"]},
+    )
+    assert not_modified_response.status_code == 304
     assert get_reservation_by_id_response.status_code == 200
     assert get_reservation_by_id_response.json() == {
         "id": str(_id),
@@ -106,7 +119,7 @@ async def test_get_reservations(
 
     def _mock_get_reservations():
         reservation_controller.get_reservations = AsyncMock(
-            return_value=mock_reservations
+            return_value=Page(mock_reservations)
         )
         return reservation_controller
 
@@ -296,3 +309,338 @@ async def test_delete_reservation_not_found_error(
     app.dependency_overrides[get_reservation_controller] = _mock_delete_reservation
     delete_reservation_response = client.delete(f"/reservations/{_id}")
     assert delete_reservation_response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_sets_next_cursor_header(
+    reservation_controller: ReservationController, app: FastAPI, client: TestClient
+):
+    def _mock_get_reservations():
+        reservation_controller.get_reservations = AsyncMock(
+            return_value=Page([], next_cursor="next-page")
+        )
+        return reservation_controller
+
+    app.dependency_overrides[get_reservation_controller] = _mock_get_reservations
+
+    get_reservations_response = client.get(
+        "/reservations", params={"cursor": "this-page", "limit": 10}
+    )
+    assert get_reservations_response.status_code == 200
+    assert get_reservations_response.headers[NEXT_CURSOR_HEADER] == "next-page"
+    reservation_controller.get_reservations.assert_awaited_once_with(
+        "this-page", 10, None, None, None
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_raise_invalid_cursor_error(
+    reservation_controller: ReservationController, app: FastAPI, client: TestClient
+):
+    def _mock_get_reservations():
+        reservation_controller.get_reservations = AsyncMock(
+            side_effect=InvalidCursorError(cursor="bad")
+        )
+        return reservation_controller
+
+    app.dependency_overrides[get_reservation_controller] = _mock_get_reservations
+
+    get_reservations_response = client.get("/reservations", params={"cursor": "bad"})
+    assert get_reservations_response.status_code == 400
+    assert get_reservations_response.json() == {
+        "message": "Cursor: bad is not a valid pagination cursor",
+        "name": "InvalidCursorError",
+        "status_code": 400,
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_reservations(
+    reservation_controller: ReservationController, app: FastAPI, client: TestClient
+):
+    created_id = uuid.uuid4()
+    reservation_data = {
+        "reservation_category": "SIMPLE",
+        "name": "aaaaaa",
+        "family_name": "vvvvvv",
+        "amount_of_people": 6,
+        "email_address": "vvvvv@admin.com",
+        "reservation_time": "2020-03-03T20:30:00",
+        "phone_number": "+33633445566",
+    }
+
+    def _mock_create_reservations():
+        reservation_controller.create_reservations = AsyncMock(
+            return_value=BulkCreateResult(
+                created=1,
+                conflicts=0,
+                items=[
+                    BulkItemResult(
+                        index=0, status=BulkItemStatus.CREATED, id=created_id
+                    )
+                ],
+            )
+        )
+        return reservation_controller
+
+    app.dependency_overrides[get_reservation_controller] = _mock_create_reservations
+
+    create_reservations_response = client.post(
+        "/reservations/bulk", json=[reservation_data]
+    )
+    assert create_reservations_response.status_code == 200
+    assert create_reservations_response.json() == {
+        "created": 1,
+        "conflicts": 0,
+        "items": [
+            {"index": 0, "status": "CREATED", "id": str(created_id), "error": None}
+        ],
+    }
+
+
+def test_export_reservations_ndjson(database_path: Path):
+    reservations = [
+        {
+            "reservation_category": "SIMPLE",
+            "name": "aaaaaa",
+            "family_name": "vvvvvv",
+            "amount_of_people": 2,
+            "email_address": "vvvvv@admin.com",
+            "reservation_time": f"2024-06-0{day}T20:30:00",
+            "phone_number": "+33633445566",
+        }
+        for day in [3, 1, 2, 4]
+    ]
+
+    with TestClient(create_app()) as client:
+        created = [
+            client.post("/reservations/", json=reservation).json()
+            for reservation in reservations
+        ]
+        export_response = client.get(
+            "/reservations/export.ndjson",
+            params={"from": "2024-06-02T00:00:00", "to": "2024-06-04T00:00:00"},
+        )
+
+    assert export_response.status_code == 200
+    assert export_response.headers["content-type"] == "application/x-ndjson"
+    assert export_response.headers["content-disposition"] == (
+        'attachment; filename="reservations.ndjson"'
+    )
+    lines = export_response.text.splitlines()
+    assert [json.loads(line) for line in lines] == [created[2], created[0]]
+
+
+def test_export_reservations_csv_and_xlsx(database_path: Path):
+    reservation = {
+        "reservation_category": "BIRTHDAY",
+        "name": "aaaaaa",
+        "family_name": "vvvvvv",
+        "amount_of_people": 6,
+        "email_address": "vvvvv@admin.com",
+        "reservation_time": "2024-06-01T20:30:00",
+        "phone_number": "+33633445566",
+    }
+
+    with TestClient(create_app()) as client:
+        created = client.post("/reservations/", json=reservation).json()
+        csv_response = client.get("/reservations/export.csv")
+        xlsx_response = client.get("/reservations/export.xlsx")
+
+    assert csv_response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert list(csv.DictReader(io.StringIO(csv_response.text))) == [
+        {key: str(value) for key, value in created.items()}
+    ]
+    assert xlsx_response.headers["content-disposition"] == (
+        'attachment; filename="reservations.xlsx"'
+    )
+    header, row = load_workbook(io.BytesIO(xlsx_response.content))[
+        "Reservations"
+    ].values
+    assert dict(zip(header, row))["id"] == created["id"]
+    assert dict(zip(header, row))["reservation_time"] == datetime(2024, 6, 1, 20, 30)
+
+
+def test_get_reservations_by_time_range_and_day(database_path: Path):
+    reservations = [
+        {
+            "reservation_category": category,
+            "name": "aaaaaa",
+            "family_name": "vvvvvv",
+            "amount_of_people": 2,
+            "email_address": "vvvvv@admin.com",
+            "reservation_time": reservation_time,
+            "phone_number": "+33633445566",
+        }
+        for category, reservation_time in [
+            ("SIMPLE", "2024-06-01T21:00:00"),
+            ("BIRTHDAY", "2024-06-01T19:30:00"),
+            ("SIMPLE", "2024-06-02T12:00:00"),
+            ("SIMPLE", "2024-06-01T12:00:00"),
+        ]
+    ]
+
+    with TestClient(create_app()) as client:
+        created = [
+            client.post("/reservations/", json=reservation).json()
+            for reservation in reservations
+        ]
+        tonight_response = client.get(
+            "/reservations/",
+            params={"from": "2024-06-01T18:00:00", "to": "2024-06-02T00:00:00"},
+        )
+        day_response = client.get("/reservations/day/2024-06-01")
+        birthdays_response = client.get(
+            "/reservations/day/2024-06-01", params={"category": "BIRTHDAY"}
+        )
+
+    assert tonight_response.status_code == 200
+    assert tonight_response.json() == [created[1], created[0]]
+    assert day_response.json() == [created[3], created[1], created[0]]
+    assert birthdays_response.json() == [created[1]]
+
+
+def test_availability_and_capacity_exceeded(database_path: Path, monkeypatch):
+    monkeypatch.setenv("COWORLD_AVAILABILITY_CAPACITY", "10")
+    reservation = {
+        "reservation_category": "SIMPLE",
+        "name": "aaaaaa",
+        "family_name": "vvvvvv",
+        "amount_of_people": 6,
+        "email_address": "vvvvv@admin.com",
+        "reservation_time": "2024-06-01T20:00:00",
+        "phone_number": "+33633445566",
+    }
+
+    with TestClient(create_app()) as client:
+        created_response = client.post("/reservations/", json=reservation)
+        overbooked_response = client.post(
+            "/reservations/",
+            json={**reservation, "reservation_time": "2024-06-01T21:00:00"},
+        )
+        availability_response = client.get(
+            "/reservations/availability", params={"date": "2024-06-01"}
+        )
+
+    assert created_response.status_code == 201
+    assert overbooked_response.status_code == 409
+    assert overbooked_response.json() == {
+        "message": "Not enough seats for 6 people at 2024-06-01T21:00:00",
+        "name": "ReservationCapacityExceededError",
+        "status_code": 409,
+    }
+    availability = availability_response.json()
+    assert availability["capacity"] == 10
+    slots = {slot["time"]: slot for slot in availability["slots"]}
+    assert slots["2024-06-01T18:00:00"] == {
+        "time": "2024-06-01T18:00:00",
+        "booked_seats": 0,
+        "available_seats": 10,
+    }
+    assert slots["2024-06-01T20:00:00"]["booked_seats"] == 6
+    assert slots["2024-06-01T21:00:00"]["available_seats"] == 4
+
+
+def test_search_reservations(database_path: Path):
+    reservation = {
+        "reservation_category": "SIMPLE",
+        "name": "aaaaaa",
+        "family_name": "vvvvvv",
+        "amount_of_people": 2,
+        "email_address": "vvvvv@admin.com",
+        "reservation_time": "2024-06-01T20:30:00",
+        "phone_number": "+33 6 33 44 55 66",
+    }
+
+    with TestClient(create_app()) as client:
+        created = client.post("/reservations/", json=reservation).json()
+        client.post(
+            "/reservations/",
+            json={**reservation, "email_address": "other@admin.com"},
+        )
+        by_email = client.get(
+            "/reservations/search", params={"email": "vvvvv@admin.com"}
+        )
+        by_phone = client.get("/reservations/search", params={"phone": "+33633445566"})
+        invalid = client.get("/reservations/search", params={"phone": "not a phone"})
+        missing = client.get("/reservations/search")
+
+    assert created["phone_number"] == "+33633445566"
+    assert by_email.json() == [created]
+    assert len(by_phone.json()) == 2
+    assert invalid.status_code == 400
+    assert invalid.json()["name"] == "InvalidPhoneNumberError"
+    assert missing.status_code == 400
+    assert missing.json() == {
+        "message": "Provide an email address or a phone number to search",
+        "name": "MissingSearchCriteriaError",
+        "status_code": 400,
+    }
+
+
+@pytest.mark.parametrize("amount_of_people", [0, -100])
+def test_non_positive_party_is_rejected(
+    database_path: Path, monkeypatch, amount_of_people: int
+):
+    reserve_seats = AsyncMock(return_value=True)
+    monkeypatch.setattr(ReservationController, "reserve_seats", reserve_seats)
+    reservation = {
+        "reservation_category": "SIMPLE",
+        "name": "aaaaaa",
+        "family_name": "vvvvvv",
+        "amount_of_people": amount_of_people,
+        "email_address": "vvvvv@admin.com",
+        "reservation_time": "2024-06-01T20:00:00",
+        "phone_number": "+33633445566",
+    }
+
+    with TestClient(create_app()) as client:
+        create_response = client.post("/reservations/", json=reservation)
+        bulk_response = client.post("/reservations/bulk", json=[reservation])
+        update_response = client.patch(
+            f"/reservations/{uuid.uuid4()}",
+            json={"amount_of_people": amount_of_people},
+        )
+
+    assert create_response.status_code == 422
+    assert bulk_response.status_code == 422
+    assert update_response.status_code == 422
+    reserve_seats.assert_not_called()
+
+
+def test_offset_aware_reservation_time_is_stored_in_utc(database_path: Path):
+    reservation = {
+        "reservation_category": "SIMPLE",
+        "name": "aaaaaa",
+        "family_name": "vvvvvv",
+        "amount_of_people": 6,
+        "email_address": "vvvvv@admin.com",
+        "reservation_time": "2030-01-01T19:00:00Z",
+        "phone_number": "+33633445566",
+    }
+
+    with TestClient(create_app()) as client:
+        created_response = client.post("/reservations/", json=reservation)
+        updated_response = client.patch(
+            f"/reservations/{created_response.json()['id']}",
+            json={"reservation_time": "2030-01-01T21:00:00+02:00"},
+        )
+        listed_response = client.get(
+            "/reservations/", params={"from": "2030-01-01T20:00:00+01:00"}
+        )
+        availability_response = client.get(
+            "/reservations/availability", params={"date": "2030-01-01"}
+        )
+
+    assert created_response.status_code == 201
+    assert created_response.json()["reservation_time"] == "2030-01-01T19:00:00"
+    assert updated_response.status_code == 200
+    assert updated_response.json()["reservation_time"] == "2030-01-01T19:00:00"
+    assert [item["id"] for item in listed_response.json()] == [
+        created_response.json()["id"]
+    ]
+    slots = {
+        slot["time"]: slot["booked_seats"]
+        for slot in availability_response.json()["slots"]
+    }
+    assert slots["2030-01-01T19:00:00"] == 6
@@ -0,0 +1,161 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from pydantic import TypeAdapter
+from pydantic_extra_types.phone_numbers import PhoneNumber
+
+from coworld.models.dishes import Category
+from coworld.models.models import (
+    Dish,
+    DishInMenu,
+    DishRead,
+    Menu,
+    MenuRead,
+    MenuWithDishes,
+)
+from coworld.models.reservations import Reservation, ReservationCategory
+from coworld.pagination import Page
+from coworld.responses import ResponseEncoder
+from coworld.routes import dishes, menus, reservations
+
+
+def dish_read() -> DishRead:
+    return DishRead(
+        id=uuid.uuid4(),
+        created_at=datetime(2020, 1, 1),
+        category=Category("PLATS"),
+        title="Amazing Cow",
+        description="The Amazing Cow burger, juicy and tasty.",
+        ingredients="Meat, Salad, Tomato, Cheese",
+        price=6.99,
+        halal=False,
+    )
+
+
+def menu_read() -> MenuRead:
+    return MenuRead(
+        id=uuid.uuid4(),
+        created_at=datetime(2020, 1, 1),
+        title="Amazing Cow",
+        description="The Amazing Cow menu, juicy and tasty.",
+        price=8.99,
+        discount=20.0,
+    )
+
+
+def reservation() -> Reservation:
+    return Reservation(
+        id=uuid.uuid4(),
+        created_at=datetime(2020, 1, 1),
+        reservation_category=ReservationCategory("SIMPLE"),
+        name="aaaaaa",
+        family_name="vvvvvv",
+        amount_of_people=6,
+        email_address="vvvvv@admin.com",
+        reservation_time=datetime(2020, 3, 3, 20, 30, 0),
+        phone_number=PhoneNumber("+33633445566"),
+    )
+
+
+ENCODED_ROUTES = [
+    (
+        dishes.DISH_LISTING,
+        list[DishInMenu],
+        Page(
+            [
+                DishInMenu(**dish_read().model_dump(), menus=[menu_read()]),
+                DishInMenu(**dish_read().model_dump(), menus=[]),
+            ]
+        ),
+    ),
+    (dishes.DISH_READ, Dish, dish_read()),
+    (dishes.DISHES, list[Dish], [dish_read(), dish_read()]),
+    (dishes.DISH, Dish, Dish(**dish_read().model_dump())),
+    (
+        menus.MENU_LISTING,
+        list[MenuWithDishes],
+        [MenuWithDishes(**menu_read().model_dump(), dishes=[dish_read()])],
+    ),
+    (menus.MENU_READ, Menu, MenuWithDishes(**menu_read().model_dump())),
+    (
+        menus.MENU_READ,
+        Menu,
+        MenuWithDishes(**menu_read().model_dump(), dishes=[dish_read()]),
+    ),
+    (menus.MENUS, list[Menu], [menu_read()]),
+    (reservations.RESERVATION, Reservation, reservation()),
+    (reservations.RESERVATIONS, list[Reservation], [reservation(), reservation()]),
+]
+
+
+@pytest.mark.parametrize("encoder, response_model, value", ENCODED_ROUTES)
+def test_encoder_matches_response_model_serialization(
+    encoder: ResponseEncoder, response_model: type, value: object, monkeypatch
+):
+    adapter = TypeAdapter(response_model)
+    expected = adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+    def fail_validation(*args, **kwargs):
+        raise AssertionError("read models must not be validated again")
+
+    monkeypatch.setattr(encoder.adapter, "validate_python", fail_validation)
+
+    assert encoder.encode(value) == expected
+
+
+def test_encoder_validates_values_of_another_type() -> None:
+    menu = Menu(**menu_read().model_dump(exclude={"discounted_price"}))
+
+    encoded = ResponseEncoder(MenuWithDishes, exclude={"dishes"}).encode(menu)
+
+    assert encoded == TypeAdapter(Menu).dump_json(menu)
+
+
+@pytest.mark.parametrize(
+    "path, method, status_code, schema",
+    [
+        ("/dishes/", "get", "200", {"items": {"$ref": "DishInMenu"}}),
+        ("/dishes/", "post", "201", {"$ref": "Dish"}),
+        ("/dishes/bulk", "post", "200", {"$ref": "BulkCreateResult"}),
+        ("/dishes/{dish_id}", "get", "200", {"$ref": "Dish"}),
+        ("/dishes/{dish_id}", "patch", "200", {"$ref": "Dish"}),
+        ("/dishes/type/halal", "get", "200", {"items": {"$ref": "Dish"}}),
+        ("/dishes/type/category", "get", "200", {"items": {"$ref": "Dish"}}),
+        ("/menus/", "get", "200", {"items": {"$ref": "MenuWithDishes"}}),
+        ("/menus/", "post", "201", {"$ref": "Menu"}),
+        ("/menus/{menu_id}", "get", "200", {"$ref": "Menu"}),
+        ("/menus/{menu_id}", "patch", "200", {"$ref": "Menu"}),
+        (
+            "/menus/{menu_id}/link_dish",
+            "patch",
+            "200",
+            {"$ref": "MenuDishLinksResult"},
+        ),
+        ("/menus/type/discount", "get", "200", {"items": {"$ref": "Menu"}}),
+        ("/reservations/", "get", "200", {"items": {"$ref": "Reservation"}}),
+        ("/reservations/", "post", "201", {"$ref": "Reservation"}),
+        ("/reservations/day/{day}", "get", "200", {"items": {"$ref": "Reservation"}}),
+        ("/reservations/search", "get", "200", {"items": {"$ref": "Reservation"}}),
+        (
+            "/reservations/availability",
+            "get",
+            "200",
+            {"$ref": "ReservationAvailability"},
+        ),
+        ("/reservations/{reservation_id}", "get", "200", {"$ref": "Reservation"}),
+        ("/reservations/{reservation_id}", "patch", "200", {"$ref": "Reservation"}),
+    ],
+)
+def test_openapi_response_schemas_are_unchanged(
+    app: FastAPI, path: str, method: str, status_code: str, schema: dict
+):
+    response = app.openapi()["paths"][path][method]["responses"][status_code]
+    actual = response["content"]["application/json"]["schema"]
+
+    if "items" in schema:
+        assert actual["type"] == "array"
+        actual = actual["items"]
+        schema = schema["items"]
+    assert actual["$ref"] == f"#/components/schemas/{schema['$ref']}"
@@ -0,0 +1,74 @@
+from datetime import date, datetime, time
+
+from coworld.availability import SeatingPlan
+
+
+def seating_plan() -> SeatingPlan:
+    return SeatingPlan(
+        capacity=10,
+        slot_minutes=30,
+        seating_minutes=90,
+        opening_time=time(18, 0),
+        closing_time=time(21, 0),
+    )
+
+
+def test_reservation_holds_the_slots_of_its_seating() -> None:
+    # Prepare
+    plan = seating_plan()
+
+    # Act
+    slot_times = plan.slot_times(datetime(2024, 6, 1, 19, 10))
+
+    # Assert
+    assert slot_times == [
+        datetime(2024, 6, 1, 19, 0),
+        datetime(2024, 6, 1, 19, 30),
+        datetime(2024, 6, 1, 20, 0),
+    ]
+
+
+def test_seating_may_run_past_midnight() -> None:
+    assert seating_plan().slot_times(datetime(2024, 6, 1, 23, 45)) == [
+        datetime(2024, 6, 1, 23, 30),
+        datetime(2024, 6, 2, 0, 0),
+        datetime(2024, 6, 2, 0, 30),
+    ]
+
+
+def test_availability_window_covers_the_last_seating() -> None:
+    assert seating_plan().availability_window(date(2024, 6, 1)) == (
+        datetime(2024, 6, 1, 18, 0),
+        datetime(2024, 6, 1, 22, 0),
+    )
+
+
+def test_availability_reports_the_largest_party_per_slot() -> None:
+    # Prepare
+    plan = seating_plan()
+    booked_seats = {
+        datetime(2024, 6, 1, 19, 0): 4,
+        datetime(2024, 6, 1, 19, 30): 4,
+        datetime(2024, 6, 1, 20, 0): 4,
+        datetime(2024, 6, 1, 20, 30): 8,
+        datetime(2024, 6, 1, 21, 0): 8,
+        datetime(2024, 6, 1, 21, 30): 8,
+    }
+
+    # Act
+    availability = plan.availability(date(2024, 6, 1), booked_seats)
+
+    # Assert
+    assert availability.capacity == 10
+    assert availability.seating_minutes == 90
+    assert [
+        (slot.time.time(), slot.booked_seats, slot.available_seats)
+        for slot in availability.slots
+    ] == [
+        (time(18, 0), 0, 6),
+        (time(18, 30), 0, 6),
+        (time(19, 0), 4, 6),
+        (time(19, 30), 4, 2),
+        (time(20, 0), 4, 2),
+        (time(20, 30), 8, 2),
+    ]
@@ -0,0 +1,97 @@
+import asyncio
+import random
+import time
+from collections import Counter
+from datetime import datetime, time as clock, timedelta
+from pathlib import Path
+
+import pytest
+from pydantic_extra_types.phone_numbers import PhoneNumber
+from sqlmodel import select
+
+from coworld.availability import SeatingPlan
+from coworld.controllers.reservations import ReservationController
+from coworld.database import create_schema, get_engine
+from coworld.dependencies import new_session
+from coworld.models.errors import ReservationCapacityExceededError
+from coworld.models.reservations import (
+    Reservation,
+    ReservationCategory,
+    ReservationCreate,
+    SeatingSlot,
+)
+
+BOOKINGS = 300
+CAPACITY = 40
+
+
+def seating_plan() -> SeatingPlan:
+    return SeatingPlan(
+        capacity=CAPACITY,
+        slot_minutes=15,
+        seating_minutes=120,
+        opening_time=clock(18, 0),
+        closing_time=clock(23, 0),
+    )
+
+
+def booking(index: int) -> ReservationCreate:
+    return ReservationCreate(
+        reservation_category=ReservationCategory.SIMPLE,
+        name="Cow",
+        family_name=f"Cowcow {index}",
+        amount_of_people=random.randint(1, 6),
+        email_address=f"cow{index}@coworld.fr",
+        phone_number=PhoneNumber("+33611223344"),
+        reservation_time=datetime(2024, 6, 1, 19, 0)
+        + timedelta(minutes=15 * random.randrange(8)),
+    )
+
+
+async def book(plan: SeatingPlan, reservation_create: ReservationCreate) -> bool:
+    async with new_session() as session:
+        try:
+            await ReservationController(session, plan).create_reservation(
+                reservation_create
+            )
+            return True
+        except ReservationCapacityExceededError:
+            return False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("workers", [1, 2])
+async def test_concurrent_bookings_never_exceed_capacity(
+    database_path: Path, workers: int, record_property
+) -> None:
+    # Prepare
+    await create_schema(get_engine())
+    plans = [seating_plan() for _ in range(workers)]
+    bookings = [booking(index) for index in range(BOOKINGS)]
+
+    # Act
+    start = time.perf_counter()
+    booked = await asyncio.gather(
+        *(
+            book(plans[index % workers], reservation_create)
+            for index, reservation_create in enumerate(bookings)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    record_property("bookings_per_second", round(BOOKINGS / elapsed))
+
+    # Assert
+    async with new_session() as session:
+        reservations = (await session.exec(select(Reservation))).all()
+        seating_slots = (await session.exec(select(SeatingSlot))).all()
+    seated = Counter()
+    for reservation in reservations:
+        for slot_time in plans[0].slot_times(reservation.reservation_time):
+            seated[slot_time] += reservation.amount_of_people
+    assert len(reservations) == sum(booked)
+    assert 0 < sum(booked) < BOOKINGS
+    assert max(seated.values()) <= CAPACITY
+    assert {
+        slot.slot_time: slot.booked_seats for slot in seating_slots if slot.booked_seats
+    } == seated
+    await get_engine().dispose()
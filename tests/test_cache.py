@@ -0,0 +1,298 @@
+import asyncio
+import random
+from pathlib import Path
+
+import pytest
+from faker import Faker
+from starlette.testclient import TestClient
+
+from coworld.api import create_app
+from coworld.cache import MemoryCacheBackend, cached
+from coworld.models.dishes import Category, DishCreate
+from coworld.models.menus import MenuCreate
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def dish_create(faker: Faker, **overrides) -> DishCreate:
+    return DishCreate(
+        **{
+            "title": faker.unique.text(max_nb_chars=12),
+            "description": faker.text(max_nb_chars=24),
+            "category": random.choice(list(Category)),
+            "ingredients": faker.text(max_nb_chars=24),
+            "price": random.uniform(0.99, 99.99),
+            "halal": random.choice([True, False]),
+            **overrides,
+        }
+    )
+
+
+def menu_create(faker: Faker) -> MenuCreate:
+    return MenuCreate(
+        title=faker.unique.text(max_nb_chars=12),
+        description=faker.text(max_nb_chars=24),
+        price=random.uniform(2.99, 99.99),
+    )
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_and_miss() -> None:
+    # Prepare
+    cache = MemoryCacheBackend(max_entries=10, ttl_seconds=60)
+
+    # Act
+    missing = await cache.get("key")
+    stored = await cache.set("key", "value", {"tag"}, await cache.generation())
+    found = await cache.get("key")
+
+    # Assert
+    assert missing == (False, None)
+    assert stored is True
+    assert found == (True, "value")
+    assert (await cache.statistics()).hits == 1
+    assert (await cache.statistics()).misses == 1
+    assert (await cache.statistics()).hit_ratio == 0.5
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used() -> None:
+    # Prepare
+    cache = MemoryCacheBackend(max_entries=2, ttl_seconds=60)
+    await cache.set("a", 1, (), await cache.generation())
+    await cache.set("b", 2, (), await cache.generation())
+    await cache.get("a")
+
+    # Act
+    await cache.set("c", 3, (), await cache.generation())
+
+    # Assert
+    assert await cache.get("a") == (True, 1)
+    assert await cache.get("b") == (False, None)
+    assert await cache.get("c") == (True, 3)
+    assert (await cache.statistics()).evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_expires_entries() -> None:
+    # Prepare
+    clock = FakeClock()
+    cache = MemoryCacheBackend(max_entries=10, ttl_seconds=5, clock=clock)
+    await cache.set("key", "value", (), await cache.generation())
+
+    # Act
+    clock.now = 4.9
+    before_expiry = await cache.get("key")
+    clock.now = 5.0
+    after_expiry = await cache.get("key")
+
+    # Assert
+    assert before_expiry == (True, "value")
+    assert after_expiry == (False, None)
+    assert (await cache.statistics()).expirations == 1
+    assert (await cache.statistics()).entries == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidates_by_tag() -> None:
+    # Prepare
+    cache = MemoryCacheBackend(max_entries=10, ttl_seconds=60)
+    await cache.set("menu", "menu", {"menu:1", "dish:1"}, await cache.generation())
+    await cache.set("dish", "dish", {"dish:1"}, await cache.generation())
+    await cache.set("other", "other", {"dish:2"}, await cache.generation())
+
+    # Act
+    await cache.invalidate("dish:1")
+
+    # Assert
+    assert await cache.get("menu") == (False, None)
+    assert await cache.get("dish") == (False, None)
+    assert await cache.get("other") == (True, "other")
+    assert (await cache.statistics()).invalidations == 2
+    assert "dish:1" not in cache.keys_by_tag
+
+
+@pytest.mark.asyncio
+async def test_cache_does_not_store_value_loaded_before_invalidation() -> None:
+    # Prepare
+    cache = MemoryCacheBackend(max_entries=10, ttl_seconds=60)
+    loading = asyncio.Event()
+    release = asyncio.Event()
+
+    async def load() -> str:
+        loading.set()
+        await release.wait()
+        return "stale"
+
+    # Act
+    read = asyncio.create_task(cache.get_or_load("key", load, lambda _: {"tag"}))
+    await loading.wait()
+    await cache.invalidate("tag")
+    release.set()
+    value = await read
+
+    # Assert
+    assert value == "stale"
+    assert await cache.get("key") == (False, None)
+    assert cache.invalidated_at == {}
+
+
+@pytest.mark.asyncio
+async def test_cached_without_cache_always_loads() -> None:
+    # Prepare
+    calls = []
+
+    async def load() -> int:
+        calls.append(1)
+        return len(calls)
+
+    # Act
+    first = await cached(None, "key", load, lambda _: ())
+    second = await cached(None, "key", load, lambda _: ())
+
+    # Assert
+    assert (first, second) == (1, 2)
+
+
+@pytest.fixture(name="catalog_client")
+def fixture_catalog_client(database_path: Path) -> TestClient:
+    with TestClient(create_app()) as client:
+        yield client
+
+
+def create_dish(client: TestClient, faker: Faker, **overrides) -> dict:
+    return client.post(
+        "/dishes/", json=dish_create(faker, **overrides).model_dump(mode="json")
+    ).json()
+
+
+def create_menu(client: TestClient, faker: Faker, **overrides) -> dict:
+    return client.post(
+        "/menus/",
+        json=menu_create(faker).model_copy(update=overrides).model_dump(mode="json"),
+    ).json()
+
+
+def link_dish(client: TestClient, menu: dict, dish: dict) -> None:
+    client.patch(
+        f"/menus/{menu['id']}/link_dish",
+        json={"menu_id": menu["id"], "dish_ids": [dish["id"]]},
+    )
+
+
+def test_catalog_reads_are_cached_once(
+    catalog_client: TestClient, faker: Faker
+) -> None:
+    # Prepare
+    create_menu(catalog_client, faker)
+
+    # Act
+    first = catalog_client.get("/menus/")
+    second = catalog_client.get("/menus/")
+
+    # Assert
+    assert second.content == first.content
+    statistics = catalog_client.get("/metrics/cache").json()
+    assert (statistics["entries"], statistics["misses"], statistics["hits"]) == (
+        1,
+        1,
+        1,
+    )
+
+
+def test_create_dish_invalidates_dish_listings(
+    catalog_client: TestClient, faker: Faker
+) -> None:
+    # Prepare
+    create_dish(catalog_client, faker, halal=True)
+    assert len(catalog_client.get("/dishes/").json()) == 1
+    halal = catalog_client.get("/dishes/type/halal", params={"is_halal": True})
+    assert len(halal.json()) == 1
+
+    # Act
+    create_dish(catalog_client, faker, halal=True)
+
+    # Assert
+    assert len(catalog_client.get("/dishes/").json()) == 2
+    halal = catalog_client.get("/dishes/type/halal", params={"is_halal": True})
+    assert len(halal.json()) == 2
+
+
+def test_update_dish_invalidates_filtered_listings(
+    catalog_client: TestClient, faker: Faker
+) -> None:
+    # Prepare
+    dish = create_dish(catalog_client, faker, halal=False)
+    halal = catalog_client.get("/dishes/type/halal", params={"is_halal": True})
+    assert halal.json() == []
+
+    # Act
+    catalog_client.patch(f"/dishes/{dish['id']}", json={"halal": True})
+
+    # Assert
+    halal = catalog_client.get("/dishes/type/halal", params={"is_halal": True})
+    assert [halal_dish["id"] for halal_dish in halal.json()] == [dish["id"]]
+
+
+def test_update_dish_invalidates_every_menu_linking_it(
+    catalog_client: TestClient, faker: Faker
+) -> None:
+    # Prepare
+    dish = create_dish(catalog_client, faker)
+    menus = [create_menu(catalog_client, faker) for _ in range(3)]
+    for menu in menus:
+        link_dish(catalog_client, menu, dish)
+    for menu in menus:
+        catalog_client.get(f"/menus/{menu['id']}")
+    catalog_client.get("/menus/")
+    catalog_client.get(f"/dishes/{dish['id']}")
+
+    # Act
+    catalog_client.patch(f"/dishes/{dish['id']}", json={"price": 42.0})
+
+    # Assert
+    for listed_menu in catalog_client.get("/menus/").json():
+        assert [linked_dish["price"] for linked_dish in listed_menu["dishes"]] == [42.0]
+    assert catalog_client.get(f"/dishes/{dish['id']}").json()["price"] == 42.0
+
+
+def test_menu_changes_invalidate_dish_listings(
+    catalog_client: TestClient, faker: Faker
+) -> None:
+    # Prepare
+    dish = create_dish(catalog_client, faker)
+    menu = create_menu(catalog_client, faker)
+    assert catalog_client.get("/dishes/").json()[0]["menus"] == []
+
+    # Act & Assert
+    link_dish(catalog_client, menu, dish)
+    listed_dish = catalog_client.get("/dishes/").json()[0]
+    assert [listed_menu["id"] for listed_menu in listed_dish["menus"]] == [menu["id"]]
+
+    catalog_client.patch(f"/menus/{menu['id']}", json={"title": "Renamed"})
+    listed_dish = catalog_client.get("/dishes/").json()[0]
+    assert [listed_menu["title"] for listed_menu in listed_dish["menus"]] == ["Renamed"]
+
+    catalog_client.delete(f"/menus/{menu['id']}/unlink_dish/{dish['id']}")
+    assert catalog_client.get("/dishes/").json()[0]["menus"] == []
+    assert catalog_client.get("/menus/").json()[0]["dishes"] == []
+
+
+def test_delete_menu_invalidates_discounted_menus(
+    catalog_client: TestClient, faker: Faker
+) -> None:
+    # Prepare
+    menu = create_menu(catalog_client, faker, discount=10)
+    assert len(catalog_client.get("/menus/type/discount").json()) == 1
+
+    # Act
+    catalog_client.delete(f"/menus/{menu['id']}")
+
+    # Assert
+    assert catalog_client.get("/menus/type/discount").json() == []
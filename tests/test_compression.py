@@ -0,0 +1,148 @@
+import gzip
+import json
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from coworld.compression import (
+    CompressionMiddleware,
+    StreamCompressor,
+    negotiate_encoding,
+)
+from coworld.settings import Settings
+
+PAYLOAD = [{"title": f"Amazing Cow {index}", "price": 6.99} for index in range(100)]
+
+
+async def large(request):
+    return JSONResponse(PAYLOAD, headers={"ETag": '"payload"'})
+
+
+async def small(request):
+    return JSONResponse({"title": "Amazing Cow"})
+
+
+async def image(request):
+    return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+
+async def encoded(request):
+    return Response(
+        gzip.compress(json.dumps(PAYLOAD).encode()),
+        media_type="application/json",
+        headers={"Content-Encoding": "gzip"},
+    )
+
+
+async def stream(request):
+    async def lines():
+        for item in PAYLOAD:
+            yield json.dumps(item).encode() + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@pytest.fixture(name="compressed_client")
+def fixture_compressed_client() -> TestClient:
+    app = Starlette(
+        routes=[
+            Route(f"/{endpoint.__name__}", endpoint)
+            for endpoint in [large, small, image, encoded, stream]
+        ]
+    )
+    app.add_middleware(CompressionMiddleware, settings=Settings())
+    return TestClient(app, headers={"Accept-Encoding": "gzip"})
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, available, expected",
+    [
+        ("gzip", ["gzip"], "gzip"),
+        ("br, gzip;q=0.5", ["gzip"], "gzip"),
+        ("*", ["gzip"], "gzip"),
+        ("gzip;q=0", ["gzip"], None),
+        ("identity", ["gzip"], None),
+        ("", ["gzip"], None),
+        ("gzip, br", ["br", "gzip"], "br"),
+        ("gzip, br;q=0.5", ["br", "gzip"], "gzip"),
+    ],
+)
+def test_negotiate_encoding(
+    accept_encoding: str, available: list[str], expected: str | None
+) -> None:
+    assert negotiate_encoding(accept_encoding, available) == expected
+
+
+def test_large_json_is_compressed(compressed_client: TestClient) -> None:
+    response = compressed_client.get("/large")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == 'W/"payload"'
+    assert int(response.headers["content-length"]) < len(json.dumps(PAYLOAD))
+    assert response.json() == PAYLOAD
+
+
+@pytest.mark.parametrize("path", ["/small", "/image"])
+def test_small_or_unlisted_responses_are_not_compressed(
+    compressed_client: TestClient, path: str
+) -> None:
+    response = compressed_client.get(path)
+
+    assert "content-encoding" not in response.headers
+
+
+def test_already_encoded_responses_are_not_compressed_again(
+    compressed_client: TestClient,
+) -> None:
+    response = compressed_client.get("/encoded")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == PAYLOAD
+
+
+def test_streaming_responses_are_compressed_chunk_by_chunk(
+    compressed_client: TestClient,
+) -> None:
+    response = compressed_client.get("/stream")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert [json.loads(line) for line in response.text.splitlines()] == PAYLOAD
+
+
+def test_client_without_accept_encoding_gets_identity(
+    compressed_client: TestClient,
+) -> None:
+    response = compressed_client.get("/large", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in response.headers
+    assert response.json() == PAYLOAD
+
+
+def test_stream_compressor_flushes_every_chunk() -> None:
+    compressor = StreamCompressor("gzip", Settings())
+
+    first = compressor.compress(b"first line\n", last=False)
+    last = compressor.compress(b"last line\n", last=True)
+
+    assert gzip.decompress(first + last) == b"first line\nlast line\n"
+    assert first
+
+
+def test_brotli_compression() -> None:
+    brotli = pytest.importorskip("brotli")
+    compressor = StreamCompressor("br", Settings())
+
+    body = compressor.compress(json.dumps(PAYLOAD).encode(), last=True)
+
+    assert json.loads(brotli.decompress(body)) == PAYLOAD
+
+
+def test_app_compresses_responses(client: TestClient) -> None:
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
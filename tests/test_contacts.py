@@ -0,0 +1,127 @@
+import dns.resolver
+import pytest
+from pydantic import ValidationError
+
+from coworld.contacts import (
+    email_address_cache,
+    normalize_email,
+    parse_phone_number,
+    phone_number_cache,
+    phone_number_formats,
+    validation_cache_statistics,
+)
+from coworld.models.errors import InvalidEmailAddressError, InvalidPhoneNumberError
+from coworld.models.reservations import ReservationCreate
+from coworld.settings import get_settings
+
+
+@pytest.fixture(autouse=True)
+def clear_validation_caches():
+    phone_number_cache.cache_clear()
+    email_address_cache.cache_clear()
+    yield
+    phone_number_cache.cache_clear()
+    email_address_cache.cache_clear()
+
+
+def reservation(phone_number: str, email_address: str) -> ReservationCreate:
+    return ReservationCreate(
+        reservation_category="SIMPLE",
+        name="Cow",
+        family_name="Cowcow",
+        amount_of_people=2,
+        email_address=email_address,
+        reservation_time="2024-06-01T20:00:00",
+        phone_number=phone_number,
+    )
+
+
+def test_repeated_contacts_are_validated_once() -> None:
+    # Act
+    first = reservation("+33 6 11 22 33 44", "Cow@CoWorld.fr")
+    second = reservation("+33 6 11 22 33 44", "Cow@CoWorld.fr")
+
+    # Assert
+    assert first.phone_number == second.phone_number == "+33611223344"
+    assert first.email_address == second.email_address == "Cow@coworld.fr"
+    assert [
+        (statistics.name, statistics.hits, statistics.misses, statistics.hit_ratio)
+        for statistics in validation_cache_statistics()
+    ] == [("phone_number", 1, 1, 0.5), ("email_address", 1, 1, 0.5)]
+
+
+def test_invalid_contacts_are_cached_too() -> None:
+    # Act & Assert
+    for _ in range(2):
+        with pytest.raises(ValidationError):
+            reservation("not a phone", "cow@coworld.fr")
+        with pytest.raises(InvalidPhoneNumberError):
+            phone_number_formats("not a phone")
+        with pytest.raises(InvalidEmailAddressError):
+            normalize_email("not an email")
+    assert phone_number_cache().cache_info().misses == 1
+    assert email_address_cache().cache_info().misses == 2
+
+
+def test_phone_numbers_are_cached_per_region(monkeypatch) -> None:
+    # Prepare
+    monkeypatch.setattr(get_settings(), "phone_default_region", "FR")
+
+    # Act
+    national = reservation("06 11 22 33 44", "cow@coworld.fr")
+
+    # Assert
+    assert national.phone_number == "+33611223344"
+    assert parse_phone_number("06 11 22 33 44", None) is None
+    assert phone_number_cache().cache_info().currsize == 2
+
+
+def test_email_validation_never_resolves_domains(monkeypatch) -> None:
+    # Prepare
+    def fail_resolve(*args, **kwargs):
+        raise AssertionError("email validation must not query DNS")
+
+    monkeypatch.setattr(dns.resolver, "resolve", fail_resolve)
+    monkeypatch.setattr(dns.resolver.Resolver, "resolve", fail_resolve)
+
+    # Act
+    created = reservation("+33611223344", "cow@unregistered-coworld-domain.fr")
+
+    # Assert
+    assert created.email_address == "cow@unregistered-coworld-domain.fr"
+
+
+def test_display_name_email_addresses_are_accepted() -> None:
+    # Act
+    created = reservation("+33611223344", "John Doe <John@CoWorld.fr>")
+
+    # Assert
+    assert created.email_address == "John@coworld.fr"
+
+
+def test_oversized_contacts_are_rejected_before_the_cache() -> None:
+    # Prepare
+    email_address = "cow" * 1000 + "@coworld.fr"
+    phone_number = "+33611223344" + " " * 100
+
+    # Act & Assert
+    with pytest.raises(ValidationError):
+        reservation("+33611223344", email_address)
+    with pytest.raises(InvalidEmailAddressError):
+        normalize_email(email_address)
+    with pytest.raises(InvalidPhoneNumberError):
+        phone_number_formats(phone_number)
+    assert parse_phone_number(phone_number, None) is None
+    assert email_address_cache().cache_info().currsize == 0
+    assert phone_number_cache().cache_info().currsize == 1
+
+
+def test_cache_size_is_read_from_settings_on_first_use(monkeypatch) -> None:
+    # Prepare
+    monkeypatch.setattr(get_settings(), "contact_validation_cache_size", 2)
+
+    # Act
+    statistics = validation_cache_statistics()
+
+    # Assert
+    assert [statistics.max_entries for statistics in statistics] == [2, 2]
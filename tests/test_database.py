@@ -0,0 +1,190 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import exc, inspect, text
+from sqlalchemy.pool import StaticPool
+
+from coworld.database import (
+    TimedAsyncAdaptedQueuePool,
+    create_engine_from_settings,
+    create_schema,
+    pool_statistics,
+    retry_on_busy,
+)
+from coworld.settings import Settings
+
+
+@pytest.mark.asyncio
+async def test_create_engine_from_settings_applies_pool_settings(tmp_path) -> None:
+    settings = Settings(
+        database_url=f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        database_echo=False,
+        database_pool_size=3,
+        database_max_overflow=2,
+        database_pool_timeout=5,
+        database_pool_recycle=60,
+    )
+
+    engine = create_engine_from_settings(settings)
+
+    pool = engine.sync_engine.pool
+    assert isinstance(pool, TimedAsyncAdaptedQueuePool)
+    assert pool.size() == 3
+    assert pool._max_overflow == 2
+    assert pool._timeout == 5
+    assert pool._recycle == 60
+    assert pool._pre_ping is True
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_create_engine_from_settings_uses_static_pool_in_memory() -> None:
+    settings = Settings(database_url="sqlite+aiosqlite://", database_echo=False)
+
+    engine = create_engine_from_settings(settings)
+
+    assert isinstance(engine.sync_engine.pool, StaticPool)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pool_statistics_count_checkouts(tmp_path) -> None:
+    settings = Settings(
+        database_url=f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}",
+        database_echo=False,
+    )
+    engine = create_engine_from_settings(settings)
+    checkouts = pool_statistics.checkouts
+    checkins = pool_statistics.checkins
+
+    for _ in range(3):
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    snapshot = pool_statistics.snapshot(engine.sync_engine.pool)
+    assert snapshot.checkouts == checkouts + 3
+    assert snapshot.checkins == checkins + 3
+    assert snapshot.checked_out == 0
+    assert snapshot.checkout_wait_max_ms >= 0
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas_are_applied_on_connect(tmp_path) -> None:
+    settings = Settings(
+        database_url=f"sqlite+aiosqlite:///{tmp_path / 'pragmas.db'}",
+        sqlite_busy_timeout_ms=1234,
+        sqlite_cache_size_kib=2048,
+    )
+    engine = create_engine_from_settings(settings)
+
+    async with engine.connect() as connection:
+        pragmas = {
+            name: (await connection.execute(text(f"PRAGMA {name}"))).scalar_one()
+            for name in (
+                "journal_mode",
+                "synchronous",
+                "busy_timeout",
+                "foreign_keys",
+                "cache_size",
+                "mmap_size",
+            )
+        }
+    await engine.dispose()
+
+    assert pragmas == {
+        "journal_mode": "wal",
+        "synchronous": 1,
+        "busy_timeout": 1234,
+        "foreign_keys": 1,
+        "cache_size": -2048,
+        "mmap_size": settings.sqlite_mmap_size,
+    }
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas_can_be_disabled(tmp_path) -> None:
+    settings = Settings(
+        database_url=f"sqlite+aiosqlite:///{tmp_path / 'default.db'}",
+        sqlite_tuning_enabled=False,
+    )
+    engine = create_engine_from_settings(settings)
+
+    async with engine.connect() as connection:
+        journal_mode = (
+            await connection.execute(text("PRAGMA journal_mode"))
+        ).scalar_one()
+    await engine.dispose()
+
+    assert journal_mode == "delete"
+
+
+class FakeController:
+    def __init__(self, failures: int, message: str = "database is locked"):
+        self.session = AsyncMock()
+        self.calls = 0
+        self.failures = failures
+        self.message = message
+
+    @retry_on_busy
+    async def write(self) -> str:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise exc.OperationalError("COMMIT", {}, Exception(self.message))
+        return "done"
+
+
+@pytest.mark.asyncio
+async def test_retry_on_busy_retries_until_commit_succeeds() -> None:
+    controller = FakeController(failures=2)
+
+    assert await controller.write() == "done"
+    assert controller.calls == 3
+    assert controller.session.rollback.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_on_busy_gives_up_after_configured_retries() -> None:
+    controller = FakeController(failures=10)
+
+    with pytest.raises(exc.OperationalError):
+        await controller.write()
+    assert controller.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_retry_on_busy_does_not_retry_other_errors() -> None:
+    controller = FakeController(failures=1, message="no such table: dish")
+
+    with pytest.raises(exc.OperationalError):
+        await controller.write()
+    assert controller.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_create_schema_adds_missing_indexes_to_existing_tables(
+    tmp_path,
+) -> None:
+    settings = Settings(
+        database_url=f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}",
+        database_echo=False,
+    )
+    engine = create_engine_from_settings(settings)
+    await create_schema(engine)
+    async with engine.begin() as connection:
+        await connection.execute(text("DROP INDEX ix_reservation_created_at_id"))
+        await connection.execute(text("DROP INDEX ix_dish_created_at_id"))
+
+    created_tables = await create_schema(engine)
+
+    async with engine.connect() as connection:
+        index_names = await connection.run_sync(
+            lambda connection: {
+                index["name"]
+                for table in ("dish", "reservation")
+                for index in inspect(connection).get_indexes(table)
+            }
+        )
+    assert created_tables == set()
+    assert {"ix_reservation_created_at_id", "ix_dish_created_at_id"} <= index_names
+    await engine.dispose()
@@ -0,0 +1,73 @@
+import csv
+import io
+import uuid
+from datetime import datetime
+
+import pytest
+from openpyxl import load_workbook
+
+from coworld.exports import csv_chunks, xlsx_chunks
+from coworld.models.reservations import ReservationCategory
+
+COLUMNS = ["id", "reservation_category", "reservation_time", "amount_of_people"]
+
+
+def rows(count: int) -> list[dict]:
+    return [
+        {
+            "id": uuid.uuid4(),
+            "reservation_category": ReservationCategory.SIMPLE,
+            "reservation_time": datetime(2024, 6, 1, 20, index),
+            "amount_of_people": index,
+            "email_address": "ignored@coworld.fr",
+        }
+        for index in range(count)
+    ]
+
+
+async def chunked(chunks: list[list[dict]]):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_csv_chunks_writes_header_then_one_chunk_per_batch() -> None:
+    # Prepare
+    first, second = rows(2), rows(1)
+
+    # Act
+    chunks = [chunk async for chunk in csv_chunks(COLUMNS, chunked([first, second]))]
+
+    # Assert
+    assert len(chunks) == 3
+    parsed = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert parsed[0] == COLUMNS
+    assert parsed[1] == [str(first[0]["id"]), "SIMPLE", "2024-06-01T20:00:00", "0"]
+    assert len(parsed) == 4
+
+
+@pytest.mark.asyncio
+async def test_xlsx_chunks_builds_a_write_only_workbook() -> None:
+    # Prepare
+    exported = rows(3)
+
+    # Act
+    content = b"".join(
+        [
+            chunk
+            async for chunk in xlsx_chunks(
+                "Reservations", COLUMNS, chunked([exported[:2], exported[2:]])
+            )
+        ]
+    )
+
+    # Assert
+    sheet = load_workbook(io.BytesIO(content))["Reservations"]
+    values = list(sheet.values)
+    assert list(values[0]) == COLUMNS
+    assert list(values[3]) == [
+        str(exported[2]["id"]),
+        "SIMPLE",
+        datetime(2024, 6, 1, 20, 2),
+        2,
+    ]
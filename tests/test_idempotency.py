@@ -0,0 +1,139 @@
+import json
+from pathlib import Path
+
+from sqlalchemy import event
+from starlette.testclient import TestClient
+
+from coworld.api import create_app
+from coworld.database import get_engine
+from coworld.idempotency import (
+    IDEMPOTENT_REPLAYED_HEADER,
+    key_digest,
+    request_digest,
+)
+
+RESERVATION = {
+    "reservation_category": "SIMPLE",
+    "name": "aaaaaa",
+    "family_name": "vvvvvv",
+    "amount_of_people": 2,
+    "email_address": "vvvvv@admin.com",
+    "reservation_time": "2024-06-01T20:30:00",
+    "phone_number": "+33633445566",
+}
+
+DISH = {
+    "category": "PLATS",
+    "title": "Amazing Cow",
+    "description": "The Amazing Cow burger, juicy and tasty.",
+    "ingredients": "Meat, Salad, Tomato, Cheese",
+    "price": 6.99,
+    "halal": False,
+}
+
+
+def test_retried_post_replays_the_stored_response(database_path: Path):
+    statements = []
+
+    def record_statement(conn, cursor, statement, *args) -> None:
+        statements.append(statement)
+
+    with TestClient(create_app()) as client:
+        headers = {"Idempotency-Key": "booking-1"}
+        created = client.post("/reservations/", json=RESERVATION, headers=headers)
+        event.listen(
+            get_engine().sync_engine, "before_cursor_execute", record_statement
+        )
+        retried = client.post("/reservations/", json=RESERVATION, headers=headers)
+        event.remove(
+            get_engine().sync_engine, "before_cursor_execute", record_statement
+        )
+        reservations = client.get("/reservations/").json()
+
+    assert created.status_code == retried.status_code == 201
+    assert retried.content == created.content
+    assert retried.headers[IDEMPOTENT_REPLAYED_HEADER] == "true"
+    assert IDEMPOTENT_REPLAYED_HEADER not in created.headers
+    assert [statement.split()[0] for statement in statements] == ["SELECT"]
+    assert [reservation["id"] for reservation in reservations] == [created.json()["id"]]
+
+
+def test_idempotency_key_is_scoped_to_the_route(database_path: Path):
+    with TestClient(create_app()) as client:
+        headers = {"Idempotency-Key": "same-key"}
+        reservation = client.post("/reservations/", json=RESERVATION, headers=headers)
+        dish = client.post("/dishes/", json=DISH, headers=headers)
+        patched = client.patch(
+            f"/dishes/{dish.json()['id']}", json={"price": 7.5}, headers=headers
+        )
+        repatched = client.patch(
+            f"/dishes/{dish.json()['id']}", json={"price": 7.5}, headers=headers
+        )
+
+    assert reservation.status_code == dish.status_code == 201
+    assert dish.json()["title"] == DISH["title"]
+    assert patched.json()["price"] == repatched.json()["price"] == 7.5
+    assert repatched.headers[IDEMPOTENT_REPLAYED_HEADER] == "true"
+
+
+def test_idempotency_key_reused_for_another_request(database_path: Path):
+    with TestClient(create_app()) as client:
+        headers = {"Idempotency-Key": "booking-1"}
+        client.post("/reservations/", json=RESERVATION, headers=headers)
+        reused = client.post(
+            "/reservations/",
+            json={**RESERVATION, "amount_of_people": 3},
+            headers=headers,
+        )
+
+    assert reused.status_code == 422
+    assert reused.json() == {
+        "message": "Idempotency key: booking-1 was used for a different request",
+        "name": "IdempotencyKeyReusedError",
+        "status_code": 422,
+    }
+
+
+def test_idempotency_key_in_progress(database_path: Path):
+    scope = {"method": "POST", "path": "/reservations/", "query_string": b""}
+    body = json.dumps(RESERVATION).encode()
+
+    app = create_app()
+    with TestClient(app) as client:
+        client.portal.call(
+            app.state.idempotency_store.claim,
+            key_digest(scope, "booking-1"),
+            request_digest(scope, body),
+        )
+        in_progress = client.post(
+            "/reservations/",
+            content=body,
+            headers={
+                "Idempotency-Key": "booking-1",
+                "Content-Type": "application/json",
+            },
+        )
+
+    assert in_progress.status_code == 409
+    assert in_progress.json() == {
+        "message": "A request with idempotency key: booking-1 is still in progress",
+        "name": "IdempotencyKeyInProgressError",
+        "status_code": 409,
+    }
+
+
+def test_expired_idempotency_key_runs_the_request_again(
+    database_path: Path, monkeypatch
+):
+    monkeypatch.setenv("COWORLD_IDEMPOTENCY_TTL_SECONDS", "0")
+
+    app = create_app()
+    with TestClient(app) as client:
+        headers = {"Idempotency-Key": "booking-1"}
+        first = client.post("/reservations/", json=RESERVATION, headers=headers)
+        second = client.post("/reservations/", json=RESERVATION, headers=headers)
+        purged = client.portal.call(app.state.idempotency_store.purge)
+
+    assert first.json()["id"] != second.json()["id"]
+    assert IDEMPOTENT_REPLAYED_HEADER not in second.headers
+    assert purged == 1
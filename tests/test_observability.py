@@ -0,0 +1,93 @@
+import json
+
+import pytest
+from loguru import logger
+from sqlalchemy import text
+from starlette.testclient import TestClient
+
+from coworld.database import create_engine_from_settings
+from coworld.observability import REQUEST_ID_HEADER, request_id_var
+from coworld.settings import Settings
+
+
+@pytest.fixture(name="slow_query_records")
+def fixture_slow_query_records():
+    records = []
+    sink_id = logger.add(
+        lambda message: records.append(json.loads(message)["record"]),
+        serialize=True,
+        filter=lambda record: "slow_query" in record["extra"],
+    )
+    yield records
+    logger.remove(sink_id)
+
+
+@pytest.mark.asyncio
+async def test_slow_query_is_logged_with_context(slow_query_records) -> None:
+    engine = create_engine_from_settings(
+        Settings(database_url="sqlite+aiosqlite://", slow_query_threshold_ms=0)
+    )
+    token = request_id_var.set("abc123")
+
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT :value"), {"value": 1})
+    finally:
+        request_id_var.reset(token)
+        await engine.dispose()
+
+    extra = slow_query_records[-1]["extra"]
+    assert extra["statement"] == "SELECT ?"
+    assert extra["parameters"] == ["int"]
+    assert extra["request_id"] == "abc123"
+    assert extra["route"] is None
+    assert extra["duration_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_failed_statements_leave_no_timing_state(slow_query_records) -> None:
+    engine = create_engine_from_settings(
+        Settings(database_url="sqlite+aiosqlite://", slow_query_threshold_ms=0)
+    )
+
+    try:
+        async with engine.connect() as connection:
+            for _ in range(3):
+                with pytest.raises(Exception):
+                    await connection.execute(text("SELECT * FROM missing_table"))
+            await connection.execute(text("SELECT 1"))
+            connection_info = dict((await connection.get_raw_connection()).info)
+    finally:
+        await engine.dispose()
+
+    assert "query_start_time" not in connection_info
+    assert [record["extra"]["statement"] for record in slow_query_records] == [
+        "SELECT 1"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_fast_query_is_not_logged(slow_query_records) -> None:
+    engine = create_engine_from_settings(
+        Settings(database_url="sqlite+aiosqlite://", slow_query_threshold_ms=60_000)
+    )
+
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+    await engine.dispose()
+
+    assert slow_query_records == []
+
+
+@pytest.mark.asyncio
+async def test_request_id_header_is_echoed(client: TestClient) -> None:
+    response = client.get("/metrics/database", headers={REQUEST_ID_HEADER: "req-1"})
+
+    assert response.headers[REQUEST_ID_HEADER] == "req-1"
+
+
+@pytest.mark.asyncio
+async def test_request_id_header_is_generated(client: TestClient) -> None:
+    response = client.get("/metrics/database")
+
+    assert len(response.headers[REQUEST_ID_HEADER]) == 32
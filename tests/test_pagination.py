@@ -0,0 +1,32 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from coworld.models.errors import InvalidCursorError
+from coworld.pagination import decode_cursor, encode_cursor, page_size
+from coworld.settings import get_settings
+
+
+def test_cursor_round_trip() -> None:
+    created_at = datetime(2024, 6, 1, 20, 30, 15, 123456)
+    _id = uuid.uuid4()
+
+    cursor = encode_cursor(created_at, _id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, _id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "////", "MjAyNA"])
+def test_decode_invalid_cursor(cursor: str) -> None:
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_page_size_uses_default_and_cap() -> None:
+    settings = get_settings()
+
+    assert page_size(None) == settings.page_size_default
+    assert page_size(3) == 3
+    assert page_size(settings.page_size_max + 1) == settings.page_size_max
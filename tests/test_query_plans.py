@@ -0,0 +1,162 @@
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from coworld.controllers.reservations import ReservationController
+from coworld.models.reservations import ReservationCategory
+
+SEEDED_RESERVATIONS = 1_000_000
+
+SEED_RESERVATIONS = """
+WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+INSERT INTO reservation (
+    id, created_at, reservation_category, name, family_name, amount_of_people,
+    email_address, reservation_time, phone_number
+)
+SELECT
+    lower(hex(randomblob(16))),
+    datetime('2023-01-01', '+' || n || ' seconds') || '.000000',
+    CASE WHEN n % 10 = 0 THEN 'BIRTHDAY' ELSE 'SIMPLE' END,
+    'Cow',
+    'Cowcow',
+    n % 8 + 1,
+    'cow' || n || '@coworld.fr',
+    datetime('2023-01-01', '+' || (n * 7919 % 1051200) || ' minutes') || '.000000',
+    '+336' || printf('%08d', n)
+FROM seq
+"""
+
+
+@pytest.fixture(name="seeded_database", scope="module")
+def fixture_seeded_database(tmp_path_factory) -> Path:
+    database_path = tmp_path_factory.mktemp("query_plans") / "coworld.db"
+    engine = create_engine(f"sqlite:///{database_path}")
+    SQLModel.metadata.create_all(engine)
+    engine.dispose()
+    with sqlite3.connect(database_path) as connection:
+        connection.execute(SEED_RESERVATIONS, (SEEDED_RESERVATIONS,))
+        connection.execute("ANALYZE")
+    return database_path
+
+
+@pytest_asyncio.fixture(name="queries")
+async def fixture_queries(seeded_database: Path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{seeded_database}")
+    queries = []
+
+    def record_query(conn, cursor, statement, parameters, *args) -> None:
+        queries.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record_query)
+    async with AsyncSession(engine) as session:
+        yield ReservationController(session), queries
+    await engine.dispose()
+
+
+def query_plan(database_path: Path, statement: str, parameters: tuple) -> str:
+    with sqlite3.connect(database_path) as connection:
+        rows = connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return "\n".join(row[-1] for row in rows)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "filters, index",
+    [
+        (
+            {
+                "reservation_time_from": datetime(2024, 6, 1, 18),
+                "reservation_time_to": datetime(2024, 6, 1, 23),
+            },
+            "ix_reservation_reservation_time_id",
+        ),
+        (
+            {
+                "reservation_time_from": datetime(2024, 6, 1, 18),
+                "reservation_time_to": datetime(2024, 6, 1, 23),
+                "reservation_category": ReservationCategory.BIRTHDAY,
+            },
+            "ix_reservation_category_reservation_time_id",
+        ),
+        (
+            {"reservation_category": ReservationCategory.BIRTHDAY},
+            "ix_reservation_category_reservation_time_id",
+        ),
+    ],
+)
+async def test_time_range_queries_use_reservation_time_indexes(
+    seeded_database: Path, queries, filters: dict, index: str
+) -> None:
+    # Prepare
+    reservation_controller, statements = queries
+
+    # Act
+    first_page = await reservation_controller.get_reservations(limit=10, **filters)
+    await reservation_controller.get_reservations(
+        cursor=first_page.next_cursor, limit=10, **filters
+    )
+
+    # Assert
+    assert len(statements) == 2
+    for statement, parameters in statements:
+        plan = query_plan(seeded_database, statement, parameters)
+        assert f"SEARCH reservation USING INDEX {index}" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "category, index",
+    [
+        (None, "ix_reservation_reservation_time_id"),
+        (ReservationCategory.SIMPLE, "ix_reservation_category_reservation_time_id"),
+    ],
+)
+async def test_day_view_uses_reservation_time_indexes(
+    seeded_database: Path, queries, category: ReservationCategory | None, index: str
+) -> None:
+    # Prepare
+    reservation_controller, statements = queries
+
+    # Act
+    reservations = await reservation_controller.get_reservations_for_day(
+        date(2024, 6, 1), category
+    )
+
+    # Assert
+    assert reservations
+    [(statement, parameters)] = statements
+    plan = query_plan(seeded_database, statement, parameters)
+    assert f"SEARCH reservation USING INDEX {index}" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "criteria, index",
+    [
+        ({"email_address": "cow4242@coworld.fr"}, "ix_reservation_email_address"),
+        ({"phone_number": "+33 6 00 00 42 42"}, "ix_reservation_phone_number"),
+    ],
+)
+async def test_search_uses_contact_indexes(
+    seeded_database: Path, queries, criteria: dict, index: str
+) -> None:
+    # Prepare
+    reservation_controller, statements = queries
+
+    # Act
+    reservations = await reservation_controller.search_reservations(**criteria)
+
+    # Assert
+    assert len(reservations) == 1
+    [(statement, parameters)] = statements
+    plan = query_plan(seeded_database, statement, parameters)
+    assert f"SEARCH reservation USING INDEX {index}" in plan
@@ -0,0 +1,280 @@
+import asyncio
+import gzip
+import json
+import random
+from uuid import UUID
+
+import pytest
+from faker import Faker
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from coworld.cache import (
+    BroadcastCacheBackend,
+    CacheBackend,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    cached,
+    create_cache_from_settings,
+)
+from coworld.controllers.dishes import DishController
+from coworld.controllers.menus import MenuController, menu_tags
+from coworld.models.dishes import Category, DishCreate, DishUpdate
+from coworld.models.menus import MenuCreate
+from coworld.models.menus_dishes_links import MenuDishLinksCreate
+from coworld.models.models import MenuWithDishes
+from coworld.pagination import NEXT_CURSOR_HEADER
+from coworld.responses import (
+    ENCODED_RESPONSE_CODEC,
+    EncodedResponse,
+    ResponseEncoder,
+    encode_response,
+)
+from coworld.settings import Settings
+
+
+MENU_WITH_DISHES = ResponseEncoder(MenuWithDishes)
+
+
+@pytest.fixture(name="redis_server")
+def fixture_redis_server() -> FakeServer:
+    return FakeServer()
+
+
+def redis_backend(server: FakeServer) -> RedisCacheBackend:
+    return RedisCacheBackend(FakeRedis(server=server), 60, "test:cache")
+
+
+def encoded_redis_backend(server: FakeServer) -> RedisCacheBackend:
+    return RedisCacheBackend(
+        FakeRedis(server=server), 60, "test:cache", ENCODED_RESPONSE_CODEC
+    )
+
+
+def broadcast_backend(server: FakeServer) -> BroadcastCacheBackend:
+    return BroadcastCacheBackend(
+        MemoryCacheBackend(100, 60), FakeRedis(server=server), "test:invalidations"
+    )
+
+
+async def wait_for(condition) -> None:
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
+
+
+async def cached_menu(
+    cache: CacheBackend, menu_controller: MenuController, menu_id: UUID
+) -> list[dict]:
+    async def encode() -> EncodedResponse:
+        menu = await menu_controller.get_menu_by_id(menu_id)
+        return encode_response(MENU_WITH_DISHES, menu, menu_tags([menu]))
+
+    encoded = await cached(cache, ("json", ("menu", menu_id)), encode, lambda e: e.tags)
+    return json.loads(encoded.content)["dishes"]
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_round_trips_encoded_responses(
+    redis_server: FakeServer,
+) -> None:
+    # Prepare
+    cache = encoded_redis_backend(redis_server)
+    encoded = EncodedResponse(
+        b'["a", "b"]',
+        {"gzip": gzip.compress(b'["a", "b"]')},
+        frozenset({"menus", "menu:1"}),
+        "digest",
+        {NEXT_CURSOR_HEADER: "cursor"},
+    )
+
+    # Act
+    await cache.set("key", encoded, encoded.tags, await cache.generation())
+    found, value = await cache.get("key")
+
+    # Assert
+    assert found is True
+    assert value == encoded
+    assert (await cache.statistics()).hits == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_stores_json_by_default(redis_server: FakeServer) -> None:
+    # Prepare
+    cache = redis_backend(redis_server)
+
+    # Act
+    await cache.set("key", {"title": "Amazing Cow"}, {"tag"}, 0)
+
+    # Assert
+    raw = await FakeRedis(server=redis_server).get(cache.entry_key("key"))
+    assert json.loads(raw) == {"title": "Amazing Cow"}
+    assert await cache.get("key") == (True, {"title": "Amazing Cow"})
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_invalidation_is_shared_between_workers(
+    redis_server: FakeServer,
+) -> None:
+    # Prepare
+    worker_a = redis_backend(redis_server)
+    worker_b = redis_backend(redis_server)
+    await worker_b.set("menu", "menu", {"menu:1", "dish:1"}, 0)
+    await worker_b.set("other", "other", {"dish:2"}, 0)
+
+    # Act
+    await worker_a.invalidate("dish:1")
+
+    # Assert
+    assert await worker_b.get("menu") == (False, None)
+    assert await worker_b.get("other") == (True, "other")
+    assert (await worker_a.statistics()).invalidations == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_refuses_value_loaded_before_invalidation(
+    redis_server: FakeServer,
+) -> None:
+    # Prepare
+    worker_a = redis_backend(redis_server)
+    worker_b = redis_backend(redis_server)
+    generation = await worker_b.generation()
+
+    # Act
+    await worker_a.invalidate("dish:1")
+    stored = await worker_b.set("menu", "stale", {"dish:1"}, generation)
+
+    # Assert
+    assert stored is False
+    assert await worker_b.get("menu") == (False, None)
+    assert await worker_b.set("menu", "fresh", {"dish:1"}, await worker_b.generation())
+
+
+@pytest.mark.asyncio
+async def test_broadcast_evicts_entries_on_other_workers(
+    redis_server: FakeServer,
+) -> None:
+    # Prepare
+    worker_a = broadcast_backend(redis_server)
+    worker_b = broadcast_backend(redis_server)
+    await worker_a.start()
+    await worker_b.start()
+    await worker_a.set("menu", "menu a", {"dish:1"}, 0)
+    await worker_b.set("menu", "menu b", {"dish:1"}, 0)
+
+    # Act
+    await worker_a.invalidate("dish:1")
+    await wait_for(lambda: worker_b.received == 1)
+
+    # Assert
+    assert await worker_a.get("menu") == (False, None)
+    assert await worker_b.get("menu") == (False, None)
+    assert worker_a.received == 0
+    assert (await worker_b.statistics()).backend == "memory+broadcast"
+    await worker_a.close()
+    await worker_b.close()
+
+
+@pytest.mark.asyncio
+async def test_broadcast_starts_uncached_while_redis_is_unreachable(
+    redis_server: FakeServer,
+) -> None:
+    # Prepare
+    redis_server.connected = False
+    cache = BroadcastCacheBackend(
+        MemoryCacheBackend(100, 60),
+        FakeRedis(server=redis_server),
+        "test:invalidations",
+        reconnect_delay_seconds=0.01,
+        subscribe_timeout_seconds=0.05,
+    )
+    loads = []
+
+    async def load() -> int:
+        loads.append(len(loads))
+        return loads[-1]
+
+    # Act
+    await asyncio.wait_for(cache.start(), 1)
+    unreachable = [
+        await cache.get_or_load("key", load, lambda _: {"tag"}) for _ in range(2)
+    ]
+    await cache.invalidate("tag")
+    redis_server.connected = True
+    await asyncio.wait_for(cache.subscribed.wait(), 1)
+    reachable = [
+        await cache.get_or_load("key", load, lambda _: {"tag"}) for _ in range(2)
+    ]
+
+    # Assert
+    assert unreachable == [0, 1]
+    assert reachable == [2, 2]
+    await cache.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", [encoded_redis_backend, broadcast_backend])
+async def test_dish_update_on_one_worker_evicts_menus_on_another(
+    session: AsyncSession, redis_server: FakeServer, faker: Faker, backend
+) -> None:
+    # Prepare
+    cache_a = backend(redis_server)
+    cache_b = backend(redis_server)
+    await cache_a.start()
+    await cache_b.start()
+    dish_controller_a = DishController(session, cache_a)
+    menu_controller_b = MenuController(session, cache_b)
+    dish = await dish_controller_a.create_dish(
+        DishCreate(
+            title=faker.unique.text(max_nb_chars=12),
+            description=faker.text(max_nb_chars=24),
+            category=random.choice(list(Category)),
+            ingredients=faker.text(max_nb_chars=24),
+            price=10.0,
+            halal=random.choice([True, False]),
+        )
+    )
+    menu = await menu_controller_b.create_menu(
+        MenuCreate(
+            title=faker.unique.text(max_nb_chars=12),
+            description=faker.text(max_nb_chars=24),
+            price=random.uniform(2.99, 99.99),
+        )
+    )
+    await menu_controller_b.add_dish_to_menu(
+        menu.id, MenuDishLinksCreate(dish_ids=[dish.id], menu_id=menu.id)
+    )
+    assert [
+        d["price"] for d in (await cached_menu(cache_b, menu_controller_b, menu.id))
+    ] == [10.0]
+
+    # Act
+    await dish_controller_a.update_dish(dish.id, DishUpdate(price=42.0))
+    if isinstance(cache_b, BroadcastCacheBackend):
+        await wait_for(lambda: cache_b.received == 2)
+
+    # Assert
+    dishes = await cached_menu(cache_b, menu_controller_b, menu.id)
+    assert [d["price"] for d in dishes] == [42.0]
+    await cache_a.close()
+    await cache_b.close()
+
+
+def test_create_cache_from_settings() -> None:
+    assert isinstance(create_cache_from_settings(Settings()), MemoryCacheBackend)
+    assert create_cache_from_settings(Settings(cache_enabled=False)) is None
+    assert isinstance(
+        create_cache_from_settings(Settings(cache_redis_url="redis://localhost:6379")),
+        BroadcastCacheBackend,
+    )
+    assert isinstance(
+        create_cache_from_settings(
+            Settings(cache_backend="redis", cache_redis_url="redis://localhost:6379")
+        ),
+        RedisCacheBackend,
+    )
+    with pytest.raises(ValueError):
+        create_cache_from_settings(Settings(cache_backend="redis"))
@@ -0,0 +1,192 @@
+import gzip
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from starlette.requests import Request
+from starlette.testclient import TestClient
+
+from coworld.api import create_app
+from coworld.models.models import Menu, MenuWithDishes
+from coworld.pagination import Page
+from coworld.responses import (
+    ResponseEncoder,
+    cache_control,
+    default_response_class,
+    encode_response,
+    if_none_match,
+)
+from coworld.settings import Settings, get_settings
+
+
+def menu(title: str) -> Menu:
+    return Menu(
+        id=uuid.uuid4(),
+        created_at=datetime(2020, 1, 1),
+        title=title,
+        description="The Amazing Cow menu, juicy and tasty.",
+        price=6.99,
+        discount=10.0,
+    )
+
+
+def request_with(header: str, value: str, path: str = "/") -> Request:
+    return Request(
+        {
+            "type": "http",
+            "path": path,
+            "query_string": b"",
+            "headers": [(header.encode(), value.encode())],
+        }
+    )
+
+
+def test_encode_response_matches_response_model() -> None:
+    # Prepare
+    encoder = ResponseEncoder(MenuWithDishes, many=True)
+    menus = Page([menu("Amazing Cow")], next_cursor="cursor")
+
+    # Act
+    encoded = encode_response(encoder, menus, {"menus"})
+
+    # Assert
+    assert encoded.content == TypeAdapter(list[MenuWithDishes]).dump_json(
+        [MenuWithDishes.model_validate(menus[0])]
+    )
+    assert encoded.compressed == {}
+    assert encoded.tags == frozenset({"menus"})
+    assert encoded.headers == {"X-Next-Cursor": "cursor"}
+
+
+def test_encode_response_compresses_large_payloads() -> None:
+    # Prepare
+    encoder = ResponseEncoder(Menu, many=True)
+    menus = [menu(f"Amazing Cow {index}") for index in range(50)]
+
+    # Act
+    encoded = encode_response(encoder, menus, (), precompress=True)
+
+    # Assert
+    assert len(encoded.content) >= get_settings().compression_min_bytes
+    assert gzip.decompress(encoded.compressed["gzip"]) == encoded.content
+    assert (
+        encode_response(encoder, menus, (), precompress=True).compressed
+        == encoded.compressed
+    )
+    assert encode_response(encoder, menus, ()).compressed == {}
+
+
+def test_one_off_responses_are_not_precompressed(database_path, monkeypatch) -> None:
+    # Prepare
+    def fail_compress(*args, **kwargs):
+        raise AssertionError("one-off responses must not be precompressed")
+
+    monkeypatch.setattr("coworld.responses.compress", fail_compress)
+    reservation = {
+        "reservation_category": "SIMPLE",
+        "name": "Cow" * 400,
+        "family_name": "Cowcow",
+        "amount_of_people": 2,
+        "email_address": "cow@coworld.fr",
+        "reservation_time": "2024-06-01T20:00:00",
+        "phone_number": "+33633445566",
+    }
+
+    # Act
+    with TestClient(create_app()) as client:
+        client.post("/reservations/", json=reservation)
+        identity = client.get("/reservations/", headers={"Accept-Encoding": "identity"})
+        compressed = client.get("/reservations/", headers={"Accept-Encoding": "gzip"})
+        not_modified = client.get(
+            "/reservations/",
+            headers={
+                "Accept-Encoding": "gzip",
+                "If-None-Match": compressed.headers["etag"],
+            },
+        )
+
+    # Assert
+    assert "content-encoding" not in identity.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"] == f"W/{identity.headers['etag']}"
+    assert compressed.json() == identity.json()
+    assert not_modified.status_code == 304
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"other", "abc"', True),
+        ("*", True),
+        ('"other"', False),
+        ('"abc-gzip"', False),
+    ],
+)
+def test_if_none_match(header: str, expected: bool) -> None:
+    assert if_none_match(request_with("if-none-match", header), '"abc"') is expected
+
+
+def test_cache_control_is_configured_per_route(monkeypatch) -> None:
+    # Prepare
+    settings = get_settings()
+    monkeypatch.setitem(settings.cache_control_routes, "/menus/", "max-age=30")
+
+    # Act
+    menus = cache_control(request_with("accept", "*/*", "/menus/"))
+    dishes = cache_control(request_with("accept", "*/*", "/dishes/"))
+
+    # Assert
+    assert menus == "max-age=30"
+    assert dishes == settings.cache_control_default
+
+
+@pytest.mark.parametrize(
+    "response_class, expected", [("orjson", ORJSONResponse), ("json", JSONResponse)]
+)
+def test_default_response_class(response_class: str, expected: type) -> None:
+    assert default_response_class(Settings(response_class=response_class)) is expected
+
+
+def test_default_response_class_rejects_unknown_name() -> None:
+    with pytest.raises(ValueError):
+        default_response_class(Settings(response_class="xml"))
+
+
+def test_app_uses_orjson_by_default() -> None:
+    assert create_app().router.default_response_class is ORJSONResponse
+
+
+class TaggedJSONResponse(JSONResponse):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.headers["X-Response-Class"] = "tagged"
+
+
+def test_error_responses_use_the_configured_response_class(
+    database_path: Path, monkeypatch
+) -> None:
+    # Prepare
+    monkeypatch.setattr(
+        "coworld.api.default_response_class", lambda settings: TaggedJSONResponse
+    )
+    headers = {"Idempotency-Key": "dish-1"}
+
+    # Act
+    with TestClient(create_app()) as client:
+        not_found = client.get(f"/dishes/{uuid.uuid4()}")
+        invalid = client.post("/dishes/", json={"title": "Cow"}, headers=headers)
+        reused = client.post("/dishes/", json={"title": "Bull"}, headers=headers)
+        unknown_route = client.get("/unknown/")
+
+    # Assert
+    assert [
+        (response.status_code, response.headers.get("x-response-class"))
+        for response in (not_found, invalid, reused, unknown_route)
+    ] == [(404, "tagged"), (422, "tagged"), (422, "tagged"), (404, "tagged")]
+    assert reused.json()["name"] == "IdempotencyKeyReusedError"
+    assert unknown_route.json() == {"detail": "Not Found"}
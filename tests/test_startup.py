@@ -0,0 +1,165 @@
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+from starlette.testclient import TestClient
+
+from coworld.api import create_app
+from coworld.settings import get_settings
+
+IMPORT_TIME_BUDGET_MS = 1200
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def table_names(database_path: Path) -> set[str]:
+    with sqlite3.connect(database_path) as connection:
+        rows = connection.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        return {name for (name,) in rows}
+
+
+def test_import_api_is_within_budget_and_does_not_touch_the_database(
+    tmp_path,
+) -> None:
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        "import coworld.api\n"
+        "print((time.perf_counter() - start) * 1000)\n"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        env={"PYTHONPATH": str(ROOT)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert float(result.stdout) < IMPORT_TIME_BUDGET_MS
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_lifespan_creates_schema(database_path: Path) -> None:
+    with TestClient(create_app()):
+        pass
+
+    assert {"dish", "menu", "menudishlinks", "reservation"} <= table_names(
+        database_path
+    )
+
+
+def test_lifespan_skips_schema_when_disabled(database_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("COWORLD_DATABASE_CREATE_SCHEMA", "false")
+    get_settings.cache_clear()
+
+    with TestClient(create_app()):
+        pass
+
+    assert table_names(database_path) == set()
+
+
+def test_lifespan_fills_new_seating_slots_from_reservations(
+    database_path: Path,
+) -> None:
+    reservation = {
+        "reservation_category": "SIMPLE",
+        "name": "aaaaaa",
+        "family_name": "vvvvvv",
+        "amount_of_people": 6,
+        "email_address": "vvvvv@admin.com",
+        "reservation_time": "2024-06-01T20:00:00",
+        "phone_number": "+33633445566",
+    }
+    with TestClient(create_app()) as client:
+        client.post("/reservations/", json=reservation)
+    with sqlite3.connect(database_path) as connection:
+        connection.execute("DROP TABLE seatingslot")
+
+    with TestClient(create_app()) as client:
+        availability = client.get(
+            "/reservations/availability", params={"date": "2024-06-01"}
+        ).json()
+
+    slots = {slot["time"]: slot["booked_seats"] for slot in availability["slots"]}
+    assert slots["2024-06-01T19:45:00"] == 0
+    assert slots["2024-06-01T20:00:00"] == slots["2024-06-01T21:45:00"] == 6
+    assert slots["2024-06-01T22:00:00"] == 0
+
+
+def insert_reservation(connection: sqlite3.Connection) -> None:
+    connection.execute(
+        "INSERT INTO reservation (id, created_at, reservation_category, name, "
+        "family_name, amount_of_people, email_address, reservation_time, "
+        "phone_number) VALUES ('0123456789abcdef0123456789abcdef', "
+        "'2024-01-01 00:00:00.000000', 'SIMPLE', 'aaaaaa', 'vvvvvv', 6, "
+        "'vvvvv@admin.com', '2024-06-01 20:00:00.000000', '+33633445566')"
+    )
+
+
+def booked_seats(client: TestClient, day: str) -> dict[str, int]:
+    availability = client.get("/reservations/availability", params={"date": day})
+    return {slot["time"]: slot["booked_seats"] for slot in availability.json()["slots"]}
+
+
+def test_lifespan_rebuilds_seating_slots_when_the_grid_changes(
+    database_path: Path, monkeypatch
+) -> None:
+    reservation = {
+        "reservation_category": "SIMPLE",
+        "name": "aaaaaa",
+        "family_name": "vvvvvv",
+        "amount_of_people": 6,
+        "email_address": "vvvvv@admin.com",
+        "reservation_time": "2024-06-01T20:10:00",
+        "phone_number": "+33633445566",
+    }
+    with TestClient(create_app()) as client:
+        client.post("/reservations/", json=reservation)
+    monkeypatch.setenv("COWORLD_AVAILABILITY_SLOT_MINUTES", "30")
+    get_settings.cache_clear()
+
+    with TestClient(create_app()) as client:
+        slots = booked_seats(client, "2024-06-01")
+
+    assert slots["2024-06-01T19:30:00"] == 0
+    assert slots["2024-06-01T20:00:00"] == slots["2024-06-01T21:30:00"] == 6
+    assert slots["2024-06-01T22:00:00"] == 0
+
+
+def test_lifespan_rebuilds_seating_slots_without_creating_the_schema(
+    database_path: Path, monkeypatch
+) -> None:
+    with TestClient(create_app()):
+        pass
+    with sqlite3.connect(database_path) as connection:
+        connection.execute("DELETE FROM seatinggrid")
+        insert_reservation(connection)
+    monkeypatch.setenv("COWORLD_DATABASE_CREATE_SCHEMA", "false")
+    get_settings.cache_clear()
+
+    with TestClient(create_app()) as client:
+        slots = booked_seats(client, "2024-06-01")
+
+    assert slots["2024-06-01T20:00:00"] == slots["2024-06-01T21:45:00"] == 6
+
+
+def test_lifespan_rebuilds_seating_slots_on_request(
+    database_path: Path, monkeypatch
+) -> None:
+    with TestClient(create_app()):
+        pass
+    with sqlite3.connect(database_path) as connection:
+        insert_reservation(connection)
+
+    with TestClient(create_app()) as client:
+        stale_slots = booked_seats(client, "2024-06-01")
+    monkeypatch.setenv("COWORLD_AVAILABILITY_REBUILD_ON_STARTUP", "true")
+    get_settings.cache_clear()
+    with TestClient(create_app()) as client:
+        rebuilt_slots = booked_seats(client, "2024-06-01")
+
+    assert stale_slots["2024-06-01T20:00:00"] == 0
+    assert rebuilt_slots["2024-06-01T20:00:00"] == 6